@@ -0,0 +1,175 @@
+"""
+Local stand-in for the USDA FoodData Central `/foods/search` endpoint
+
+Serves recorded payloads from `benchmarks/data/foods_search.json` and synthesizes
+deterministic results for any other query, with configurable latency and error rate.
+
+Usage:
+    python -m benchmarks.fake_usda --port 9100 --latency-ms 80 --jitter-ms 40 --error-rate 0.01
+    python -m benchmarks.fake_usda --latency-ms 80 --tail-rate 0.05 --tail-ms 2000  # hedging
+    python -m benchmarks.fake_usda --quota-per-key 100  # API key pool (429 past the quota)
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+DEFAULT_PAYLOADS = os.path.join(os.path.dirname(__file__), "data", "foods_search.json")
+
+
+def load_payloads(path: str = DEFAULT_PAYLOADS) -> Dict[str, Dict[str, Any]]:
+    """Load recorded search payloads keyed by normalized query"""
+    with open(path) as f:
+        return {key.lower().strip(): value for key, value in json.load(f).items()}
+
+
+def synthetic_payload(query: str) -> Dict[str, Any]:
+    """Deterministic USDA-shaped payload for queries without a recording"""
+    digest = int(hashlib.md5(query.encode()).hexdigest(), 16)
+    if digest % 10 == 0:
+        # Roughly one in ten unknown dishes resolves to nothing, like the real API
+        return {"totalHits": 0, "foods": []}
+    calories = 50 + digest % 550
+    return {
+        "totalHits": 1,
+        "foods": [
+            {
+                "fdcId": 9_000_000 + digest % 1_000_000,
+                "description": query.upper(),
+                "dataType": "Branded",
+                "score": 400.0,
+                "servingSize": 100 + digest % 150,
+                "servingSizeUnit": "g",
+                "foodNutrients": [
+                    {"nutrientId": 1008, "nutrientName": "Energy", "unitName": "KCAL", "value": calories},
+                    {"nutrientId": 1003, "nutrientName": "Protein", "unitName": "G", "value": digest % 30},
+                    {"nutrientId": 1004, "nutrientName": "Total lipid (fat)", "unitName": "G", "value": digest % 25},
+                    {"nutrientId": 1005, "nutrientName": "Carbohydrate, by difference", "unitName": "G", "value": digest % 60},
+                ],
+            }
+        ],
+    }
+
+
+def create_fake_usda_app(
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    tail_rate: float = 0.0,
+    tail_ms: float = 0.0,
+    quota_per_key: int = 0,
+    payloads_path: Optional[str] = DEFAULT_PAYLOADS,
+    seed: Optional[int] = None,
+) -> FastAPI:
+    """
+    Build the fake USDA app
+
+    Args:
+        latency_ms: Base response latency
+        jitter_ms: Uniform extra latency in [0, jitter_ms]
+        error_rate: Fraction of requests answered with HTTP 503
+        tail_rate: Fraction of requests delayed by an extra tail_ms (latency tail)
+        tail_ms: Extra latency of tail requests
+        quota_per_key: Requests allowed per api_key before 429 (0 = unlimited),
+            reported in X-RateLimit-Limit / X-RateLimit-Remaining
+        payloads_path: Recorded payload file (None for synthetic only)
+        seed: Random seed for reproducible latency/error sequences
+    """
+    app = FastAPI(title="Fake USDA FoodData Central")
+    payloads = load_payloads(payloads_path) if payloads_path else {}
+    rng = random.Random(seed)
+    stats = Counter()
+    queries = Counter()
+    key_usage = Counter()
+
+    @app.get("/fdc/v1/foods/search")
+    async def foods_search(query: str = Query(...), api_key: str = Query("")):
+        stats["requests"] += 1
+        queries[query.lower().strip()] += 1
+
+        headers = {}
+        if quota_per_key:
+            key_usage[api_key] += 1
+            remaining = max(0, quota_per_key - key_usage[api_key])
+            headers = {"X-RateLimit-Limit": str(quota_per_key), "X-RateLimit-Remaining": str(remaining)}
+            if key_usage[api_key] > quota_per_key:
+                stats["throttled"] += 1
+                return JSONResponse(
+                    status_code=429, content={"error": "OVER_RATE_LIMIT"}, headers=headers
+                )
+
+        delay = latency_ms + rng.uniform(0, jitter_ms)
+        if tail_rate and rng.random() < tail_rate:
+            stats["tail"] += 1
+            delay += tail_ms
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        if rng.random() < error_rate:
+            stats["errors"] += 1
+            return JSONResponse(status_code=503, content={"error": "injected failure"})
+
+        stats["ok"] += 1
+        key = query.lower().strip()
+        return JSONResponse(payloads.get(key) or synthetic_payload(key), headers=headers)
+
+    @app.get("/stats")
+    async def get_stats():
+        return {
+            "requests": stats["requests"],
+            "ok": stats["ok"],
+            "errors": stats["errors"],
+            "tail": stats["tail"],
+            "throttled": stats["throttled"],
+            "unique_queries": len(queries),
+        }
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        stats.clear()
+        queries.clear()
+        key_usage.clear()
+        return {"status": "reset"}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake USDA /foods/search server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--tail-rate", type=float, default=0.0)
+    parser.add_argument("--tail-ms", type=float, default=0.0)
+    parser.add_argument("--quota-per-key", type=int, default=0)
+    parser.add_argument("--payloads", default=DEFAULT_PAYLOADS)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    app = create_fake_usda_app(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        tail_rate=args.tail_rate,
+        tail_ms=args.tail_ms,
+        quota_per_key=args.quota_per_key,
+        payloads_path=args.payloads,
+        seed=args.seed,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+End-to-end load test against the API with a local fake USDA server
+
+Starts the fake USDA server and the app (uvicorn, SQLite in a temp dir), then drives
+open-loop mixed traffic against `/auth/register`, `/auth/login` and `/get-calories`
+at a target RPS with Zipf-distributed dish names. Latency is measured from each
+request's scheduled start, so queueing in the client counts against the server.
+
+Usage:
+    python -m benchmarks.load_test --rps 50 --duration 30 --output results.json
+    python -m benchmarks.load_test --app-url http://127.0.0.1:8000 --usda-url http://127.0.0.1:9100
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.fake_usda import DEFAULT_PAYLOADS, load_payloads
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ("register", "login", "calories")
+
+
+def free_port() -> int:
+    """Ask the OS for an unused TCP port"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def _summary(sorted_values: List[float]) -> Dict[str, Optional[float]]:
+    """Latency percentiles in milliseconds, rounded for readable output"""
+    return {
+        f"{name}_ms": None if value is None else round(value, 3)
+        for name, value in (
+            ("p50", percentile(sorted_values, 50)),
+            ("p95", percentile(sorted_values, 95)),
+            ("p99", percentile(sorted_values, 99)),
+            ("max", sorted_values[-1] if sorted_values else None),
+        )
+    }
+
+
+class ZipfDishes:
+    """Samples dish names with Zipf(s) popularity over a fixed vocabulary"""
+
+    def __init__(self, names: List[str], s: float, rng: random.Random):
+        self.names = names
+        self.rng = rng
+        self.cum_weights = list(
+            itertools.accumulate(1.0 / (rank ** s) for rank in range(1, len(names) + 1))
+        )
+
+    def sample(self) -> str:
+        return self.rng.choices(self.names, cum_weights=self.cum_weights)[0]
+
+
+def build_vocabulary(size: int, payloads_path: str = DEFAULT_PAYLOADS) -> List[str]:
+    """Recorded dishes first (most popular), padded with synthetic dish names"""
+    names = list(load_payloads(payloads_path).keys())
+    names += [f"bench dish {i}" for i in range(size - len(names))]
+    return names[:size]
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse 'register=0.05,login=0.15,calories=0.8' into normalized weights"""
+    weights = {}
+    for part in mix.split(","):
+        name, _, value = part.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in mix: {name}")
+        weights[name.strip()] = float(value)
+    total = sum(weights.values())
+    return {name: weight / total for name, weight in weights.items()}
+
+
+def spawn(cmd: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        cmd, cwd=REPO_ROOT, env={**os.environ, **env},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_until_up(client: httpx.AsyncClient, url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get(url)).status_code < 500:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError(f"Service did not come up: {url}")
+
+
+class LoadTest:
+    """Open-loop traffic generator and result collector"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.dishes = ZipfDishes(build_vocabulary(args.dishes, args.payloads), args.zipf_s, self.rng)
+        self.mix = parse_mix(args.mix)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.users: List[Dict[str, str]] = []
+        self.tokens: List[str] = []
+        self._email_counter = itertools.count()
+
+    def _new_user(self) -> Dict[str, str]:
+        n = next(self._email_counter)
+        return {
+            "first_name": "Bench",
+            "last_name": f"User{n}",
+            "email": f"bench{n}-{self.args.seed}@example.com",
+            "password": "benchpass123",
+        }
+
+    async def seed_users(self, client: httpx.AsyncClient) -> None:
+        """Register the initial user pool (not measured)"""
+        for _ in range(self.args.users):
+            user = self._new_user()
+            response = await client.post("/auth/register", json=user)
+            response.raise_for_status()
+            self.users.append(user)
+            self.tokens.append(response.json()["access_token"])
+
+    async def _one(self, client: httpx.AsyncClient, endpoint: str, scheduled: float) -> None:
+        if endpoint == "register":
+            user = self._new_user()
+            request = client.post("/auth/register", json=user)
+        elif endpoint == "login":
+            user = self.rng.choice(self.users)
+            request = client.post(
+                "/auth/login", json={"email": user["email"], "password": user["password"]}
+            )
+        else:
+            request = client.post(
+                "/get-calories",
+                json={"dish_name": self.dishes.sample(), "servings": self.rng.randint(1, 3)},
+                headers={"Authorization": f"Bearer {self.rng.choice(self.tokens)}"},
+            )
+
+        try:
+            response = await request
+            status = str(response.status_code)
+            if endpoint == "register" and response.status_code == 201:
+                self.users.append(user)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        self.latencies[endpoint].append((time.perf_counter() - scheduled) * 1000)
+        self.statuses[endpoint][status] += 1
+
+    async def drive(self, client: httpx.AsyncClient) -> float:
+        """Fire requests on an open-loop schedule for the configured duration"""
+        total = int(self.args.rps * self.args.duration)
+        endpoints = list(self.mix)
+        weights = [self.mix[name] for name in endpoints]
+        in_flight = set()
+        start = time.perf_counter()
+
+        for i in range(total):
+            scheduled = start + i / self.args.rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            endpoint = self.rng.choices(endpoints, weights=weights)[0]
+            task = asyncio.create_task(self._one(client, endpoint, scheduled))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+        if in_flight:
+            await asyncio.gather(*in_flight)
+        return time.perf_counter() - start
+
+    def report(self, elapsed: float, upstream: Optional[dict]) -> dict:
+        endpoints = {}
+        for endpoint, values in self.latencies.items():
+            values.sort()
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "throughput_rps": round(len(values) / elapsed, 2),
+                **_summary(values),
+                "statuses": dict(self.statuses[endpoint]),
+            }
+        all_values = sorted(v for values in self.latencies.values() for v in values)
+        return {
+            "config": {
+                key: value for key, value in vars(self.args).items() if key != "output"
+            },
+            "elapsed_s": round(elapsed, 3),
+            "requests": len(all_values),
+            "throughput_rps": round(len(all_values) / elapsed, 2),
+            **_summary(all_values),
+            "endpoints": endpoints,
+            "upstream": upstream,
+        }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    processes = []
+    tmpdir = tempfile.mkdtemp(prefix="calory-bench-")
+    try:
+        usda_url = args.usda_url
+        if usda_url is None:
+            usda_port = free_port()
+            usda_url = f"http://127.0.0.1:{usda_port}"
+            processes.append(spawn([
+                sys.executable, "-m", "benchmarks.fake_usda", "--port", str(usda_port),
+                "--latency-ms", str(args.usda_latency_ms), "--jitter-ms", str(args.usda_jitter_ms),
+                "--error-rate", str(args.usda_error_rate), "--seed", str(args.seed),
+                "--payloads", args.payloads,
+            ], {}))
+
+        app_url = args.app_url
+        if app_url is None:
+            app_port = free_port()
+            app_url = f"http://127.0.0.1:{app_port}"
+            processes.append(spawn([
+                sys.executable, "-m", "uvicorn", "main:app", "--port", str(app_port),
+                "--log-level", "warning",
+            ], {
+                "ENVIRONMENT": "dev",
+                "DATABASE_URL": f"sqlite:///{os.path.join(tmpdir, 'bench.db')}",
+                "USDA_BASE_URL": f"{usda_url}/fdc/v1",
+                "USDA_API_KEY": "bench",
+                "API_RATE_LIMIT": str(10 ** 9),
+            }))
+
+        limits = httpx.Limits(max_connections=args.max_connections)
+        timeout = httpx.Timeout(args.timeout)
+        async with httpx.AsyncClient(base_url=app_url, limits=limits, timeout=timeout) as client, \
+                httpx.AsyncClient(base_url=usda_url) as usda:
+            await wait_until_up(usda, "/stats")
+            await wait_until_up(client, "/health")
+
+            test = LoadTest(args)
+            await test.seed_users(client)
+            await usda.post("/stats/reset")
+            elapsed = await test.drive(client)
+            upstream = (await usda.get("/stats")).json()
+            return test.report(elapsed, upstream)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end API load test")
+    parser.add_argument("--rps", type=float, default=50.0, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of traffic")
+    parser.add_argument("--mix", default="register=0.05,login=0.15,calories=0.8")
+    parser.add_argument("--dishes", type=int, default=500, help="Dish vocabulary size")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Zipf exponent")
+    parser.add_argument("--users", type=int, default=20, help="Users registered before the run")
+    parser.add_argument("--usda-latency-ms", type=float, default=80.0)
+    parser.add_argument("--usda-jitter-ms", type=float, default=40.0)
+    parser.add_argument("--usda-error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--payloads", default=DEFAULT_PAYLOADS,
+        help="Recorded search payloads: dish vocabulary and fake USDA responses",
+    )
+    parser.add_argument("--app-url", default=None, help="Use a running app instead of spawning one")
+    parser.add_argument("--usda-url", default=None, help="Use a running fake USDA server")
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Micro-benchmarks for USDAService internals and JWT helpers
+
+Runs over the recorded payloads in `benchmarks/data/foods_search.json` and reports
+ops/sec plus peak transient allocation per op (tracemalloc). Results can be saved as a baseline and
+later runs compared against it; a regression beyond the threshold exits non-zero.
+
+Usage:
+    python -m benchmarks.micro_usda --save-baseline benchmarks/baseline.json
+    python -m benchmarks.micro_usda --compare benchmarks/baseline.json --threshold 0.15
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+os.environ.setdefault("USDA_API_KEY", "bench")
+
+from benchmarks.fake_usda import load_payloads  # noqa: E402
+from src.services.food_record import FoodRecord  # noqa: E402
+from src.services.usda_service import USDAService  # noqa: E402
+from src.utils.auth import create_access_token, verify_token  # noqa: E402
+
+CACHE_SIZES = (100, 10_000, 100_000)
+
+
+def measure(fn: Callable[[], object], min_time: float = 0.2, repeat: int = 5) -> Dict[str, float]:
+    """
+    Time a zero-argument callable
+
+    Calibrates a loop count that runs for at least `min_time`, keeps the best of
+    `repeat` rounds, then measures allocations per call in a separate tracemalloc pass.
+    """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - start >= min_time / 10:
+            break
+        loops *= 2
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, (time.perf_counter() - start) / loops)
+
+    # Peak traced memory above the pre-call level captures transient allocations
+    # that are freed before the call returns (a snapshot diff would only see leaks)
+    alloc_loops = min(loops, 1000)
+    tracemalloc.start()
+    peak_total = 0
+    for _ in range(alloc_loops):
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        fn()
+        peak_total += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+
+    return {
+        "ops_per_sec": round(1.0 / best, 1),
+        "ns_per_op": round(best * 1e9, 1),
+        "peak_alloc_bytes_per_op": round(peak_total / alloc_loops, 1),
+    }
+
+
+def build_cases() -> List[Tuple[str, Callable[[], object]]]:
+    """Benchmark cases, each a (name, zero-argument callable) pair"""
+    service = USDAService()
+    payloads = load_payloads()
+    queries = list(payloads)
+    foods = [food for payload in payloads.values() for food in payload["foods"]]
+    cases = []
+
+    def find_best():
+        for query in queries:
+            service._find_best_food_match(payloads[query]["foods"], query)
+
+    def has_calories():
+        for food in foods:
+            service._has_calorie_data(food)
+
+    def extract_calories():
+        for food in foods:
+            service._extract_calories(food)
+
+    def cache_key():
+        for query in queries:
+            service._get_cache_key(query)
+
+    cases += [
+        ("find_best_food_match", find_best),
+        ("has_calorie_data", has_calories),
+        ("extract_calories", extract_calories),
+        ("get_cache_key", cache_key),
+    ]
+
+    banana = payloads["banana"]["foods"][1]
+    result = FoodRecord.from_usda(banana, service._extract_calories(banana), "banana")
+    for size in CACHE_SIZES:
+        sized = USDAService()
+        keys = [f"dish {i}" for i in range(size)]
+        for key in keys:
+            sized._set_cache(key, result)
+        probe = keys[size // 2]
+        cases += [
+            (f"cache_get[{size}]", lambda s=sized, k=probe: s._get_from_cache(k)),
+            (f"cache_set[{size}]", lambda s=sized, k=probe: s._set_cache(k, result)),
+        ]
+
+    token = create_access_token(data={"sub": "42"})
+    cases += [
+        ("create_access_token", lambda: create_access_token(data={"sub": "42"})),
+        ("verify_token", lambda: verify_token(token)),
+    ]
+    return cases
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """List benchmarks whose throughput dropped more than `threshold` vs the baseline"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        change = current["ops_per_sec"] / previous["ops_per_sec"] - 1
+        current["vs_baseline"] = round(change, 3)
+        if change < -threshold:
+            regressions.append(
+                f"{name}: {previous['ops_per_sec']:.0f} -> {current['ops_per_sec']:.0f} ops/s "
+                f"({change:+.1%})"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="USDAService micro-benchmarks")
+    parser.add_argument("--filter", default=None, help="Only run benchmarks containing this text")
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--save-baseline", default=None, help="Write results to this file")
+    parser.add_argument("--compare", default=None, help="Baseline file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed ops/sec drop")
+    args = parser.parse_args()
+
+    # The service logs every cache hit/set; keep benchmark output clean
+    logging.disable(logging.INFO)
+
+    results = {}
+    for name, fn in build_cases():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = measure(fn, min_time=args.min_time)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+
+    output = {"python": sys.version.split()[0], "results": results, "regressions": regressions}
+    print(json.dumps(output, indent=2))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"python": output["python"], "results": results}, f, indent=2)
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
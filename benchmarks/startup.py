@@ -0,0 +1,105 @@
+"""
+Import and startup time measurement
+
+Each phase is measured in a fresh interpreter so module caches don't hide cost:
+importing `main`, building a second app with `create_app()`, and running the
+lifespan startup (settings, engine, schema check, USDA service).
+
+Usage:
+    python -m benchmarks.startup            # JSON report
+    python -m benchmarks.startup --top 20   # include the slowest imports (-X importtime)
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budgets enforced by tests/unit/test_startup.py
+IMPORT_BUDGET_MS = 2000
+LIFESPAN_BUDGET_MS = 500
+
+# Modules that must not be imported until a request actually needs them
+DEFERRED_MODULES = ("httpx", "passlib.context", "jose.jwt")
+
+_PROBE = """
+import json, sys, time, asyncio
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+from src.config.settings import get_settings
+settings_at_import = get_settings.cache_info().currsize > 0
+main.create_app()
+t2 = time.perf_counter()
+import src.database.connection as connection
+engine_at_import = connection._engine is not None
+loaded = [m for m in {deferred!r} if m in sys.modules]
+
+async def startup():
+    async with main.lifespan(main.app):
+        pass
+
+t3 = time.perf_counter()
+asyncio.run(startup())
+t4 = time.perf_counter()
+print(json.dumps({{
+    "import_main_ms": round((t1 - t0) * 1000, 1),
+    "create_app_ms": round((t2 - t1) * 1000, 1),
+    "lifespan_ms": round((t4 - t3) * 1000, 1),
+    "settings_loaded_at_import": settings_at_import,
+    "engine_created_at_import": engine_at_import,
+    "deferred_modules_loaded_at_import": loaded,
+}}))
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("USDA_API_KEY", "startup-probe")
+    env["PYTEST_CURRENT_TEST"] = "startup"  # in-memory SQLite, no files touched
+    return env
+
+
+def measure_startup() -> Dict[str, object]:
+    """Run the startup probe in a fresh interpreter and return its timings"""
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(deferred=DEFERRED_MODULES)],
+        cwd=REPO_ROOT, env=_env(), capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(top: int) -> List[Dict[str, object]]:
+    """Top modules by cumulative import time from `python -X importtime`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=REPO_ROOT, env=_env(), capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({"module": name.strip(), "cumulative_ms": int(cumulative_us) / 1000})
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import/startup time")
+    parser.add_argument("--top", type=int, default=0, help="Also list the N slowest imports")
+    args = parser.parse_args()
+
+    report = measure_startup()
+    report["budget"] = {"import_main_ms": IMPORT_BUDGET_MS, "lifespan_ms": LIFESPAN_BUDGET_MS}
+    if args.top:
+        report["slowest_imports"] = slowest_imports(args.top)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,72 +1,220 @@
 """
 Calory Counter FastAPI Application
+
+`create_app()` only wires routes and middleware. The module-level `app` is built on
+first access (`main:app`, `from main import app`), so importing this module loads no
+settings. The database engine, schema check and USDA service are initialized in the
+lifespan, i.e. in each worker after fork rather than at import time.
 """
-from fastapi import FastAPI, Request
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from fastapi import Depends, FastAPI, HTTPException, Request
 import logging
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
-from src.routers import calories, auth
-from src.database.connection import init_db
-from src.config.settings import settings
+from src.routers import calories, auth, foods, meals, nutrients, usage
+from src.database.connection import SessionLocal, init_db, dispose_engine, get_replica_set
+from src.config.settings import get_settings
+from src.middleware.deadline import DeadlineMiddleware, get_deadline_metrics
+from src.middleware.profiling import ProfilingMiddleware
+from src.middleware.tracing import TracingMiddleware
+from src.models.user import User
+from src.utils.dependencies import get_current_user
+from src.utils.rate_limit import create_limiter
+from src.utils.tracing import EXPORTER_MEMORY, create_tracer, get_tracer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
-logger.info(f"Environment: {settings.environment.upper()}")
-
-# Rate limit per-IP (from settings.api_rate_limit)
-rate_limit_per_minute = settings.api_rate_limit
-limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=[f"{rate_limit_per_minute}/minute"],
-)
-
-app = FastAPI(
-    title="Calory Counter API",
-    description="A FastAPI backend for calorie lookup and user management",
-    version="1.0.0",
-)
-
-# Init DB
-init_db()
-
-# Install rate-limit handler and middleware
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-app.add_middleware(SlowAPIMiddleware)
-
-logger.info(
-    f"Rate limiting enabled: {rate_limit_per_minute} requests per minute per IP"
-)
-
-app.include_router(auth.router)
-app.include_router(calories.router)
-
-
-@app.get("/")
-async def root():
-    """Health check"""
-    return {
-        "message": "Calory Counter API is running",
-        "status": "healthy",
-        "version": "1.0.0",
-    }
-
-
-@app.get("/health")
-async def health_check():
-    """Health"""
-    return {"status": "ok", "service": "calory-counter"}
-
-
-# Example endpoint with per-route limit
-@app.get("/rate-limit-test")
-@limiter.limit(f"{rate_limit_per_minute}/minute")
-async def rate_limit_test(request: Request):
-    """Rate limit test"""
-    return {
-        "message": f"Rate limiting active: {rate_limit_per_minute} requests per minute per IP",
-        "your_ip": request.client.host,
-        "status": "success",
-    }
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize database schema and services on startup, release them on shutdown"""
+    from src.models.refresh_token import purge_expired_refresh_tokens
+    from src.services.admission import create_admission_controller
+    from src.services.background import PRIORITY_LOW, create_background_runner
+    from src.services.loop_watchdog import create_loop_watchdog
+    from src.services.meal_log import create_meal_log_buffer
+    from src.services.usage import create_usage_meter
+    from src.services.usda_service import get_usda_service
+
+    settings = get_settings()
+    init_db()
+    create_admission_controller()
+    watchdog = create_loop_watchdog()
+    if settings.loop_watchdog_enabled:
+        watchdog.start()
+        logger.info(
+            f"Event loop watchdog enabled: threshold={settings.loop_watchdog_threshold}s"
+        )
+    runner = create_background_runner()
+    runner.start()
+    app.state.usda_service = get_usda_service()
+    meal_log_buffer = create_meal_log_buffer()
+    flush_task = asyncio.create_task(
+        meal_log_buffer.run_periodic_flush(SessionLocal, settings.meal_log_flush_interval)
+    )
+    usage_meter = create_usage_meter()
+    usage_flush_task = asyncio.create_task(
+        usage_meter.run_periodic_flush(SessionLocal, settings.usage_flush_interval)
+    )
+    runner.submit(
+        purge_expired_refresh_tokens, SessionLocal, priority=PRIORITY_LOW, name="refresh-token-purge"
+    )
+    warmup = [dish.strip() for dish in settings.cache_warmup_dishes.split(",")]
+    queued = app.state.usda_service.schedule_warmup(warmup)
+    if queued:
+        logger.info(f"Queued cache warm-up for {queued} dishes")
+    logger.info("Application startup complete")
+    yield
+    for task in (flush_task, usage_flush_task):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await runner.drain(settings.background_drain_timeout)
+    await app.state.usda_service.aclose()
+    # Write whatever is still queued before the engine goes away. A periodic flush
+    # cancelled mid-write keeps running in its thread; wait for it, then flush the rest.
+    await asyncio.to_thread(meal_log_buffer.flush_with_session, SessionLocal, True)
+    await asyncio.to_thread(usage_meter.flush_with_session, SessionLocal, True)
+    dispose_engine()
+    await watchdog.stop()
+    tracer = get_tracer()
+    if tracer is not None:
+        tracer.close()
+    logger.info("Application shutdown complete")
+
+
+def create_app() -> FastAPI:
+    """Build the FastAPI application"""
+    settings = get_settings()
+    logger.info(f"Environment: {settings.environment.upper()}")
+
+    # Rate limit per user (or per client IP when unauthenticated), from settings.api_rate_limit
+    rate_limit_per_minute = settings.api_rate_limit
+    limiter = create_limiter()
+
+    app = FastAPI(
+        title="Calory Counter API",
+        description="A FastAPI backend for calorie lookup and user management",
+        version="1.0.0",
+        lifespan=lifespan,
+    )
+
+    # Install rate-limit handler and middleware
+    app.state.limiter = limiter
+    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+    app.add_middleware(SlowAPIMiddleware)
+
+    if settings.profiling_enabled:
+        app.add_middleware(
+            ProfilingMiddleware,
+            output_dir=settings.profiling_dir,
+            header=settings.profiling_header,
+            sample_rate=settings.profiling_sample_rate,
+        )
+        logger.info(
+            f"Request profiling enabled: header={settings.profiling_header}, "
+            f"sample_rate={settings.profiling_sample_rate}, dir={settings.profiling_dir}"
+        )
+
+    logger.info(
+        f"Rate limiting enabled: {rate_limit_per_minute} requests per minute per user/IP"
+    )
+
+    # Outermost, so cancellation on deadline/disconnect covers everything below it
+    app.add_middleware(
+        DeadlineMiddleware,
+        header=settings.request_timeout_header,
+        default_timeout=settings.request_timeout,
+        max_timeout=settings.request_timeout_max,
+        streaming_paths=(calories.STREAM_ROUTE,),
+    )
+
+    if settings.tracing_enabled:
+        # Outside the deadline middleware, whose app task copies the trace context
+        app.add_middleware(TracingMiddleware, tracer=create_tracer())
+        logger.info(
+            f"Request tracing enabled: sample_rate={settings.tracing_sample_rate}, "
+            f"exporter={settings.tracing_exporter}"
+        )
+
+    app.include_router(auth.router)
+    app.include_router(calories.router)
+    app.include_router(nutrients.router)
+    app.include_router(foods.router)
+    app.include_router(meals.router)
+    app.include_router(usage.router)
+
+    @app.get("/")
+    async def root():
+        """Health check"""
+        return {
+            "message": "Calory Counter API is running",
+            "status": "healthy",
+            "version": "1.0.0",
+        }
+
+    @app.get("/health")
+    async def health_check():
+        """Health"""
+        return {"status": "ok", "service": "calory-counter"}
+
+    @app.get("/metrics")
+    async def metrics():
+        """Runtime metrics of this worker, one section per subsystem"""
+        from src.services.admission import get_admission_controller
+        from src.services.background import get_background_runner
+        from src.services.loop_watchdog import get_loop_watchdog
+        from src.services.meal_log import get_meal_log_buffer
+        from src.services.usage import get_usage_meter
+        from src.services.usda_service import get_usda_service
+
+        return {
+            "background": get_background_runner().metrics(),
+            "meal_log": get_meal_log_buffer().stats(),
+            "usage": get_usage_meter().stats(),
+            "food_cache": get_usda_service().cache_memory_stats(),
+            "usda": {
+                **get_usda_service().hedger.stats(),
+                "cancelled_lookups": get_usda_service().cancelled_lookups,
+                "transport": get_usda_service().transport.stats(),
+                "keys": get_usda_service().key_pool.stats(),
+            },
+            "requests": get_deadline_metrics(),
+            "admission": get_admission_controller().stats(),
+            "event_loop": get_loop_watchdog().stats(),
+            "read_replicas": replicas.stats() if (replicas := get_replica_set()) else [],
+            "tracing": tracer.stats() if (tracer := get_tracer()) else None,
+        }
+
+    @app.get("/traces")
+    async def traces(limit: int = 20, current_user: User = Depends(get_current_user)):
+        """The current user's recent traces from the in-process collector, newest first"""
+        tracer = get_tracer()
+        if tracer is None or tracer.exporter.kind != EXPORTER_MEMORY:
+            raise HTTPException(status_code=404, detail="In-process trace collector is not enabled")
+        return {"traces": tracer.exporter.traces(max(1, min(limit, 200)), user_id=current_user.id)}
+
+    # Example endpoint with per-route limit
+    @app.get("/rate-limit-test")
+    @limiter.limit(f"{rate_limit_per_minute}/minute")
+    async def rate_limit_test(request: Request):
+        """Rate limit test"""
+        return {
+            "message": f"Rate limiting active: {rate_limit_per_minute} requests per minute per user/IP",
+            "your_ip": request.client.host,
+            "status": "success",
+        }
+
+    return app
+
+
+def __getattr__(name: str):
+    """Lazy module attribute: the app (and with it settings and the limiter) is built on first use"""
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -8,4 +8,5 @@ echo "⚡ Rate Limit: 60/min"
 echo "🌐 Server: http://localhost:8000"
 echo ""
 echo "⚠️  WARNING: Ensure production secrets are configured!"
-uvicorn main:app --host 0.0.0.0 --port 8000
+# Worker count, backlog and keep-alive come from SERVER_* settings
+python -m src.runner
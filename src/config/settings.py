@@ -5,6 +5,7 @@ Supports: dev (SQLite), local (PostgreSQL), prod (PostgreSQL)
 
 import os
 from enum import Enum
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from pydantic import Field
 from typing import Optional
@@ -29,9 +30,39 @@ class Settings(BaseSettings):
 
     # Database Configuration (profile-dependent)
     database_url: Optional[str] = Field(default=None, env="DATABASE_URL")
+    # Comma-separated read replica URLs for read-only lookups (empty = primary only)
+    database_replica_urls: str = Field(default="", env="DATABASE_REPLICA_URLS")
+    # Seconds an unreachable replica is skipped before it is tried again
+    database_replica_retry_interval: float = Field(
+        default=30.0, env="DATABASE_REPLICA_RETRY_INTERVAL"
+    )
 
     # USDA API Configuration
     usda_api_key: str = Field(..., env="USDA_API_KEY")
+    # More keys (comma-separated) for the key pool; each has its own hourly quota
+    usda_api_keys: str = Field(default="", env="USDA_API_KEYS")
+    # Seconds a key rests after a 429 without Retry-After
+    usda_key_cooldown: float = Field(default=60.0, env="USDA_KEY_COOLDOWN")
+    usda_base_url: str = Field(
+        default="https://api.nal.usda.gov/fdc/v1", env="USDA_BASE_URL"
+    )
+    # live, record (live + capture into the cassette) or replay (offline from the cassette)
+    usda_transport: str = Field(default="live", env="USDA_TRANSPORT")
+    usda_cassette_path: str = Field(
+        default="benchmarks/data/usda_cassette.json.gz", env="USDA_CASSETTE_PATH"
+    )
+    # Replay latency per search; unset replays each search's recorded latency
+    usda_replay_latency_ms: Optional[float] = Field(default=None, env="USDA_REPLAY_LATENCY_MS")
+    usda_replay_jitter_ms: float = Field(default=0.0, env="USDA_REPLAY_JITTER_MS")
+    usda_pool_max_connections: int = Field(default=20, env="USDA_POOL_MAX_CONNECTIONS")
+    # Outbound quota per API key (USDA default: 1000 requests/hour)
+    usda_quota_per_hour: int = Field(default=1000, env="USDA_QUOTA_PER_HOUR")
+    # Hedging: send a second request when the first is slower than this latency percentile
+    usda_hedge_enabled: bool = Field(default=False, env="USDA_HEDGE_ENABLED")
+    usda_hedge_percentile: float = Field(default=95.0, env="USDA_HEDGE_PERCENTILE")
+    usda_hedge_min_samples: int = Field(default=20, env="USDA_HEDGE_MIN_SAMPLES")
+    # Hedges never exceed this share of upstream requests
+    usda_hedge_max_ratio: float = Field(default=0.1, env="USDA_HEDGE_MAX_RATIO")
 
     # JWT Configuration
     jwt_secret: str = Field(default="dev-secret-change-in-production", env="JWT_SECRET")
@@ -39,16 +70,111 @@ class Settings(BaseSettings):
     jwt_access_token_expire_minutes: int = Field(
         default=30, env="JWT_ACCESS_TOKEN_EXPIRE_MINUTES"
     )
+    # Rotating refresh tokens; each refresh extends the family by this much
+    jwt_refresh_token_expire_days: int = Field(default=30, env="JWT_REFRESH_TOKEN_EXPIRE_DAYS")
 
     # API Configuration
     api_rate_limit: int = Field(default=100, env="API_RATE_LIMIT")
+    # memory:// is per process; use redis://host:6379 to share limits across workers
+    rate_limit_storage_uri: str = Field(
+        default="memory://", env="RATE_LIMIT_STORAGE_URI"
+    )
+    rate_limit_trusted_proxy_hops: int = Field(
+        default=0, env="RATE_LIMIT_TRUSTED_PROXY_HOPS"
+    )
 
     # Cache Configuration
     cache_ttl: int = Field(default=3600, env="CACHE_TTL")
+    # Per-worker food cache limit in accounted bytes (0 = unbounded)
+    cache_max_bytes: int = Field(default=64 * 1024 * 1024, env="CACHE_MAX_BYTES")
+    # Measure cache entry sizes with tracemalloc (slow, for sizing CACHE_MAX_BYTES)
+    cache_memory_debug: bool = Field(default=False, env="CACHE_MEMORY_DEBUG")
+    # Allow shared proxy caches to store calorie responses (Cache-Control: public)
+    calorie_cache_shared: bool = Field(default=False, env="CALORIE_CACHE_SHARED")
+    # Refresh entries in the background once they are this share of CACHE_TTL old (0 = off)
+    cache_refresh_ahead: float = Field(default=0.8, env="CACHE_REFRESH_AHEAD")
+    # Comma-separated dishes looked up in the background at startup
+    cache_warmup_dishes: str = Field(default="", env="CACHE_WARMUP_DISHES")
+    # Autocomplete index size (names of resolved foods)
+    suggest_max_entries: int = Field(default=100_000, env="SUGGEST_MAX_ENTRIES")
+    # TinyLFU admission: when the cache is full, only cache queries more frequent than
+    # the entry they would evict (frequencies from a count-min sketch of WIDTH x 4)
+    cache_admission_enabled: bool = Field(default=True, env="CACHE_ADMISSION_ENABLED")
+    cache_sketch_width: int = Field(default=16384, env="CACHE_SKETCH_WIDTH")
+    popular_dishes_top_k: int = Field(default=50, env="POPULAR_DISHES_TOP_K")
+    # Memory-mapped cache shared by all workers on the host (e.g. /dev/shm/calory-food-cache)
+    shared_cache_path: Optional[str] = Field(default=None, env="SHARED_CACHE_PATH")
+    shared_cache_slots: int = Field(default=65536, env="SHARED_CACHE_SLOTS")
+    shared_cache_slot_size: int = Field(default=512, env="SHARED_CACHE_SLOT_SIZE")
+
+    # Background Jobs (off-request-path work)
+    background_concurrency: int = Field(default=4, env="BACKGROUND_CONCURRENCY")
+    background_max_queue: int = Field(default=1000, env="BACKGROUND_MAX_QUEUE")
+    # Seconds to let queued jobs finish on shutdown
+    background_drain_timeout: float = Field(default=10.0, env="BACKGROUND_DRAIN_TIMEOUT")
+
+    # Meal Logging (write-behind batching)
+    meal_log_batch_size: int = Field(default=500, env="MEAL_LOG_BATCH_SIZE")
+    meal_log_flush_interval: float = Field(default=1.0, env="MEAL_LOG_FLUSH_INTERVAL")
+    # Queued rows beyond this are rejected with 503 (flushes are failing)
+    meal_log_max_pending: int = Field(default=10_000, env="MEAL_LOG_MAX_PENDING")
+
+    # Usage Metering (seconds between batched counter flushes; a crash loses at most this much)
+    usage_flush_interval: float = Field(default=10.0, env="USAGE_FLUSH_INTERVAL")
+    # Unflushed (user, day) counters kept while flushes fail; lookups beyond are not counted
+    usage_max_pending_keys: int = Field(default=100_000, env="USAGE_MAX_PENDING_KEYS")
+
+    # Request Deadlines (seconds; the header lets clients ask for less or more, up to the max)
+    request_timeout: float = Field(default=30.0, env="REQUEST_TIMEOUT")  # 0 = none
+    request_timeout_max: float = Field(default=60.0, env="REQUEST_TIMEOUT_MAX")
+    request_timeout_header: str = Field(
+        default="X-Request-Timeout", env="REQUEST_TIMEOUT_HEADER"
+    )
+
+    # Streaming multi-dish lookups: concurrent USDA lookups per request, and how many
+    # resolved lines may wait for a slow client before lookups pause
+    stream_lookup_concurrency: int = Field(default=4, env="STREAM_LOOKUP_CONCURRENCY")
+    stream_lookup_buffer: int = Field(default=16, env="STREAM_LOOKUP_BUFFER")
+
+    # Admission Control (cache-resolvable lookups are never shed)
+    admission_enabled: bool = Field(default=True, env="ADMISSION_ENABLED")
+    admission_upstream_concurrency: int = Field(default=64, env="ADMISSION_UPSTREAM_CONCURRENCY")
+    admission_upstream_queue: int = Field(default=128, env="ADMISSION_UPSTREAM_QUEUE")
+    # bcrypt runs in the threadpool; keep this near the CPU count
+    admission_auth_concurrency: int = Field(default=8, env="ADMISSION_AUTH_CONCURRENCY")
+    admission_auth_queue: int = Field(default=32, env="ADMISSION_AUTH_QUEUE")
+    admission_route_concurrency: int = Field(default=128, env="ADMISSION_ROUTE_CONCURRENCY")
+    admission_route_queue: int = Field(default=256, env="ADMISSION_ROUTE_QUEUE")
+    # Seconds a request may wait for a slot before it gets 503
+    admission_max_wait: float = Field(default=0.5, env="ADMISSION_MAX_WAIT")
+
+    # Event-loop lag watchdog: logs the loop thread's stack when it stalls past the threshold
+    loop_watchdog_enabled: bool = Field(default=False, env="LOOP_WATCHDOG_ENABLED")
+    loop_watchdog_interval: float = Field(default=0.1, env="LOOP_WATCHDOG_INTERVAL")
+    loop_watchdog_threshold: float = Field(default=0.25, env="LOOP_WATCHDOG_THRESHOLD")
 
     # Server Configuration
     host: str = Field(default="0.0.0.0", env="HOST")
     port: int = Field(default=8000, env="PORT")
+    server_workers: int = Field(default=1, env="SERVER_WORKERS")  # 0 = one per CPU
+    server_backlog: int = Field(default=2048, env="SERVER_BACKLOG")
+    server_keep_alive: int = Field(default=5, env="SERVER_KEEP_ALIVE")
+
+    # Profiling Configuration (middleware is only installed when enabled)
+    profiling_enabled: bool = Field(default=False, env="PROFILING_ENABLED")
+    profiling_header: str = Field(default="X-Profile", env="PROFILING_HEADER")
+    profiling_sample_rate: float = Field(default=0.0, env="PROFILING_SAMPLE_RATE")
+    profiling_dir: str = Field(default="./profiles", env="PROFILING_DIR")
+
+    # Tracing Configuration (middleware is only installed when enabled)
+    tracing_enabled: bool = Field(default=False, env="TRACING_ENABLED")
+    # Share of requests traced when the caller sends no traceparent
+    tracing_sample_rate: float = Field(default=0.1, env="TRACING_SAMPLE_RATE")
+    tracing_exporter: str = Field(default="memory", env="TRACING_EXPORTER")  # memory | file
+    tracing_file: str = Field(default="./traces.jsonl", env="TRACING_FILE")
+    tracing_max_traces: int = Field(default=200, env="TRACING_MAX_TRACES")  # memory exporter
+    tracing_max_spans: int = Field(default=256, env="TRACING_MAX_SPANS")  # per trace
+    tracing_record_queries: bool = Field(default=False, env="TRACING_RECORD_QUERIES")
 
     class Config:
         # Pydantic automatically loads the profile-specific env file
@@ -104,13 +230,22 @@ class Settings(BaseSettings):
         return self.environment == Environment.PROD
 
 
-# Global settings instance
-settings = Settings()
+@lru_cache()
+def get_settings() -> Settings:
+    """Load settings on first use (cached) and log the active configuration once"""
+    settings = Settings()
+    database_url = settings.effective_database_url
+    logger.info(f"Environment Profile: {settings.environment.upper()}")
+    logger.info(
+        f"Database: {'SQLite' if database_url.startswith('sqlite') else 'PostgreSQL'}"
+    )
+    logger.info(f"Server: {settings.host}:{settings.port}")
+    logger.info(f"Rate Limit: {settings.api_rate_limit}/min")
+    return settings
+
 
-# Log current configuration
-logger.info(f"Environment Profile: {settings.environment.upper()}")
-logger.info(
-    f"Database: {'SQLite' if settings.effective_database_url.startswith('sqlite') else 'PostgreSQL'}"
-)
-logger.info(f"Server: {settings.host}:{settings.port}")
-logger.info(f"Rate Limit: {settings.api_rate_limit}/min")
+def __getattr__(name: str):
+    """Lazy module attribute so `from src.config.settings import settings` keeps working"""
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
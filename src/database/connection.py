@@ -1,49 +1,181 @@
 """
 Database connection and session management with profile-based configuration
+
+The engine is created lazily on first use, so importing this module (and `main`)
+does not connect, and forked workers each build their own pool.
+
+Read-only lookups can go to read replicas (DATABASE_REPLICA_URLS) through
+get_read_db: replicas are used round-robin, and one that fails to connect (or
+drops its connection) is skipped for a while, with the primary as last resort.
 """
 
+import itertools
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+from fastapi import Depends
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 from src.models.user import Base
-from src.config.settings import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Get database URL from profile-based settings
-if "pytest" in os.environ.get("_", "") or "PYTEST_CURRENT_TEST" in os.environ:
-    DATABASE_URL = "sqlite:///:memory:"
-    logger.info("TEST: Using in-memory SQLite for testing")
-else:
-    DATABASE_URL = settings.effective_database_url
-
-# Create engine
-if DATABASE_URL.startswith("sqlite"):
-    # SQLite specific configuration
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
-else:
+_engine: Optional[Engine] = None
+_replica_set: Optional["ReplicaSet"] = None
+
+T = TypeVar("T")
+
+# Bound to the engine on first use (see get_engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+def get_database_url() -> str:
+    """Get database URL from profile-based settings"""
+    if "pytest" in os.environ.get("_", "") or "PYTEST_CURRENT_TEST" in os.environ:
+        logger.info("TEST: Using in-memory SQLite for testing")
+        return "sqlite:///:memory:"
+
+    from src.config.settings import settings
+
+    return settings.effective_database_url
+
+
+def _create_engine(database_url: str, pool_pre_ping: bool = False) -> Engine:
+    if database_url.startswith("sqlite"):
+        # SQLite specific configuration
+        return create_engine(
+            database_url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+            pool_pre_ping=pool_pre_ping,
+        )
     # PostgreSQL configuration
-    engine = create_engine(DATABASE_URL)
+    return create_engine(database_url, pool_pre_ping=pool_pre_ping)
+
+
+def get_engine() -> Engine:
+    """Get or create the database engine"""
+    global _engine
+    if _engine is None:
+        _engine = _create_engine(get_database_url())
+        SessionLocal.configure(bind=_engine)
+    return _engine
+
+
+class ReplicaSet:
+    """Read replicas chosen round-robin, skipping ones that recently failed"""
+
+    def __init__(self, engines: List[Engine], retry_interval: float = 30.0):
+        self.engines = engines
+        self.retry_interval = retry_interval
+        self._next = itertools.count()
+        self._down_until: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self.reads: List[int] = [0] * len(engines)
+        self.failures: List[int] = [0] * len(engines)
+        for index, engine in enumerate(engines):
+            event.listen(engine, "handle_error", self._on_error(index))
+
+    def _on_error(self, index: int):
+        def handle_error(context):
+            # A dropped connection mid-query takes the replica out of rotation too
+            if context.is_disconnect:
+                self.mark_down(index)
+        return handle_error
+
+    def mark_engine_down(self, engine: Engine) -> None:
+        if engine in self.engines:
+            self.mark_down(self.engines.index(engine))
+
+    def mark_down(self, index: int) -> None:
+        with self._lock:
+            self.failures[index] += 1
+            self._down_until[index] = time.monotonic() + self.retry_interval
+        logger.warning(
+            f"Read replica {index} unavailable, retrying it in {self.retry_interval}s"
+        )
+
+    def connect(self) -> Optional[Connection]:
+        """Connection to the next healthy replica, or None if none can be reached"""
+        for _ in range(len(self.engines)):
+            with self._lock:
+                index = next(self._next) % len(self.engines)
+                if self._down_until.get(index, 0.0) > time.monotonic():
+                    continue
+            try:
+                connection = self.engines[index].connect()
+            except DBAPIError:
+                self.mark_down(index)
+                continue
+            with self._lock:
+                self._down_until.pop(index, None)
+                self.reads[index] += 1
+            return connection
+        return None
+
+    def dispose(self) -> None:
+        for engine in self.engines:
+            engine.dispose()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [
+            {
+                "replica": index,
+                "healthy": self._down_until.get(index, 0.0) <= now,
+                "reads": self.reads[index],
+                "failures": self.failures[index],
+            }
+            for index in range(len(self.engines))
+        ]
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def get_replica_set() -> Optional[ReplicaSet]:
+    """Replicas from DATABASE_REPLICA_URLS (None when none are configured)"""
+    global _replica_set
+    if _replica_set is None:
+        from src.config.settings import settings
+
+        urls = [url.strip() for url in settings.database_replica_urls.split(",") if url.strip()]
+        if not urls:
+            return None
+        _replica_set = ReplicaSet(
+            # Pre-ping so stale pooled connections are replaced instead of failing a read
+            [_create_engine(url, pool_pre_ping=True) for url in urls],
+            settings.database_replica_retry_interval,
+        )
+        logger.info(f"Routing read-only lookups to {len(urls)} read replica(s)")
+    return _replica_set
+
+
+def dispose_engine() -> None:
+    """Close pooled connections and drop the engines (app shutdown)"""
+    global _engine, _replica_set
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
+    if _replica_set is not None:
+        _replica_set.dispose()
+        _replica_set = None
 
 
 # Create tables
 def create_tables():
     """Create database tables"""
-    Base.metadata.create_all(bind=engine)
+    from src.models import meal_log, refresh_token, usage  # noqa: F401  (registers their tables on Base)
+
+    Base.metadata.create_all(bind=get_engine())
     logger.info("Database tables created")
 
 
 def get_db() -> Session:
     """Dependency to get database session"""
+    get_engine()
     db = SessionLocal()
     try:
         yield db
@@ -51,6 +183,70 @@ def get_db() -> Session:
         db.close()
 
 
+def get_read_db(primary: Session = Depends(get_db)) -> Session:
+    """
+    Dependency for read-only lookups: a replica session, or the primary's
+
+    Never write through this session. Replicas may lag, so lookups that must see
+    a recent write should go through read_with_primary_fallback. The primary
+    session is the request's own get_db session; it only connects if used.
+    """
+    replicas = get_replica_set()
+    connection = replicas.connect() if replicas is not None else None
+    if connection is None:
+        yield primary
+        return
+    db = SessionLocal(bind=connection, info={"primary": primary})
+    try:
+        yield db
+    finally:
+        db.close()
+        connection.close()
+
+
+def is_replica(db: Session) -> bool:
+    return "primary" in db.info
+
+
+def read_with_primary_fallback(db: Session, read: Callable[[Session], Optional[T]]) -> Optional[T]:
+    """
+    Run `read` on `db`; if that is a replica and finds nothing or fails, ask the primary
+
+    Covers rows written moments ago that have not reached the replica yet, e.g.
+    a user authenticating right after registering, and replicas that accept
+    connections but fail queries (in recovery, missing schema); those are taken
+    out of rotation.
+    """
+    if not is_replica(db):
+        return read(db)
+    try:
+        result = read(db)
+    except DBAPIError as e:
+        db.rollback()
+        replicas = get_replica_set()
+        if replicas is not None:
+            replicas.mark_engine_down(db.get_bind().engine)
+        logger.warning(f"Replica read failed, using the primary: {e.__class__.__name__}")
+        result = None
+    if result is None:
+        result = read(db.info["primary"])
+    return result
+
+
+def dialect_insert(db: Session, table):
+    """
+    INSERT construct with ON CONFLICT support for the session's dialect
+
+    PostgreSQL and SQLite both implement `on_conflict_do_update`/`do_nothing` on
+    their dialect-specific insert.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
 # Initialize database (for testing/development)
 def init_db():
     """Initialize database with tables"""
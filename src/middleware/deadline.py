@@ -0,0 +1,191 @@
+"""
+Request deadline and client-disconnect middleware
+
+Every HTTP request gets a deadline from the timeout header (seconds, capped) or
+the configured default. The deadline bounds the USDA call timeouts and is checked
+before each database statement (PostgreSQL transactions also get a matching
+statement_timeout). Requests whose client disconnects, or that pass their deadline
+before responding, are cancelled so they stop holding connection slots; a 504 is
+sent when the deadline passes before the response has started.
+
+Streaming routes (`streaming_paths`) are not cancelled at the deadline, since that
+would silently truncate a 200 body; their work still runs under the deadline and
+reports it per item (e.g. a 504 line for each dish not resolved in time).
+"""
+
+import asyncio
+import math
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.utils import deadline
+
+logger = logging.getLogger(__name__)
+
+# Process-wide counters, reported by /metrics
+deadline_metrics: Counter = Counter()
+
+_listeners_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    deadline.check_deadline()
+
+
+def _on_begin(conn):
+    left = deadline.remaining()
+    if left is not None and conn.dialect.name == "postgresql":
+        # Bound every statement of this transaction by the time left
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {max(1, math.ceil(left * 1000))}")
+
+
+def _install_db_listeners() -> None:
+    """Attach deadline checks to all engines (once)"""
+    global _listeners_installed
+    if not _listeners_installed:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "begin", _on_begin)
+        _listeners_installed = True
+
+
+def get_deadline_metrics() -> Dict[str, int]:
+    return {
+        key: deadline_metrics[key]
+        for key in ("requests", "deadline_exceeded", "client_disconnects", "cancelled")
+    }
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware enforcing per-request deadlines and cancelling on disconnect
+
+    The app runs in its own task; this middleware is the only reader of `receive`
+    and forwards messages through a queue, so it sees `http.disconnect` as soon as
+    the server reports it, even while the app is busy upstream.
+    """
+
+    def __init__(
+        self,
+        app,
+        header: str = "X-Request-Timeout",
+        default_timeout: float = 30.0,
+        max_timeout: float = 60.0,
+        streaming_paths: Iterable[str] = (),
+    ):
+        self.app = app
+        self.header = header.lower().encode("latin-1")
+        self.default_timeout = default_timeout
+        self.max_timeout = max_timeout
+        self.streaming_paths = frozenset(streaming_paths)
+        _install_db_listeners()
+
+    def _timeout(self, scope) -> Optional[float]:
+        for name, value in scope.get("headers", []):
+            if name == self.header:
+                try:
+                    requested = float(value)
+                except ValueError:
+                    break
+                if requested > 0:
+                    return min(requested, self.max_timeout)
+                break
+        return self.default_timeout or None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        deadline_metrics["requests"] += 1
+        timeout = self._timeout(scope)
+        expires_at = time.monotonic() + timeout if timeout is not None else None
+        if scope["path"] in self.streaming_paths:
+            # Deadline applies to the lookups inside the stream, not the response
+            expires_at = None
+        queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        state = {"started": False, "complete": False, "length": None, "sent": 0}
+
+        async def pump():
+            while True:
+                message = await receive()
+                queue.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    return
+
+        async def tracked_send(message):
+            if message["type"] == "http.response.start":
+                state["started"] = True
+                for name, value in message.get("headers", []):
+                    if name.lower() == b"content-length":
+                        state["length"] = int(value)
+            elif message["type"] == "http.response.body":
+                state["sent"] += len(message.get("body", b""))
+                # With a Content-Length the client may hang up after the last byte,
+                # before a trailing empty chunk (e.g. from BaseHTTPMiddleware) is sent
+                if not message.get("more_body") or (
+                    state["length"] is not None and state["sent"] >= state["length"]
+                ):
+                    state["complete"] = True
+            await send(message)
+
+        token = deadline.set_deadline(timeout)
+        try:
+            # Tasks copy the current context, so the app sees the deadline
+            app_task = asyncio.create_task(self.app(scope, queue.get, tracked_send))
+            pump_task = asyncio.create_task(pump())
+        finally:
+            deadline.reset_deadline(token)
+
+        try:
+            waiting = {app_task, pump_task}
+            while not app_task.done():
+                # Once the response is out, let the app finish (background tasks)
+                wait_for = None
+                if expires_at is not None and not state["complete"]:
+                    wait_for = max(0.0, expires_at - time.monotonic())
+                done, _ = await asyncio.wait(
+                    waiting, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED
+                )
+                if app_task in done:
+                    break
+                if pump_task in done:
+                    waiting = {app_task}
+                    if not state["complete"]:
+                        deadline_metrics["client_disconnects"] += 1
+                        await self._cancel(app_task, scope, "client disconnected")
+                        return
+                elif not done and not state["complete"]:
+                    deadline_metrics["deadline_exceeded"] += 1
+                    await self._cancel(app_task, scope, f"deadline of {timeout}s exceeded")
+                    if not state["started"]:
+                        await self._send_timeout(send)
+                    return
+            app_task.result()
+        finally:
+            pump_task.cancel()
+            if not app_task.done():
+                app_task.cancel()
+
+    async def _cancel(self, task: asyncio.Task, scope, reason: str) -> None:
+        deadline_metrics["cancelled"] += 1
+        logger.warning(f"Cancelling {scope['method']} {scope['path']}: {reason}")
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    @staticmethod
+    async def _send_timeout(send) -> None:
+        body = b'{"detail":"Request deadline exceeded"}'
+        await send({
+            "type": "http.response.start",
+            "status": 504,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
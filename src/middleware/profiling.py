@@ -0,0 +1,192 @@
+"""
+Opt-in per-request profiling middleware
+
+Profiles a single request with cProfile when the trigger header is present or the
+request is picked by the sampling rate, writes a pstats file to a local directory
+and reports the file name and timings in the response headers. Streaming responses
+are passed through as they are sent, so they only carry the file name; their
+timings are logged.
+
+cProfile and the CPU figure cover the event loop thread only: work a request hands
+to the threadpool (sync dependencies such as get_db, get_current_user, bcrypt) shows
+up as waiting, not as its own calls. A request is only profiled when no other
+request is in flight; requests that start while it runs are counted in
+X-Profile-Overlaps (and the log), since their loop work lands in the same profile.
+"""
+
+import asyncio
+import cProfile
+import contextvars
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from typing import List, Optional, Tuple
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FILE_HEADER = b"x-profile-file"
+PROFILE_OVERLAPS_HEADER = b"x-profile-overlaps"
+
+# [seconds, query count] for the request being profiled. anyio copies the context
+# into threadpool workers, so sync dependencies (get_db, get_current_user) report too.
+_db_timer: contextvars.ContextVar[Optional[List[float]]] = contextvars.ContextVar(
+    "profiling_db_timer", default=None
+)
+
+_listeners_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _db_timer.get() is not None:
+        conn.info.setdefault("profiling_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timer = _db_timer.get()
+    starts = conn.info.get("profiling_query_start")
+    if timer is not None and starts:
+        timer[0] += time.perf_counter() - starts.pop()
+        timer[1] += 1
+
+
+def _install_db_listeners() -> None:
+    """Attach query timing listeners to all engines (once)"""
+    global _listeners_installed
+    if not _listeners_installed:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _listeners_installed = True
+
+
+def _with_headers(message, headers: List[Tuple[bytes, bytes]]):
+    """Copy of a response start message with extra headers"""
+    if message["type"] != "http.response.start":
+        return message
+    return {**message, "headers": list(message.get("headers", [])) + headers}
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles individual requests on demand
+
+    Only installed when profiling is enabled in settings, so a disabled profiler
+    adds no work to the request path.
+    """
+
+    def __init__(
+        self,
+        app,
+        output_dir: str = "./profiles",
+        header: str = "X-Profile",
+        sample_rate: float = 0.0,
+    ):
+        self.app = app
+        self.output_dir = output_dir
+        self.header = header.lower().encode("latin-1")
+        self.sample_rate = sample_rate
+        # cProfile hooks the event loop thread, so only one request can be profiled at a time
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        # [requests started meanwhile] while a profile is running
+        self._overlaps: Optional[List[int]] = None
+        os.makedirs(self.output_dir, exist_ok=True)
+        _install_db_listeners()
+
+    def _should_profile(self, scope) -> bool:
+        """Check trigger header first, then the sampling rate"""
+        for name, value in scope.get("headers", []):
+            if name == self.header:
+                return value.lower() not in (b"", b"0", b"false", b"no")
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _profile_filename(self, scope) -> str:
+        """Build a unique, filesystem-safe profile file name for the request"""
+        path = re.sub(r"[^A-Za-z0-9]+", "_", scope.get("path", "")).strip("_") or "root"
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        return f"{stamp}-{scope.get('method', 'GET')}-{path}-{uuid.uuid4().hex[:8]}.prof"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self._in_flight += 1
+        try:
+            if self._overlaps is not None:
+                self._overlaps[0] += 1
+            if not self._should_profile(scope):
+                await self.app(scope, receive, send)
+            elif self._in_flight > 1 or not self._lock.acquire(blocking=False):
+                logger.info(f"Other requests in flight, skipping profile for {scope.get('path')}")
+                await self.app(scope, receive, send)
+            else:
+                await self._profile(scope, receive, send)
+        finally:
+            self._in_flight -= 1
+
+    async def _profile(self, scope, receive, send):
+        """Run one request under cProfile (the caller holds _lock)"""
+        filename = self._profile_filename(scope)
+        file_header = (PROFILE_FILE_HEADER, filename.encode("latin-1"))
+        messages = []
+        streaming = False
+
+        async def buffered_send(message):
+            # Hold the response until profiling is done so timings fit in the headers,
+            # unless it streams (more_body), which must not be held back or kept in memory
+            nonlocal streaming
+            if streaming:
+                await send(message)
+                return
+            messages.append(message)
+            if message["type"] == "http.response.body" and message.get("more_body", False):
+                streaming = True
+                for held in messages:
+                    await send(_with_headers(held, [file_header]))
+                messages.clear()
+
+        profiler = cProfile.Profile()
+        db_timer = [0.0, 0]
+        token = _db_timer.set(db_timer)
+        overlaps = self._overlaps = [0]
+        wall_start = time.perf_counter()
+        # CPU time of this (event loop) thread, not of the whole process
+        cpu_start = time.thread_time()
+        try:
+            profiler.enable()
+            try:
+                await self.app(scope, receive, buffered_send)
+            finally:
+                profiler.disable()
+        finally:
+            wall_ms = (time.perf_counter() - wall_start) * 1000
+            cpu_ms = (time.thread_time() - cpu_start) * 1000
+            self._overlaps = None
+            _db_timer.reset(token)
+            self._lock.release()
+
+        await asyncio.to_thread(profiler.dump_stats, os.path.join(self.output_dir, filename))
+        db_ms = db_timer[0] * 1000
+        logger.info(
+            f"Profiled {scope.get('method')} {scope.get('path')}: wall={wall_ms:.1f}ms "
+            f"loop cpu={cpu_ms:.1f}ms db={db_ms:.1f}ms ({db_timer[1]} queries), "
+            f"{overlaps[0]} overlapping requests -> {filename}"
+        )
+
+        server_timing = (
+            f"total;dur={wall_ms:.2f}, cpu;dur={cpu_ms:.2f};desc=\"event loop thread\", "
+            f"db;dur={db_ms:.2f};desc=\"{db_timer[1]} queries\""
+        )
+        for message in messages:
+            await send(_with_headers(message, [
+                file_header,
+                (PROFILE_OVERLAPS_HEADER, str(overlaps[0]).encode("latin-1")),
+                (b"server-timing", server_timing.encode("latin-1")),
+            ]))
@@ -0,0 +1,108 @@
+"""
+Request tracing middleware
+
+Starts a root span per sampled request (continuing an incoming `traceparent`),
+returns the request's own `traceparent` in the response headers so a slow call can
+be looked up, and exports the trace when the request ends. SQLAlchemy statements
+run inside a traced request are recorded as `db.query` spans.
+"""
+
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.utils import tracing
+
+logger = logging.getLogger(__name__)
+
+MAX_STATEMENT_CHARS = 200
+
+_listeners_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = tracing.current_span()
+    if parent is not None:
+        conn.info.setdefault("trace_spans", []).append(
+            parent.child("db.query", statement=statement[:MAX_STATEMENT_CHARS], dialect=conn.dialect.name)
+        )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("trace_spans")
+    if spans:
+        query_span = spans.pop()
+        if cursor.rowcount >= 0:
+            query_span.set("rows", cursor.rowcount)
+        query_span.end()
+
+
+def _handle_error(context):
+    spans = context.connection.info.get("trace_spans") if context.connection is not None else None
+    if spans:
+        spans.pop().end(context.original_exception)
+
+
+def _install_db_listeners() -> None:
+    """Attach query span listeners to all engines (once)"""
+    global _listeners_installed
+    if not _listeners_installed:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+        _listeners_installed = True
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening the root span of each sampled request
+
+    Must wrap DeadlineMiddleware, which runs the app in a task that copies the
+    context when it is created.
+    """
+
+    def __init__(self, app, tracer: tracing.Tracer):
+        self.app = app
+        self.tracer = tracer
+        _install_db_listeners()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope.get("headers", []):
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        root = self.tracer.start_trace(
+            f"{scope['method']} {scope['path']}", traceparent, **{"http.method": scope["method"]}
+        )
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def traced_send(message):
+            if message["type"] == "http.response.start":
+                root.set("http.status_code", message["status"])
+                headers = list(message.get("headers", []))
+                headers.append((b"traceparent", root.traceparent.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = tracing.activate(root)
+        error = None
+        try:
+            await self.app(scope, receive, traced_send)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            tracing.deactivate(token)
+            # The router records the matched endpoint in the shared scope
+            endpoint = scope.get("endpoint")
+            if endpoint is not None:
+                root.set("handler", getattr(endpoint, "__name__", str(endpoint)))
+            self.tracer.finish(root, error)
@@ -0,0 +1,59 @@
+"""
+SQLAlchemy meal log and daily rollup models
+"""
+
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    func,
+)
+from src.models.user import Base
+
+
+class MealLog(Base):
+    """One logged dish (raw row, written in batches by MealLogBuffer)"""
+
+    __tablename__ = "meal_logs"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    dish_name = Column(String(100), nullable=False)
+    servings = Column(Integer, nullable=False)
+    calories = Column(Integer, nullable=False)
+    protein = Column(Float, nullable=True)
+    fat = Column(Float, nullable=True)
+    carbohydrates = Column(Float, nullable=True)
+    consumed_at = Column(DateTime(timezone=True), nullable=False)
+    # UTC day of consumed_at, the rollup key
+    day = Column(Date, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (Index("ix_meal_logs_user_day", "user_id", "day"),)
+
+    def __repr__(self):
+        return f"<MealLog(id={self.id}, user_id={self.user_id}, dish_name='{self.dish_name}')>"
+
+
+class DailyRollup(Base):
+    """Per-user per-day totals, incremented on every meal log flush"""
+
+    __tablename__ = "daily_rollups"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    day = Column(Date, primary_key=True)
+    calories = Column(Integer, nullable=False, default=0)
+    protein = Column(Float, nullable=False, default=0.0)
+    fat = Column(Float, nullable=False, default=0.0)
+    carbohydrates = Column(Float, nullable=False, default=0.0)
+    entries = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DailyRollup(user_id={self.user_id}, day={self.day}, calories={self.calories})>"
@@ -0,0 +1,175 @@
+"""
+SQLAlchemy refresh token model
+
+Refresh tokens are random, opaque strings; only their SHA-256 is stored. They
+have enough entropy that a fast hash is as safe as bcrypt here, and checking one
+costs microseconds. Each refresh rotates the token: the presented token is marked
+used and a new one is issued in the same family. Presenting a used token again
+means it leaked, so the whole family is revoked.
+"""
+
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, delete, func, select, update
+from sqlalchemy.orm import Session
+from src.models.user import Base
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshTokenError(Exception):
+    """The presented refresh token cannot be used"""
+
+    def __init__(self, reason: str, reused: bool = False):
+        super().__init__(reason)
+        self.reused = reused
+
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class RefreshToken(Base):
+    """One issued refresh token (stored as a hash)"""
+
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    # All tokens descending from one login share a family
+    family_id = Column(String(32), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    used_at = Column(DateTime(timezone=True), nullable=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<RefreshToken(id={self.id}, user_id={self.user_id}, family_id='{self.family_id}')>"
+
+    @classmethod
+    def issue(
+        cls, db: Session, user_id: int, lifetime: timedelta, family_id: Optional[str] = None
+    ) -> str:
+        """
+        Store a new token (a new family unless `family_id` is given) and commit
+
+        Returns:
+            The plain token, which is only ever known to the client
+        """
+        token = secrets.token_urlsafe(32)
+        db.add(cls(
+            user_id=user_id,
+            family_id=family_id or uuid.uuid4().hex,
+            token_hash=hash_refresh_token(token),
+            expires_at=datetime.now(timezone.utc) + lifetime,
+        ))
+        try:
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return token
+
+    @classmethod
+    def rotate(cls, db: Session, token: str, lifetime: timedelta) -> Tuple[int, str]:
+        """
+        Use a token once and issue its successor in the same family
+
+        The token is claimed with one conditional UPDATE, so two concurrent
+        refreshes with the same token cannot both succeed.
+
+        Returns:
+            (user_id, new plain token)
+
+        Raises:
+            RefreshTokenError: Unknown, expired or revoked token, or reuse of a
+                rotated token (the family is revoked before raising)
+        """
+        now = datetime.now(timezone.utc)
+        token_hash = hash_refresh_token(token)
+        claim = (
+            update(cls)
+            .where(
+                cls.token_hash == token_hash,
+                cls.used_at.is_(None),
+                cls.revoked_at.is_(None),
+                cls.expires_at > now,
+            )
+            .values(used_at=now)
+            .returning(cls.user_id, cls.family_id)
+        )
+        try:
+            claimed = db.execute(claim).first()
+            if claimed is None:
+                db.rollback()
+                cls._reject(db, token_hash)
+            user_id, family_id = claimed
+        except Exception:
+            db.rollback()
+            raise
+        # Commits the claim together with the successor
+        return user_id, cls.issue(db, user_id, lifetime, family_id=family_id)
+
+    @classmethod
+    def _reject(cls, db: Session, token_hash: str) -> None:
+        """Explain why a token could not be claimed; revoke its family on reuse"""
+        row = db.execute(
+            select(cls.family_id, cls.used_at, cls.revoked_at).where(cls.token_hash == token_hash)
+        ).first()
+        if row is None:
+            raise RefreshTokenError("unknown token")
+        if row.used_at is not None and row.revoked_at is None:
+            revoked = cls.revoke_family(db, row.family_id)
+            logger.warning(
+                f"Refresh token reuse detected, revoked family {row.family_id} ({revoked} tokens)"
+            )
+            raise RefreshTokenError("token reused", reused=True)
+        raise RefreshTokenError("token expired or revoked")
+
+    @classmethod
+    def revoke_family(cls, db: Session, family_id: str) -> int:
+        """Revoke every token of a family and commit; returns the number revoked"""
+        result = db.execute(
+            update(cls)
+            .where(cls.family_id == family_id, cls.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(timezone.utc))
+        )
+        db.commit()
+        return result.rowcount
+
+    @classmethod
+    def revoke(cls, db: Session, token: str) -> bool:
+        """Revoke the family of a token (logout); False if the token is unknown"""
+        family_id = db.execute(
+            select(cls.family_id).where(cls.token_hash == hash_refresh_token(token))
+        ).scalar()
+        if family_id is None:
+            return False
+        cls.revoke_family(db, family_id)
+        return True
+
+    @classmethod
+    def purge_expired(cls, db: Session) -> int:
+        """Delete tokens past their expiry (used or not) and commit"""
+        result = db.execute(delete(cls).where(cls.expires_at <= datetime.now(timezone.utc)))
+        db.commit()
+        return result.rowcount
+
+
+def purge_expired_refresh_tokens(session_factory) -> None:
+    """Background job: drop expired refresh tokens"""
+    db = session_factory()
+    try:
+        purged = RefreshToken.purge_expired(db)
+        if purged:
+            logger.info(f"Purged {purged} expired refresh tokens")
+    finally:
+        db.close()
@@ -0,0 +1,24 @@
+"""
+SQLAlchemy usage counter model
+"""
+
+from sqlalchemy import Column, Date, ForeignKey, Integer
+from src.models.user import Base
+
+
+class UsageCounter(Base):
+    """Per-user per-day lookup counts, incremented on every usage meter flush"""
+
+    __tablename__ = "usage_counters"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    # UTC day of the lookups
+    day = Column(Date, primary_key=True)
+    lookups = Column(Integer, nullable=False, default=0)
+    # Lookups not answered from the cache (sent to USDA)
+    upstream_misses = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<UsageCounter(user_id={self.user_id}, day={self.day}, lookups={self.lookups})>"
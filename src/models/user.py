@@ -53,6 +53,38 @@ class User(Base):
             db.rollback()
             raise
 
+    @classmethod
+    def create_if_absent(cls, db: Session, **kwargs) -> Optional["User"]:
+        """
+        Create a user unless the email is taken, in a single statement
+
+        INSERT ... ON CONFLICT (email) DO NOTHING RETURNING, so there is no
+        check-then-insert race and no follow-up SELECT.
+
+        Returns:
+            The new user (detached, all columns loaded), or None if the email exists
+        """
+        from src.database.connection import dialect_insert
+
+        stmt = (
+            dialect_insert(db, cls)
+            .values(**kwargs)
+            .on_conflict_do_nothing(index_elements=[cls.email])
+            .returning(cls)
+        )
+        try:
+            user = db.scalars(stmt).first()
+            if user is not None:
+                # Detach before commit so the returned columns aren't expired and reloaded
+                db.expunge(user)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        if user is not None:
+            logger.info(f"Created user: {user.email}")
+        return user
+
     def to_dict(self) -> dict:
         """Convert user to dictionary (without password)"""
         return {
@@ -1,13 +1,27 @@
 """
-Authentication endpoints for user registration and login
+Authentication endpoints for user registration, login and token refresh
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from src.schemas.auth import UserCreate, UserLogin, TokenResponse, UserResponse
+from src.schemas.auth import (
+    RefreshRequest,
+    TokenResponse,
+    UserCreate,
+    UserLogin,
+    UserResponse,
+)
+from src.models.refresh_token import RefreshToken, RefreshTokenError
 from src.models.user import User
-from src.database.connection import get_db
-from src.utils.auth import verify_password, get_password_hash, create_access_token
+from src.database.connection import get_db, get_read_db, read_with_primary_fallback
+from src.services.admission import CLASS_AUTH, get_admission_controller
+from src.utils.auth import (
+    create_access_token,
+    get_password_hash,
+    refresh_token_lifetime,
+    verify_password,
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,6 +36,7 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
     responses={
         409: {"description": "Email already registered"},
         422: {"description": "Validation error"},
+        503: {"description": "Server busy, retry later"},
     },
 )
 async def register(user_data: UserCreate, db: Session = Depends(get_db)):
@@ -33,30 +48,30 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     try:
         logger.info(f"User registration attempt: {user_data.email}")
 
-        # Check if user already exists
-        existing_user = User.get_by_email(db, user_data.email)
-        if existing_user:
-            logger.warning(
-                f"Registration failed - email already exists: {user_data.email}"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT, detail="Email already registered"
-            )
-
-        # Hash password
-        password_hash = get_password_hash(user_data.password)
+        # Hash off the event loop (bcrypt is deliberately slow); bounded so a signup
+        # burst is shed instead of starving the threadpool
+        async with get_admission_controller().admit("/auth/register", CLASS_AUTH):
+            password_hash = await run_in_threadpool(get_password_hash, user_data.password)
 
-        # Create user
-        new_user = User.create(
+        # Single INSERT ... ON CONFLICT DO NOTHING RETURNING: no row means the email exists
+        new_user = User.create_if_absent(
             db=db,
             first_name=user_data.first_name,
             last_name=user_data.last_name,
             email=user_data.email,
             password_hash=password_hash,
         )
+        if new_user is None:
+            logger.warning(
+                f"Registration failed - email already exists: {user_data.email}"
+            )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, detail="Email already registered"
+            )
 
-        # Create access token
+        # Create access token, and a refresh token so the client need not log in again
         access_token = create_access_token(data={"sub": str(new_user.id)})
+        refresh_token = RefreshToken.issue(db, new_user.id, refresh_token_lifetime())
 
         # Prepare response
         user_response = UserResponse(
@@ -67,12 +82,17 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
 
         response = TokenResponse(
-            access_token=access_token, token_type="bearer", user=user_response
+            access_token=access_token,
+            token_type="bearer",
+            refresh_token=refresh_token,
+            user=user_response,
         )
 
         logger.info(f"User registered successfully: {new_user.email}")
         return response
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Registration error: {e}")
         raise HTTPException(
@@ -87,9 +107,14 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     responses={
         401: {"description": "Invalid credentials"},
         422: {"description": "Validation error"},
+        503: {"description": "Server busy, retry later"},
     },
 )
-async def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(
+    credentials: UserLogin,
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+):
     """
     Login user and return JWT access token
 
@@ -98,8 +123,10 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     try:
         logger.info(f"Login attempt: {credentials.email}")
 
-        # Get user by email
-        user = User.get_by_email(db, credentials.email)
+        # Get user by email (from a replica when configured; writes stay on `db`)
+        user = read_with_primary_fallback(
+            read_db, lambda session: User.get_by_email(session, credentials.email)
+        )
         if not user:
             logger.warning(f"Login failed - user not found: {credentials.email}")
             raise HTTPException(
@@ -107,16 +134,21 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
                 detail="Invalid email or password",
             )
 
-        # Verify password
-        if not verify_password(credentials.password, user.password_hash):
+        # Verify password off the event loop, under the same bound as registration
+        async with get_admission_controller().admit("/auth/login", CLASS_AUTH):
+            valid = await run_in_threadpool(
+                verify_password, credentials.password, user.password_hash
+            )
+        if not valid:
             logger.warning(f"Login failed - invalid password: {credentials.email}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password",
             )
 
-        # Create access token
+        # Create access token, and a refresh token so the client need not log in again
         access_token = create_access_token(data={"sub": str(user.id)})
+        refresh_token = RefreshToken.issue(db, user.id, refresh_token_lifetime())
 
         # Prepare response
         user_response = UserResponse(
@@ -127,15 +159,82 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
         )
 
         response = TokenResponse(
-            access_token=access_token, token_type="bearer", user=user_response
+            access_token=access_token,
+            token_type="bearer",
+            refresh_token=refresh_token,
+            user=user_response,
         )
 
         logger.info(f"Login successful: {user.email}")
         return response
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Login error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during login",
         )
+
+
+@router.post(
+    "/refresh",
+    response_model=TokenResponse,
+    responses={
+        401: {"description": "Invalid, expired, revoked or reused refresh token"},
+        422: {"description": "Validation error"},
+    },
+)
+async def refresh(request: RefreshRequest, db: Session = Depends(get_db)):
+    """
+    Exchange a refresh token for a new access token and a new refresh token
+
+    No password check, so this is far cheaper than /auth/login. Refresh tokens are
+    single-use: presenting one a second time revokes every token issued from the
+    same login.
+    """
+    try:
+        try:
+            user_id, refresh_token = RefreshToken.rotate(
+                db, request.refresh_token, refresh_token_lifetime()
+            )
+        except RefreshTokenError as e:
+            logger.warning(f"Token refresh rejected: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired refresh token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        access_token = create_access_token(data={"sub": str(user_id)})
+        return TokenResponse(
+            access_token=access_token, token_type="bearer", refresh_token=refresh_token
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Token refresh error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error during token refresh",
+        )
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(request: RefreshRequest, db: Session = Depends(get_db)):
+    """
+    Revoke a refresh token and every token issued from the same login
+
+    Access tokens already issued stay valid until they expire.
+    """
+    try:
+        RefreshToken.revoke(db, request.refresh_token)
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    except Exception as e:
+        logger.error(f"Logout error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error during logout",
+        )
@@ -2,10 +2,26 @@
 Calorie lookup endpoints
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from src.schemas.calories import CalorieRequest, CalorieResponse, ErrorResponse
+import asyncio
+import json
+from collections import deque
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from src.schemas.calories import (
+    CalorieRequest,
+    CalorieResponse,
+    CalorieStreamRequest,
+    ErrorResponse,
+)
+from src.services.food_record import FoodRecord
+from src.services.admission import CLASS_CACHE, CLASS_UPSTREAM, get_admission_controller
+from src.services.usage import get_usage_meter
 from src.services.usda_service import get_usda_service
+from src.utils import deadline
 from src.utils.dependencies import get_current_user
+from src.utils.http_cache import calorie_cache_control, calorie_etag, etag_matches
 from src.models.user import User
 import logging
 
@@ -14,65 +30,116 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="", tags=["calories"])
 
 
-@router.post(
-    "/get-calories",
-    response_model=CalorieResponse,
-    responses={
-        401: {"model": ErrorResponse, "description": "Authentication required"},
-        404: {"model": ErrorResponse, "description": "Dish not found"},
-        422: {"model": ErrorResponse, "description": "Validation error"},
-        503: {"model": ErrorResponse, "description": "External service unavailable"},
-    },
-)
-async def get_calories(
-    request: CalorieRequest, current_user: User = Depends(get_current_user)
+CALORIE_RESPONSES = {
+    401: {"model": ErrorResponse, "description": "Authentication required"},
+    404: {"model": ErrorResponse, "description": "Dish not found"},
+    422: {"model": ErrorResponse, "description": "Validation error"},
+    503: {"model": ErrorResponse, "description": "External service unavailable or server busy"},
+}
+
+POST_CALORIE_RESPONSES = {
+    **CALORIE_RESPONSES,
+    412: {"model": ErrorResponse, "description": "If-None-Match matched the current ETag"},
+}
+
+GET_CALORIE_RESPONSES = {
+    304: {"description": "Not modified (If-None-Match matched the current ETag)"},
+    **CALORIE_RESPONSES,
+}
+
+
+def _cache_headers(etag: str) -> dict:
+    """ETag and Cache-Control headers for a calorie response"""
+    from src.config.settings import settings
+
+    return {
+        "ETag": etag,
+        "Cache-Control": calorie_cache_control(
+            settings.cache_ttl, settings.calorie_cache_shared
+        ),
+    }
+
+
+def _calorie_result(food_data: FoodRecord, dish_name: str, servings: int) -> CalorieResponse:
+    """Calories per serving (using the record's serving size) and in total"""
+    calories_per_100g = food_data.calories_per_100g
+    serving_size_g = food_data.serving_size
+
+    # Calculate calories per actual serving
+    if serving_size_g != 100:
+        calories_per_serving = int(round(calories_per_100g * (serving_size_g / 100)))
+    else:
+        calories_per_serving = calories_per_100g
+
+    return CalorieResponse(
+        dish_name=dish_name,
+        servings=servings,
+        calories_per_serving=calories_per_serving,
+        total_calories=calories_per_serving * servings,
+        source=food_data.source,
+    )
+
+
+async def _lookup_calories(
+    dish_name: str,
+    servings: int,
+    http_request: Request,
+    response: Response,
+    current_user: User,
+    safe_method: bool,
 ):
     """
-    Get calorie information for a dish with specified servings
+    Shared implementation of the POST and GET calorie lookups
 
-    This endpoint searches the USDA FoodData Central database for the specified dish
-    and returns calorie information per serving and total calories.
+    A matching If-None-Match is a 304 for GET but, as for any unsafe method
+    (RFC 9110 13.1.2), a 412 for POST.
     """
     try:
         logger.info(
-            f"Calorie lookup request: {request.dish_name} x {request.servings} for user {current_user.email}"
+            f"Calorie lookup request: {dish_name} x {servings} for user {current_user.email}"
         )
 
-        # Search for food in USDA database
         usda_service = get_usda_service()
-        food_data = await usda_service.search_food(request.dish_name)
+
+        cached = usda_service.peek_cache(dish_name)
+
+        # Conditional request: answer from the cached record's ETag without
+        # building or serializing a response body
+        if_none_match = http_request.headers.get("if-none-match")
+        if if_none_match and cached:
+            etag = calorie_etag(cached, dish_name, servings)
+            if etag_matches(if_none_match, etag):
+                if not safe_method:
+                    raise HTTPException(
+                        status_code=412,
+                        detail="If-None-Match matched the current ETag",
+                        headers={"ETag": etag},
+                    )
+                get_usage_meter().record(current_user.id)
+                return Response(status_code=304, headers=_cache_headers(etag))
+
+        # Search for food in USDA database; only cache misses are subject to shedding
+        async with get_admission_controller().admit(
+            "/get-calories", CLASS_CACHE if cached else CLASS_UPSTREAM
+        ):
+            food_data = cached or await usda_service.search_food(dish_name)
+        # Metered once the lookup completed (found or not); shed and failed ones are free
+        get_usage_meter().record(current_user.id, upstream_misses=int(cached is None))
 
         if not food_data:
-            logger.warning(f"Food not found: {request.dish_name}")
+            logger.warning(f"Food not found: {dish_name}")
             raise HTTPException(
                 status_code=404,
-                detail=f"Dish '{request.dish_name}' not found in food database",
+                detail=f"Dish '{dish_name}' not found in food database",
             )
 
-        # Calculate calories per serving using actual serving size data
-        calories_per_100g = food_data["calories_per_100g"]
-        serving_size_g = food_data.get("serving_size", 100)
-
-        # Calculate calories per actual serving
-        if serving_size_g != 100:
-            calories_per_serving = int(
-                round(calories_per_100g * (serving_size_g / 100))
-            )
-        else:
-            calories_per_serving = calories_per_100g
-
-        total_calories = calories_per_serving * request.servings
-
-        response = CalorieResponse(
-            dish_name=request.dish_name,
-            servings=request.servings,
-            calories_per_serving=calories_per_serving,
-            total_calories=total_calories,
-            source=food_data["source"],
+        result = _calorie_result(food_data, dish_name, servings)
+        response.headers.update(
+            _cache_headers(calorie_etag(food_data, dish_name, servings))
         )
 
-        logger.info(f"Calorie lookup successful: {response.model_dump()}")
-        return response
+        logger.info(f"Calorie lookup successful: {result.model_dump()}")
+        return result
 
     except HTTPException:
         # Re-raise HTTP exceptions from service
@@ -83,3 +150,176 @@ async def get_calories(
             status_code=500,
             detail="Internal server error while processing calorie request",
         )
+
+
+@router.post(
+    "/get-calories",
+    response_model=CalorieResponse,
+    responses=POST_CALORIE_RESPONSES,
+)
+async def get_calories(
+    request: CalorieRequest,
+    http_request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get calorie information for a dish with specified servings
+
+    This endpoint searches the USDA FoodData Central database for the specified dish
+    and returns calorie information per serving and total calories.
+    Responses carry an ETag. Use GET /get-calories for 304 revalidation; here a
+    matching If-None-Match gets a 412.
+    """
+    return await _lookup_calories(
+        request.dish_name, request.servings, http_request, response, current_user,
+        safe_method=False,
+    )
+
+
+@router.get(
+    "/get-calories",
+    response_model=CalorieResponse,
+    responses=GET_CALORIE_RESPONSES,
+)
+async def get_calories_cacheable(
+    http_request: Request,
+    response: Response,
+    dish_name: str = Query(..., min_length=1, max_length=100),
+    servings: int = Query(..., gt=0),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Cacheable (GET) form of the calorie lookup
+
+    Same result as POST /get-calories, addressed by URL so HTTP caches, including
+    shared proxies when CALORIE_CACHE_SHARED is enabled, can reuse it.
+    """
+    return await _lookup_calories(
+        dish_name, servings, http_request, response, current_user, safe_method=True
+    )
+
+
+STREAM_ROUTE = "/get-calories/stream"
+
+# (status, record or error detail) of one dish lookup
+LookupOutcome = Tuple[int, Optional[FoodRecord], Optional[str]]
+
+
+def _stream_line(index: int, item: CalorieRequest, outcome: LookupOutcome) -> bytes:
+    status_code, food_data, detail = outcome
+    line: Dict[str, object] = {"index": index, "dish_name": item.dish_name, "status": status_code}
+    if food_data is not None:
+        line["result"] = _calorie_result(food_data, item.dish_name, item.servings).model_dump()
+    else:
+        line["detail"] = detail
+    return json.dumps(line, separators=(",", ":")).encode() + b"\n"
+
+
+async def _resolve_dish(dish_name: str) -> LookupOutcome:
+    """Look up one cache miss; failures become the line's status instead of raising"""
+    left = deadline.remaining()
+    if left is not None and left <= 0:
+        # The stream outlives the request deadline; dishes not reached in time get a 504
+        return 504, None, "Request deadline exceeded"
+    try:
+        async with get_admission_controller().admit(STREAM_ROUTE, CLASS_UPSTREAM):
+            food_data = await get_usda_service().search_food(dish_name)
+        if not food_data:
+            return 404, None, f"Dish '{dish_name}' not found in food database"
+        return 200, food_data, None
+    except HTTPException as e:
+        return e.status_code, None, e.detail
+    except Exception as e:
+        logger.error(f"Unexpected error streaming lookup of '{dish_name}': {e}")
+        return 500, None, "Internal error while fetching food data"
+
+
+async def _stream_calories(
+    items: List[CalorieRequest], concurrency: int, buffer: int, user_id: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """
+    Yield one NDJSON line per item: cache hits at once, then misses as they resolve
+
+    Misses for the same dish share one lookup. Workers hand finished lines to a
+    bounded queue; when the client reads slowly the queue fills up and the workers
+    stop starting new lookups until it drains.
+    """
+    usda_service = get_usda_service()
+    meter = get_usage_meter() if user_id is not None else None
+    misses: Dict[str, List[int]] = {}
+    hits = 0
+    for index, item in enumerate(items):
+        cached = usda_service.peek_cache(item.dish_name)
+        if cached is not None:
+            hits += 1
+            yield _stream_line(index, item, (200, cached, None))
+        else:
+            misses.setdefault(item.dish_name.lower().strip(), []).append(index)
+    if meter is not None and hits:
+        meter.record(user_id, lookups=hits)
+    if not misses:
+        return
+
+    work = deque(misses.values())
+    lines: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=buffer)
+
+    async def worker():
+        while work:
+            indexes = work.popleft()
+            outcome = await _resolve_dish(items[indexes[0]].dish_name)
+            if meter is not None and outcome[0] in (200, 404):
+                # Repeated misses share one upstream lookup, so they count once
+                meter.record(user_id, lookups=len(indexes), upstream_misses=1)
+            for index in indexes:
+                await lines.put(_stream_line(index, items[index], outcome))
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(work)))]
+    try:
+        for _ in range(sum(len(indexes) for indexes in misses.values())):
+            yield await lines.get()
+    finally:
+        # Client gone: stop the lookups still in flight
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+@router.post(
+    "/get-calories/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}},
+            "description": "One JSON line per dish, in completion order",
+        },
+        401: {"model": ErrorResponse, "description": "Authentication required"},
+        422: {"model": ErrorResponse, "description": "Validation error"},
+    },
+)
+async def stream_calories(
+    request: CalorieStreamRequest,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Look up many dishes, streaming one NDJSON line per dish as it resolves
+
+    Cached dishes are written first. Each line carries the dish's `index` in the
+    request, its `status` (200, 404, 503, ...) and either `result` (as returned by
+    /get-calories) or `detail`. The response is never cut off at the request
+    deadline; dishes not resolved by then get a 504 line.
+    """
+    from src.config.settings import settings
+
+    logger.info(
+        f"Streaming calorie lookup of {len(request.items)} dishes for user {current_user.email}"
+    )
+    return StreamingResponse(
+        _stream_calories(
+            request.items,
+            settings.stream_lookup_concurrency,
+            settings.stream_lookup_buffer,
+            user_id=current_user.id,
+        ),
+        media_type="application/x-ndjson",
+    )
@@ -0,0 +1,63 @@
+"""
+Food autocomplete endpoints
+"""
+
+from fastapi import APIRouter, Depends, Query
+from src.schemas.calories import ErrorResponse
+from src.schemas.foods import FoodSuggestResponse, PopularDish, PopularDishesResponse
+from src.services.usda_service import get_usda_service
+from src.utils.dependencies import get_current_user, get_current_user_id
+from src.models.user import User
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/foods", tags=["foods"])
+
+
+@router.get(
+    "/suggest",
+    response_model=FoodSuggestResponse,
+    responses={
+        401: {"model": ErrorResponse, "description": "Authentication required"},
+        422: {"model": ErrorResponse, "description": "Validation error"},
+    },
+)
+async def suggest_foods(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=20),
+    user_id: int = Depends(get_current_user_id),
+):
+    """
+    Autocomplete dish names from foods already resolved by the service
+
+    Answered from an in-memory index only; never calls USDA, and authentication
+    checks the token without a database lookup, so it is safe to call on every
+    keystroke.
+    """
+    suggestions = get_usda_service().suggestions.suggest(prefix, limit)
+    return FoodSuggestResponse(prefix=prefix, suggestions=suggestions)
+
+
+@router.get(
+    "/popular",
+    response_model=PopularDishesResponse,
+    responses={
+        401: {"model": ErrorResponse, "description": "Authentication required"},
+        422: {"model": ErrorResponse, "description": "Validation error"},
+    },
+)
+async def popular_foods(
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Most looked-up dishes recently, with estimated lookup counts
+
+    Estimates come from the cache admission sketch of this worker and decay over
+    time; counts may be slightly high, never low.
+    """
+    dishes = get_usda_service().popular_dishes(limit)
+    return PopularDishesResponse(
+        dishes=[PopularDish(dish_name=name, estimated_lookups=count) for name, count in dishes]
+    )
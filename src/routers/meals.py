@@ -0,0 +1,203 @@
+"""
+Meal logging endpoints
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.orm import Session
+from src.database.connection import SessionLocal, get_db
+from src.models.meal_log import DailyRollup
+from src.models.user import User
+from src.schemas.calories import ErrorResponse
+from src.schemas.meals import (
+    MealLogRequest,
+    MealLogResponse,
+    MealSummaryResponse,
+    MealTotals,
+)
+from src.services.admission import CLASS_CACHE, CLASS_UPSTREAM, get_admission_controller
+from src.services.background import PRIORITY_HIGH, get_background_runner
+from src.services.meal_log import ROLLUP_FIELDS, get_meal_log_buffer
+from src.services.nutrients import nutrient_columns, scale_nutrients
+from src.services.usage import get_usage_meter
+from src.services.usda_service import get_usda_service
+from src.utils.dependencies import get_current_user
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/meals", tags=["meals"])
+
+MACRO_COLUMNS = nutrient_columns(["protein", "fat", "carbohydrates"])
+MAX_SUMMARY_DAYS = 366
+
+
+@router.post(
+    "",
+    status_code=202,
+    response_model=MealLogResponse,
+    responses={
+        401: {"model": ErrorResponse, "description": "Authentication required"},
+        404: {"model": ErrorResponse, "description": "Dish not found"},
+        422: {"model": ErrorResponse, "description": "Validation error"},
+        503: {"model": ErrorResponse, "description": "External service or meal log unavailable, or server busy"},
+    },
+)
+async def log_meal(
+    request: MealLogRequest, current_user: User = Depends(get_current_user)
+):
+    """
+    Log a consumed dish for the current user
+
+    Nutrients are resolved like /get-calories. The entry is queued and written in
+    the next batch by a background job (202 Accepted); it is included in summaries
+    immediately.
+    """
+    try:
+        usda_service = get_usda_service()
+        cached = usda_service.peek_cache(request.dish_name)
+        async with get_admission_controller().admit(
+            "/meals", CLASS_CACHE if cached else CLASS_UPSTREAM
+        ):
+            food_data = cached or await usda_service.search_food(request.dish_name)
+        get_usage_meter().record(current_user.id, upstream_misses=int(cached is None))
+        if not food_data:
+            logger.warning(f"Food not found: {request.dish_name}")
+            raise HTTPException(
+                status_code=404,
+                detail=f"Dish '{request.dish_name}' not found in food database",
+            )
+
+        serving_size_g = food_data.serving_size
+        calories_per_serving = int(round(food_data.calories_per_100g * (serving_size_g / 100)))
+        _, macros = scale_nutrients(
+            food_data.nutrients, MACRO_COLUMNS, serving_size_g, request.servings
+        )
+
+        consumed_at = request.consumed_at or datetime.now(timezone.utc)
+        if consumed_at.tzinfo is None:
+            consumed_at = consumed_at.replace(tzinfo=timezone.utc)
+        consumed_at = consumed_at.astimezone(timezone.utc)
+
+        entry = MealLogResponse(
+            dish_name=request.dish_name,
+            servings=request.servings,
+            calories=calories_per_serving * request.servings,
+            consumed_at=consumed_at,
+            day=consumed_at.date(),
+            **macros,
+        )
+
+        buffer = get_meal_log_buffer()
+        try:
+            batch_full = buffer.add({"user_id": current_user.id, **entry.model_dump()})
+        except OverflowError:
+            logger.error("Meal log buffer full; rejecting entry")
+            raise HTTPException(
+                status_code=503, detail="Meal log temporarily unavailable"
+            )
+        if batch_full:
+            get_background_runner().submit(
+                buffer.flush_with_session, SessionLocal,
+                priority=PRIORITY_HIGH, name="meal-log-flush",
+            )
+
+        return entry
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in log_meal: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error while logging meal",
+        )
+
+
+def _empty_totals() -> List[float]:
+    return [0] * len(ROLLUP_FIELDS)
+
+
+@router.get(
+    "/summary",
+    response_model=MealSummaryResponse,
+    responses={
+        401: {"model": ErrorResponse, "description": "Authentication required"},
+        422: {"model": ErrorResponse, "description": "Validation error"},
+    },
+)
+def meal_summary(
+    start: Optional[date] = Query(None, description="First day (default: 6 days before end)"),
+    end: Optional[date] = Query(None, description="Last day, inclusive (default: today, UTC)"),
+    group_by: Literal["day", "week"] = Query("day"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Daily or weekly (ISO weeks, starting Monday) nutrient totals for the current user
+
+    Reads one rollup row per day plus not-yet-flushed entries; raw meal logs are
+    never scanned.
+    """
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=6)
+    if start > end:
+        raise HTTPException(status_code=422, detail="start must not be after end")
+    if (end - start).days >= MAX_SUMMARY_DAYS:
+        raise HTTPException(
+            status_code=422, detail=f"Range is limited to {MAX_SUMMARY_DAYS} days"
+        )
+
+    rows, pending = get_meal_log_buffer().read_with_pending(
+        lambda: (
+            db.query(DailyRollup)
+            # A retried read must see rows committed since the first attempt
+            .populate_existing()
+            .filter(
+                DailyRollup.user_id == current_user.id,
+                DailyRollup.day >= start,
+                DailyRollup.day <= end,
+            )
+            .all()
+        ),
+        current_user.id,
+        start,
+        end,
+    )
+    days: Dict[date, List[float]] = {
+        row.day: [getattr(row, field) for field in ROLLUP_FIELDS] for row in rows
+    }
+    for day, delta in pending.items():
+        totals = days.setdefault(day, _empty_totals())
+        for i, value in enumerate(delta):
+            totals[i] += value
+
+    periods: Dict[date, List[float]] = {}
+    grand_total = _empty_totals()
+    for day in sorted(days):
+        key = day - timedelta(days=day.weekday()) if group_by == "week" else day
+        period = periods.setdefault(key, _empty_totals())
+        for i, value in enumerate(days[day]):
+            period[i] += value
+            grand_total[i] += value
+
+    def to_totals(period_start: date, values: List[float]) -> MealTotals:
+        fields = dict(zip(ROLLUP_FIELDS, values))
+        return MealTotals(
+            start=period_start,
+            calories=int(fields["calories"]),
+            protein=round(fields["protein"], 2),
+            fat=round(fields["fat"], 2),
+            carbohydrates=round(fields["carbohydrates"], 2),
+            entries=int(fields["entries"]),
+        )
+
+    return MealSummaryResponse(
+        start=start,
+        end=end,
+        group_by=group_by,
+        periods=[to_totals(key, values) for key, values in periods.items()],
+        total=to_totals(start, grand_total),
+    )
@@ -0,0 +1,84 @@
+"""
+Nutrient profile (macros) endpoints
+"""
+
+from fastapi import APIRouter, HTTPException, Depends
+from src.schemas.calories import ErrorResponse
+from src.schemas.nutrients import MacrosRequest, MacrosResponse
+from src.services.admission import CLASS_CACHE, CLASS_UPSTREAM, get_admission_controller
+from src.services.nutrients import NUTRIENT_UNITS, nutrient_columns, scale_nutrients
+from src.services.usage import get_usage_meter
+from src.services.usda_service import get_usda_service
+from src.utils.dependencies import get_current_user
+from src.models.user import User
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="", tags=["nutrients"])
+
+
+@router.post(
+    "/get-macros",
+    response_model=MacrosResponse,
+    responses={
+        401: {"model": ErrorResponse, "description": "Authentication required"},
+        404: {"model": ErrorResponse, "description": "Dish not found"},
+        422: {"model": ErrorResponse, "description": "Validation error"},
+        503: {"model": ErrorResponse, "description": "External service unavailable or server busy"},
+    },
+)
+async def get_macros(
+    request: MacrosRequest, current_user: User = Depends(get_current_user)
+):
+    """
+    Get nutrients (protein, fat, carbs, ...) for a dish with specified servings
+
+    Served from the same cached USDA record as /get-calories, so asking for
+    macros after a calorie lookup costs no extra upstream call.
+    """
+    try:
+        logger.info(
+            f"Macros lookup request: {request.dish_name} x {request.servings} for user {current_user.email}"
+        )
+
+        usda_service = get_usda_service()
+        cached = usda_service.peek_cache(request.dish_name)
+        async with get_admission_controller().admit(
+            "/get-macros", CLASS_CACHE if cached else CLASS_UPSTREAM
+        ):
+            food_data = cached or await usda_service.search_food(request.dish_name)
+        get_usage_meter().record(current_user.id, upstream_misses=int(cached is None))
+
+        if not food_data:
+            logger.warning(f"Food not found: {request.dish_name}")
+            raise HTTPException(
+                status_code=404,
+                detail=f"Dish '{request.dish_name}' not found in food database",
+            )
+
+        columns = nutrient_columns(request.nutrients)
+        serving_size_g = food_data.serving_size
+        per_serving, total = scale_nutrients(
+            food_data.nutrients, columns, serving_size_g, request.servings
+        )
+
+        return MacrosResponse(
+            dish_name=request.dish_name,
+            servings=request.servings,
+            serving_size=serving_size_g,
+            serving_unit=food_data.serving_unit,
+            per_serving=per_serving,
+            total=total,
+            units={name: NUTRIENT_UNITS[name] for name in per_serving},
+            source=food_data.source,
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in get_macros: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error while processing macros request",
+        )
@@ -0,0 +1,84 @@
+"""
+Usage metering endpoints
+"""
+
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.orm import Session
+from src.database.connection import get_db
+from src.models.usage import UsageCounter
+from src.models.user import User
+from src.schemas.calories import ErrorResponse
+from src.schemas.usage import UsageDay, UsageResponse
+from src.services.usage import USAGE_FIELDS, get_usage_meter
+from src.utils.dependencies import get_current_user
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/usage", tags=["usage"])
+
+MAX_USAGE_DAYS = 366
+
+
+@router.get(
+    "",
+    response_model=UsageResponse,
+    responses={
+        401: {"model": ErrorResponse, "description": "Authentication required"},
+        422: {"model": ErrorResponse, "description": "Validation error"},
+    },
+)
+def get_usage(
+    start: Optional[date] = Query(None, description="First day (default: first of end's month)"),
+    end: Optional[date] = Query(None, description="Last day, inclusive (default: today, UTC)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Dish lookups and upstream (USDA) misses of the current user, per day
+
+    Reads the flushed counters plus this worker's not-yet-flushed counts; counts
+    held by other workers appear after their next flush.
+    """
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end.replace(day=1)
+    if start > end:
+        raise HTTPException(status_code=422, detail="start must not be after end")
+    if (end - start).days >= MAX_USAGE_DAYS:
+        raise HTTPException(status_code=422, detail=f"Range is limited to {MAX_USAGE_DAYS} days")
+
+    rows, pending = get_usage_meter().read_with_pending(
+        lambda: (
+            db.query(UsageCounter)
+            # A retried read must see rows committed since the first attempt
+            .populate_existing()
+            .filter(
+                UsageCounter.user_id == current_user.id,
+                UsageCounter.day >= start,
+                UsageCounter.day <= end,
+            )
+            .all()
+        ),
+        current_user.id,
+        start,
+        end,
+    )
+    days: Dict[date, List[int]] = {
+        row.day: [getattr(row, field) for field in USAGE_FIELDS] for row in rows
+    }
+    for day, counts in pending.items():
+        totals = days.setdefault(day, [0] * len(USAGE_FIELDS))
+        for i, value in enumerate(counts):
+            totals[i] += value
+
+    usage_days = [UsageDay(day=day, **dict(zip(USAGE_FIELDS, days[day]))) for day in sorted(days)]
+    return UsageResponse(
+        start=start,
+        end=end,
+        days=usage_days,
+        lookups=sum(day.lookups for day in usage_days),
+        upstream_misses=sum(day.upstream_misses for day in usage_days),
+    )
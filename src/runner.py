@@ -0,0 +1,70 @@
+"""
+Production server entry point
+
+Runs uvicorn with a configurable worker count, uvloop/httptools when installed and
+keep-alive/backlog tuning from Settings. With more than one worker, all workers share
+one memory-mapped food cache so each doesn't refill its own from USDA.
+
+Usage:
+    python -m src.runner
+    SERVER_WORKERS=0 python -m src.runner   # one worker per CPU
+"""
+
+import importlib.util
+import os
+from typing import Any, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARED_CACHE_DIR = "/dev/shm"
+
+
+def resolve_workers(configured: int) -> int:
+    """Worker count from settings; 0 means one per CPU"""
+    if configured > 0:
+        return configured
+    return os.cpu_count() or 1
+
+
+def build_server_config(settings) -> Dict[str, Any]:
+    """uvicorn.run() keyword arguments for the given settings"""
+    return {
+        "host": settings.host,
+        "port": settings.port,
+        "workers": resolve_workers(settings.server_workers),
+        "loop": "uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        "http": "httptools" if importlib.util.find_spec("httptools") else "h11",
+        "backlog": settings.server_backlog,
+        "timeout_keep_alive": settings.server_keep_alive,
+        "proxy_headers": settings.rate_limit_trusted_proxy_hops > 0,
+        "access_log": not settings.is_production,
+    }
+
+
+def main():
+    import uvicorn
+    from src.config.settings import get_settings
+
+    logging.basicConfig(level=logging.INFO)
+    settings = get_settings()
+    config = build_server_config(settings)
+
+    if config["workers"] > 1 and not settings.shared_cache_path:
+        # Workers are spawned with this environment and pick the path up from Settings
+        cache_dir = DEFAULT_SHARED_CACHE_DIR if os.path.isdir(DEFAULT_SHARED_CACHE_DIR) else "."
+        os.environ["SHARED_CACHE_PATH"] = os.path.join(
+            cache_dir, f"calory-food-cache-{settings.port}"
+        )
+        logger.info(f"Workers share food cache at {os.environ['SHARED_CACHE_PATH']}")
+
+    logger.info(
+        f"Starting {config['workers']} worker(s) on {config['host']}:{config['port']} "
+        f"(loop={config['loop']}, http={config['http']}, backlog={config['backlog']}, "
+        f"keep-alive={config['timeout_keep_alive']}s)"
+    )
+    uvicorn.run("main:app", **config)
+
+
+if __name__ == "__main__":
+    main()
@@ -47,9 +47,17 @@ class TokenResponse(BaseModel):
 
     access_token: str
     token_type: str = "bearer"
+    # Single-use; exchange at /auth/refresh for a new access token
+    refresh_token: Optional[str] = None
     user: Optional[UserResponse] = None
 
 
+class RefreshRequest(BaseModel):
+    """Schema for refreshing an access token (or revoking on logout)"""
+
+    refresh_token: str = Field(..., min_length=1, max_length=200)
+
+
 class Token(BaseModel):
     """Schema for JWT token data"""
 
@@ -2,8 +2,13 @@
 Pydantic schemas for calorie-related requests and responses
 """
 
+from typing import List
+
 from pydantic import BaseModel, Field
 
+# Most dishes accepted by one streaming lookup
+MAX_STREAM_ITEMS = 500
+
 
 class CalorieRequest(BaseModel):
     """Request schema for calorie lookup"""
@@ -16,6 +21,14 @@ class CalorieRequest(BaseModel):
     )
 
 
+class CalorieStreamRequest(BaseModel):
+    """Request schema for a streaming multi-dish lookup"""
+
+    items: List[CalorieRequest] = Field(
+        ..., min_length=1, max_length=MAX_STREAM_ITEMS, description="Dishes to look up"
+    )
+
+
 class CalorieResponse(BaseModel):
     """Response schema for calorie lookup"""
 
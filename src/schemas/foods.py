@@ -0,0 +1,34 @@
+"""
+Pydantic schemas for food autocomplete and popularity
+"""
+
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class FoodSuggestion(BaseModel):
+    """A single autocomplete suggestion"""
+
+    name: str
+    data_type: Optional[str] = None
+    popularity: int
+
+
+class FoodSuggestResponse(BaseModel):
+    """Response schema for dish-name autocomplete"""
+
+    prefix: str
+    suggestions: List[FoodSuggestion]
+
+
+class PopularDish(BaseModel):
+    """A frequently looked-up dish"""
+
+    dish_name: str
+    estimated_lookups: int
+
+
+class PopularDishesResponse(BaseModel):
+    """Response schema for the popular dishes report (this worker)"""
+
+    dishes: List[PopularDish]
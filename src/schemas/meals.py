@@ -0,0 +1,55 @@
+"""
+Pydantic schemas for meal logging and daily/weekly summaries
+"""
+
+from datetime import date, datetime
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class MealLogRequest(BaseModel):
+    """Request schema for logging a consumed dish"""
+
+    dish_name: str = Field(
+        ..., min_length=1, max_length=100, description="Name of the dish"
+    )
+    servings: int = Field(
+        ..., gt=0, description="Number of servings (must be positive)"
+    )
+    consumed_at: Optional[datetime] = Field(
+        default=None, description="When the dish was eaten (default: now, UTC)"
+    )
+
+
+class MealLogResponse(BaseModel):
+    """Response schema for a queued meal log"""
+
+    dish_name: str
+    servings: int
+    calories: int
+    protein: Optional[float] = None
+    fat: Optional[float] = None
+    carbohydrates: Optional[float] = None
+    consumed_at: datetime
+    day: date
+
+
+class MealTotals(BaseModel):
+    """Summed nutrients for a day or week"""
+
+    start: date
+    calories: int = 0
+    protein: float = 0.0
+    fat: float = 0.0
+    carbohydrates: float = 0.0
+    entries: int = 0
+
+
+class MealSummaryResponse(BaseModel):
+    """Response schema for a meal summary"""
+
+    start: date
+    end: date
+    group_by: str
+    periods: List[MealTotals]
+    total: MealTotals
@@ -0,0 +1,46 @@
+"""
+Pydantic schemas for nutrient (macros) requests and responses
+"""
+
+from pydantic import BaseModel, Field, field_validator
+from typing import Dict, List, Optional
+from src.services.nutrients import NUTRIENT_NAMES
+
+
+class MacrosRequest(BaseModel):
+    """Request schema for a nutrient profile lookup"""
+
+    dish_name: str = Field(
+        ..., min_length=1, max_length=100, description="Name of the dish"
+    )
+    servings: int = Field(
+        ..., gt=0, description="Number of servings (must be positive)"
+    )
+    nutrients: Optional[List[str]] = Field(
+        default=None,
+        description=f"Nutrients to return (default: all of {', '.join(NUTRIENT_NAMES)})",
+    )
+
+    @field_validator("nutrients")
+    @classmethod
+    def validate_nutrients(cls, value: Optional[List[str]]) -> Optional[List[str]]:
+        if value is None:
+            return value
+        unknown = [name for name in value if name not in NUTRIENT_NAMES]
+        if unknown:
+            raise ValueError(f"Unknown nutrients: {', '.join(unknown)}")
+        # Keep request order, drop duplicates
+        return list(dict.fromkeys(value))
+
+
+class MacrosResponse(BaseModel):
+    """Response schema for a nutrient profile lookup"""
+
+    dish_name: str
+    servings: int
+    serving_size: float
+    serving_unit: str
+    per_serving: Dict[str, Optional[float]]
+    total: Dict[str, Optional[float]]
+    units: Dict[str, str]
+    source: str = "USDA FoodData Central"
@@ -0,0 +1,25 @@
+"""
+Pydantic schemas for usage metering endpoints
+"""
+
+from datetime import date
+from pydantic import BaseModel
+from typing import List
+
+
+class UsageDay(BaseModel):
+    """Lookup counts for one day (UTC)"""
+
+    day: date
+    lookups: int = 0
+    upstream_misses: int = 0
+
+
+class UsageResponse(BaseModel):
+    """Response schema for a user's usage over a date range"""
+
+    start: date
+    end: date
+    days: List[UsageDay]
+    lookups: int
+    upstream_misses: int
@@ -0,0 +1,244 @@
+"""
+Admission control and load shedding
+
+Work that can't be served from memory is admitted through gates that cap in-flight
+requests per class (upstream-bound lookups, bcrypt-bound auth) and per route. A
+request that finds its gate full waits in a short bounded queue; once the queue is
+full or the wait passes its threshold it is rejected at once with 503 and a
+Retry-After estimate, instead of piling up behind everyone else. Cache-resolvable
+lookups bypass the gates, so they keep flowing under overload.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from src.utils import deadline
+from src.utils.deadline import DeadlineExceeded
+import logging
+
+logger = logging.getLogger(__name__)
+
+CLASS_CACHE = "cache"
+CLASS_UPSTREAM = "upstream"
+CLASS_AUTH = "auth"
+
+
+class Overloaded(HTTPException):
+    """Request shed by admission control (503 with Retry-After)"""
+
+    def __init__(self, gate: str, retry_after: int):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Server busy ({gate}), retry later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class AdmissionGate:
+    """Concurrency limit with a bounded, time-limited FIFO wait queue"""
+
+    def __init__(self, name: str, max_in_flight: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # EWMA of how long admitted work holds a slot, for Retry-After
+        self._hold_ewma = 0.0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free for a new request"""
+        backlog = (self.waiting + 1) / max(1, self.max_in_flight)
+        return max(1, math.ceil(self._hold_ewma * backlog))
+
+    def _reject(self) -> None:
+        self.rejected += 1
+        raise Overloaded(self.name, self.retry_after())
+
+    async def acquire(self) -> None:
+        """
+        Take a slot, waiting at most max_wait (and the request deadline)
+
+        Raises:
+            Overloaded: If the queue is full or max_wait passed
+            DeadlineExceeded: If the request deadline passed first
+        """
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        # Out of time already: a timeout, not a sign of overload
+        deadline.check_deadline()
+        if len(self._waiters) >= self.max_queue:
+            self._reject()
+
+        wait = self.max_wait
+        left = deadline.remaining()
+        deadline_bound = left is not None and left < wait
+        if deadline_bound:
+            wait = max(0.0, left)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(waiter, wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended
+                if isinstance(e, asyncio.CancelledError):
+                    self.release()
+                    raise
+                self.admitted += 1
+                return
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            if deadline_bound:
+                raise DeadlineExceeded()
+            self._reject()
+        self.admitted += 1
+
+    def release(self, held: Optional[float] = None) -> None:
+        """Free a slot, handing it straight to the oldest waiter if any"""
+        if held is not None:
+            self._hold_ewma += 0.2 * (held - self._hold_ewma)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "avg_hold_ms": round(self._hold_ewma * 1000, 1),
+        }
+
+
+class AdmissionController:
+    """Per-class and per-route gates; the cache class is never gated"""
+
+    def __init__(
+        self,
+        upstream_concurrency: int = 64,
+        upstream_queue: int = 128,
+        auth_concurrency: int = 8,
+        auth_queue: int = 32,
+        route_concurrency: int = 128,
+        route_queue: int = 256,
+        max_wait: float = 0.5,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.max_wait = max_wait
+        self.route_concurrency = route_concurrency
+        self.route_queue = route_queue
+        self._class_gates = {
+            CLASS_UPSTREAM: AdmissionGate(CLASS_UPSTREAM, upstream_concurrency, upstream_queue, max_wait),
+            CLASS_AUTH: AdmissionGate(CLASS_AUTH, auth_concurrency, auth_queue, max_wait),
+        }
+        self._route_gates: Dict[str, AdmissionGate] = {}
+        self.cache_admitted = 0
+
+    def _route_gate(self, route: str) -> AdmissionGate:
+        gate = self._route_gates.get(route)
+        if gate is None:
+            gate = self._route_gates[route] = AdmissionGate(
+                f"route {route}", self.route_concurrency, self.route_queue, self.max_wait
+            )
+        return gate
+
+    @asynccontextmanager
+    async def admit(self, route: str, request_class: str):
+        """
+        Hold a route slot and a class slot for the duration of the block
+
+        Raises:
+            Overloaded: If either gate sheds the request
+        """
+        if request_class == CLASS_CACHE or not self.enabled:
+            if request_class == CLASS_CACHE:
+                self.cache_admitted += 1
+            yield
+            return
+
+        acquired = []
+        try:
+            for gate in (self._route_gate(route), self._class_gates[request_class]):
+                await gate.acquire()
+                acquired.append(gate)
+        except BaseException as e:
+            # Shed, or cancelled while queued (disconnect, deadline): give back what we hold
+            if isinstance(e, Overloaded):
+                logger.warning(f"Shedding {request_class} request to {route}")
+            for gate in reversed(acquired):
+                gate.release()
+            raise
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            held = time.perf_counter() - started
+            for gate in reversed(acquired):
+                gate.release(held)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "cache_admitted": self.cache_admitted,
+            "classes": {name: gate.stats() for name, gate in self._class_gates.items()},
+            "routes": {route: gate.stats() for route, gate in self._route_gates.items()},
+        }
+
+
+_admission_controller: Optional[AdmissionController] = None
+
+
+def create_admission_controller() -> AdmissionController:
+    """Create the process-wide controller from settings (app startup)"""
+    from src.config.settings import settings
+
+    global _admission_controller
+    _admission_controller = AdmissionController(
+        upstream_concurrency=settings.admission_upstream_concurrency,
+        upstream_queue=settings.admission_upstream_queue,
+        auth_concurrency=settings.admission_auth_concurrency,
+        auth_queue=settings.admission_auth_queue,
+        route_concurrency=settings.admission_route_concurrency,
+        route_queue=settings.admission_route_queue,
+        max_wait=settings.admission_max_wait,
+        enabled=settings.admission_enabled,
+    )
+    return _admission_controller
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get the process-wide admission controller"""
+    if _admission_controller is None:
+        return create_admission_controller()
+    return _admission_controller
@@ -0,0 +1,247 @@
+"""
+In-process background job runner
+
+Request handlers hand off non-critical work (cache publication, cache refresh and
+warm-up, meal log flushes) with `submit` and return immediately. Jobs wait in one
+bounded priority queue and run on a fixed number of worker tasks; sync callables
+run in a worker thread. When the queue is full, a job only gets in by displacing a
+lower-priority one. On shutdown the runner stops accepting work and drains the
+queue for a bounded time. A job that never runs (displaced or abandoned) calls its
+`on_discard` callback, so callers can release what they reserved for it.
+"""
+
+import asyncio
+import heapq
+import inspect
+import itertools
+import time
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+
+class _Job:
+    __slots__ = ("func", "args", "kwargs", "name", "priority", "on_discard", "enqueued_at")
+
+    def __init__(self, func, args, kwargs, name, priority, on_discard):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.name = name
+        self.priority = priority
+        self.on_discard = on_discard
+        self.enqueued_at = time.perf_counter()
+
+    def discard(self) -> None:
+        """The job will not run"""
+        if self.on_discard is not None:
+            try:
+                self.on_discard()
+            except Exception as e:
+                logger.error(f"Discard callback of background job {self.name} failed: {e}")
+
+    async def run(self) -> None:
+        if inspect.iscoroutinefunction(self.func):
+            await self.func(*self.args, **self.kwargs)
+        else:
+            await asyncio.to_thread(self.func, *self.args, **self.kwargs)
+
+
+class BackgroundRunner:
+    """Bounded priority queue of jobs executed by `concurrency` worker tasks"""
+
+    def __init__(self, concurrency: int = 4, max_queue: int = 1000):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        # (priority, sequence, job); the sequence keeps FIFO order within a priority
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._accepting = False
+        self._running = 0
+
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    @property
+    def running(self) -> bool:
+        """True while the runner accepts jobs"""
+        return self._accepting
+
+    def start(self) -> None:
+        """Start the worker tasks (must be called from the event loop)"""
+        if self._workers:
+            return
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._accepting = True
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"background-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        logger.info(
+            f"Background runner started: concurrency={self.concurrency}, max_queue={self.max_queue}"
+        )
+
+    def submit(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        priority: int = PRIORITY_NORMAL,
+        name: Optional[str] = None,
+        on_discard: Optional[Callable[[], None]] = None,
+        **kwargs: Any,
+    ) -> bool:
+        """
+        Queue a job without waiting for it (call from the event loop thread)
+
+        Args:
+            func: Coroutine function or sync callable (run in a thread)
+            priority: PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW (lower runs first)
+            name: Label for logs
+            on_discard: Called if the accepted job is later displaced or abandoned
+                by `drain` without running
+
+        Returns:
+            False if the runner is not running or the job was shed because the
+            queue is full of equal or higher priority work
+        """
+        if not self._accepting:
+            return False
+        job = _Job(
+            func, args, kwargs, name or getattr(func, "__name__", "job"), priority, on_discard
+        )
+
+        if len(self._heap) >= self.max_queue:
+            # Shed the lowest-priority, most recently queued job if the new one beats it
+            worst = max(self._heap)
+            if priority >= worst[0]:
+                self.dropped += 1
+                logger.warning(f"Background queue full, dropped job: {job.name}")
+                return False
+            self._heap.remove(worst)
+            heapq.heapify(self._heap)
+            self.dropped += 1
+            logger.warning(f"Background queue full, displaced job: {worst[2].name}")
+            worst[2].discard()
+
+        heapq.heappush(self._heap, (priority, next(self._seq), job))
+        self.submitted += 1
+        self._idle.clear()
+        self._wakeup.set()
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            while not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            _, _, job = heapq.heappop(self._heap)
+
+            started = time.perf_counter()
+            wait = started - job.enqueued_at
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            self.started += 1
+            self._running += 1
+            try:
+                # Cancellation (drain) propagates without counting the job as finished
+                try:
+                    await job.run()
+                except Exception as e:
+                    self.failed += 1
+                    logger.error(f"Background job {job.name} failed: {e}")
+                else:
+                    self.completed += 1
+                self._run_total += time.perf_counter() - started
+            finally:
+                self._running -= 1
+                if not self._heap and not self._running:
+                    self._idle.set()
+
+    async def drain(self, timeout: float = 10.0) -> int:
+        """
+        Stop accepting jobs, wait up to `timeout` seconds for queued and running
+        jobs to finish, then stop the workers
+
+        Returns:
+            Number of queued jobs abandoned because the timeout expired
+        """
+        self._accepting = False
+        if not self._workers:
+            return 0
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Background drain timed out with {len(self._heap)} queued, {self._running} running"
+            )
+        abandoned = len(self._heap)
+        for _, _, job in self._heap:
+            job.discard()
+        self._heap.clear()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info(f"Background runner stopped ({abandoned} jobs abandoned)")
+        return abandoned
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters, queue depth (total and per priority) and timing averages"""
+        by_priority: Dict[int, int] = {}
+        for priority, _, _ in self._heap:
+            by_priority[priority] = by_priority.get(priority, 0) + 1
+        finished = self.completed + self.failed
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "queued": len(self._heap),
+            "queued_by_priority": by_priority,
+            "running": self._running,
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "avg_wait_ms": round(self._wait_total / self.started * 1000, 3) if self.started else 0.0,
+            "max_wait_ms": round(self._wait_max * 1000, 3),
+            "avg_run_ms": round(self._run_total / finished * 1000, 3) if finished else 0.0,
+        }
+
+
+_background_runner: Optional[BackgroundRunner] = None
+
+
+def create_background_runner() -> BackgroundRunner:
+    """Create the process-wide runner from settings (app startup)"""
+    from src.config.settings import settings
+
+    global _background_runner
+    _background_runner = BackgroundRunner(
+        concurrency=settings.background_concurrency,
+        max_queue=settings.background_max_queue,
+    )
+    return _background_runner
+
+
+def get_background_runner() -> BackgroundRunner:
+    """Get the process-wide runner (not running until the app lifespan starts it)"""
+    global _background_runner
+    if _background_runner is None:
+        _background_runner = BackgroundRunner()
+    return _background_runner
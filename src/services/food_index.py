@@ -0,0 +1,168 @@
+"""
+In-memory prefix index of known food names for autocomplete
+
+Names come from foods USDAService has already resolved (the query as typed and the
+USDA description), so suggestions never need an upstream call. Names live in a sorted
+array searched with bisect. Short prefixes match thousands of names, so for those the
+index also keeps a small ranked top-k list that is updated incrementally as names are
+learned or get more popular; lookups are then a dict hit and a slice. Longer prefixes
+that still span a wide range have their ranked result memoized for a few seconds.
+"""
+
+import bisect
+import heapq
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+# Lower is better, same ordering as USDAService._find_best_food_match
+DATA_TYPE_PRIORITY = {"Foundation": 1, "SR Legacy": 2, "Branded": 3}
+UNKNOWN_PRIORITY = 4
+
+# Prefixes up to this length get a maintained top-k list
+TOP_DEPTH = 4
+# Maximum suggestions per request (and length of each top-k list)
+TOP_K = 20
+# Share of entries dropped at once when the index is full, so eviction cost is amortized
+EVICT_FRACTION = 0.05
+# Longer prefixes matching more names than this have their ranking memoized
+SCAN_LIMIT = 512
+MEMO_TTL_SECONDS = 5.0
+
+
+def normalize(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+class FoodSuggestionIndex:
+    """Prefix index ranked by popularity, then data-type priority, then name"""
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._keys: List[str] = []
+        # normalized name -> [display name, popularity, data-type priority, data type]
+        self._entries: Dict[str, list] = {}
+        # short prefix -> up to TOP_K normalized names, best first
+        self._top: Dict[str, List[str]] = {}
+        # top lists that lost a member to eviction and must be rebuilt from a scan
+        self._stale: Set[str] = set()
+        # long prefix -> (expires_at, ranked names) for wide ranges
+        self._memo: Dict[str, Tuple[float, List[str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _rank(self, key: str):
+        entry = self._entries[key]
+        return (-entry[1], entry[2], key)
+
+    def _promote(self, key: str) -> None:
+        """Reflect a new or improved ranking of `key` in its prefixes' top lists"""
+        rank = self._rank(key)
+        for depth in range(1, min(TOP_DEPTH, len(key)) + 1):
+            top = self._top.setdefault(key[:depth], [])
+            try:
+                i = top.index(key)
+            except ValueError:
+                if len(top) < TOP_K:
+                    top.append(key)
+                elif rank < self._rank(top[-1]):
+                    top[-1] = key
+                else:
+                    continue
+                i = len(top) - 1
+            # Rankings only improve, so bubbling towards the front keeps the list sorted
+            while i > 0 and rank < self._rank(top[i - 1]):
+                top[i], top[i - 1] = top[i - 1], top[i]
+                i -= 1
+
+    def learn(self, name: str, data_type: Optional[str] = None) -> None:
+        """Add a name (or upgrade its data type), counting it as one use"""
+        key = normalize(name)
+        if not key:
+            return
+        priority = DATA_TYPE_PRIORITY.get(data_type, UNKNOWN_PRIORITY)
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[1] += 1
+            if priority < entry[2]:
+                entry[2], entry[3] = priority, data_type
+        else:
+            if len(self._keys) >= self.max_entries:
+                self._evict_least_popular()
+            self._entries[key] = [name.strip(), 1, priority, data_type]
+            bisect.insort(self._keys, key)
+        self._promote(key)
+
+    def touch(self, name: str) -> None:
+        """Count another use of a known name (e.g. a cache hit)"""
+        key = normalize(name)
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[1] += 1
+            self._promote(key)
+
+    def _evict_least_popular(self) -> None:
+        """Drop the least popular names (lowest data-type priority first on ties)"""
+        count = max(1, int(self.max_entries * EVICT_FRACTION))
+        entries = self._entries
+        victims = heapq.nsmallest(
+            count, entries, key=lambda k: (entries[k][1], -entries[k][2], k)
+        )
+        for key in victims:
+            del entries[key]
+            for depth in range(1, min(TOP_DEPTH, len(key)) + 1):
+                top = self._top.get(key[:depth])
+                if top is not None and key in top:
+                    top.remove(key)
+                    self._stale.add(key[:depth])
+        self._keys = [key for key in self._keys if key in entries]
+
+    def _scan(self, prefix: str, limit: int) -> List[str]:
+        """Rank every name in the prefix's range of the sorted array"""
+        lo = bisect.bisect_left(self._keys, prefix)
+        hi = bisect.bisect_left(self._keys, prefix + "\uffff", lo)
+        return heapq.nsmallest(limit, self._keys[lo:hi], key=self._rank)
+
+    def _scan_memoized(self, prefix: str, limit: int) -> List[str]:
+        now = time.monotonic()
+        memo = self._memo.get(prefix)
+        if memo is not None and memo[0] > now:
+            return [key for key in memo[1] if key in self._entries][:limit]
+
+        lo = bisect.bisect_left(self._keys, prefix)
+        hi = bisect.bisect_left(self._keys, prefix + "\uffff", lo)
+        if hi - lo <= SCAN_LIMIT:
+            return heapq.nsmallest(limit, self._keys[lo:hi], key=self._rank)
+
+        ranked = heapq.nsmallest(TOP_K, self._keys[lo:hi], key=self._rank)
+        if len(self._memo) >= self.max_entries // 10:
+            self._memo.clear()
+        self._memo[prefix] = (now + MEMO_TTL_SECONDS, ranked)
+        return ranked[:limit]
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[dict]:
+        """
+        Top completions for a prefix
+
+        Args:
+            prefix: Typed prefix (case/whitespace-insensitive)
+            limit: Maximum number of suggestions (capped at TOP_K)
+
+        Returns:
+            Suggestions ordered by popularity, then data-type priority, then name
+        """
+        prefix = normalize(prefix)
+        limit = min(limit, TOP_K)
+        if len(prefix) <= TOP_DEPTH:
+            if prefix in self._stale:
+                self._top[prefix] = self._scan(prefix, TOP_K)
+                self._stale.discard(prefix)
+            keys = self._top.get(prefix, [])[:limit]
+        else:
+            keys = self._scan_memoized(prefix, limit)
+
+        entries = self._entries
+        return [
+            {"name": entries[k][0], "data_type": entries[k][3], "popularity": entries[k][1]}
+            for k in keys
+        ]
@@ -0,0 +1,154 @@
+"""
+Compact, memory-accounted representation of a cached food lookup result
+"""
+
+import pickle
+import sys
+import time
+import tracemalloc
+from array import array
+from typing import Any, Dict, Optional
+
+from src.services.nutrients import extract_nutrient_vector
+from src.utils.http_cache import food_record_digest
+
+# Enumerated fields repeat across every entry; interning makes all records share
+# one string object per distinct value instead of one per record.
+_intern = sys.intern
+
+USDA_SOURCE = _intern("USDA FoodData Central")
+
+# Approximate cost of the cache index slot (dict entry + LRU links) per record
+INDEX_OVERHEAD_BYTES = 104
+
+
+def _intern_optional(value: Optional[str]) -> Optional[str]:
+    return _intern(value) if value is not None else None
+
+
+class FoodRecord:
+    """Resolved food lookup result as stored in the cache"""
+
+    __slots__ = (
+        "fdc_id",
+        "description",
+        "calories_per_100g",
+        "serving_size",
+        "serving_unit",
+        "data_type",
+        "source",
+        "nutrients",
+        "digest",
+        "stored_at",
+    )
+
+    def __init__(
+        self,
+        fdc_id: Optional[int],
+        description: str,
+        calories_per_100g: int,
+        serving_size: float = 100,
+        serving_unit: str = "g",
+        data_type: Optional[str] = None,
+        source: str = USDA_SOURCE,
+        nutrients: Optional[array] = None,
+        digest: Optional[str] = None,
+        stored_at: Optional[float] = None,
+    ):
+        self.fdc_id = fdc_id
+        self.description = description
+        self.calories_per_100g = calories_per_100g
+        self.serving_size = serving_size
+        self.serving_unit = _intern(serving_unit)
+        self.data_type = _intern_optional(data_type)
+        self.source = _intern(source)
+        self.nutrients = nutrients if nutrients is not None else array("f")
+        self.digest = digest or food_record_digest(self)
+        self.stored_at = stored_at if stored_at is not None else time.time()
+
+    @classmethod
+    def from_usda(cls, food: Dict[str, Any], calories_per_100g: int, query: str) -> "FoodRecord":
+        """Build a record from the best-matching USDA search result"""
+        return cls(
+            fdc_id=food.get("fdcId"),
+            description=food.get("description", query),
+            calories_per_100g=calories_per_100g,
+            serving_size=food.get("servingSize", 100),
+            serving_unit=food.get("servingSizeUnit", "g"),
+            data_type=food.get("dataType"),
+            nutrients=extract_nutrient_vector(food),
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], stored_at: Optional[float] = None) -> "FoodRecord":
+        """Rebuild a record from its dict form (shared cache, fixtures)"""
+        nutrients = data.get("nutrients")
+        return cls(
+            fdc_id=data.get("fdc_id"),
+            description=data["description"],
+            calories_per_100g=data["calories_per_100g"],
+            serving_size=data.get("serving_size", 100),
+            serving_unit=data.get("serving_unit", "g"),
+            data_type=data.get("data_type"),
+            source=data.get("source", USDA_SOURCE),
+            nutrients=array("f", nutrients) if nutrients is not None else None,
+            digest=data.get("digest"),
+            stored_at=stored_at,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dict form (nutrients as a list); stored_at is kept out of band"""
+        return {
+            "fdc_id": self.fdc_id,
+            "description": self.description,
+            "calories_per_100g": self.calories_per_100g,
+            "serving_size": self.serving_size,
+            "serving_unit": self.serving_unit,
+            "data_type": self.data_type,
+            "source": self.source,
+            "nutrients": list(self.nutrients),
+            "digest": self.digest,
+        }
+
+    def __getstate__(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            if slot in ("serving_unit", "data_type", "source"):
+                value = _intern_optional(value)
+            setattr(self, slot, value)
+
+    def estimated_size(self) -> int:
+        """
+        Bytes owned by this record: the object, its unshared strings and the vector
+
+        Interned enumerated fields and small ints are shared, so they are not counted.
+        """
+        getsizeof = sys.getsizeof
+        return (
+            getsizeof(self)
+            + getsizeof(self.description)
+            + getsizeof(self.digest)
+            + getsizeof(self.nutrients)
+            + getsizeof(self.stored_at)
+            + (getsizeof(self.serving_size) if isinstance(self.serving_size, float) else 0)
+            + (getsizeof(self.fdc_id) if self.fdc_id is not None and self.fdc_id > 256 else 0)
+        )
+
+    def __repr__(self):
+        return f"<FoodRecord(fdc_id={self.fdc_id}, description='{self.description}')>"
+
+
+def measure_record_bytes(record: FoodRecord) -> int:
+    """
+    Bytes allocated to build a fresh copy of the record, measured with tracemalloc
+
+    Used in debug mode to validate `estimated_size`. Requires tracemalloc to be tracing.
+    """
+    payload = pickle.dumps(record)
+    before = tracemalloc.get_traced_memory()[0]
+    clone = pickle.loads(payload)
+    size = tracemalloc.get_traced_memory()[0] - before
+    del clone
+    return size
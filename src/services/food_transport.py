@@ -0,0 +1,397 @@
+"""
+Transports that fetch raw USDA `/foods/search` responses for USDAService
+
+- LiveTransport calls the USDA API over a pooled httpx client.
+- RecordingTransport wraps another transport and captures its successful responses
+  into a cassette.
+- ReplayTransport serves a cassette offline, with recorded or injected latency, so
+  performance runs are deterministic but parse realistic payloads.
+
+A cassette is one JSON document (gzip-compressed when the path ends in `.gz`)
+mapping normalized queries to the recorded status, body and latency. Request
+parameters, including the API key, are never stored.
+
+Record a cassette for a list of dishes (one per line):
+    python -m src.services.food_transport dishes.txt --cassette benchmarks/data/usda.json.gz
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Optional
+import logging
+
+from src.services.key_pool import ApiKeyPool, QuotaExhausted
+from src.utils import tracing
+
+logger = logging.getLogger(__name__)
+
+TRANSPORT_LIVE = "live"
+TRANSPORT_RECORD = "record"
+TRANSPORT_REPLAY = "replay"
+
+SEARCH_PAGE_SIZE = 3
+SEARCH_DATA_TYPES = ["Foundation", "SR Legacy", "Branded"]
+
+CASSETTE_VERSION = 1
+
+
+def _search_url(base_url: str) -> str:
+    return f"{base_url.rstrip('/')}/foods/search"
+
+
+class Cassette:
+    """Recorded search responses keyed by normalized query"""
+
+    def __init__(self, path: str, entries: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = entries or {}
+        self.dirty = False
+
+    @staticmethod
+    def key(query: str) -> str:
+        return query.lower().strip()
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        """Read a cassette; a missing file gives an empty one"""
+        if not os.path.exists(path):
+            return cls(path)
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            document = json.load(f)
+        return cls(path, document.get("entries", {}))
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(self.key(query))
+
+    def put(self, query: str, status_code: int, body: Any, elapsed_ms: float) -> None:
+        self.entries[self.key(query)] = {
+            "status": status_code,
+            "elapsed_ms": round(elapsed_ms, 1),
+            "body": body,
+        }
+        self.dirty = True
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Document to save, decoupled from later puts
+
+        Take it on the event loop; `write` can then run in a worker thread.
+        """
+        self.dirty = False
+        return {"version": CASSETTE_VERSION, "entries": dict(self.entries)}
+
+    def write(self, document: Dict[str, Any]) -> None:
+        """Write a snapshot atomically (temp file + rename)"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        opener = gzip.open if self.path.endswith(".gz") else open
+        with opener(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(document, f, separators=(",", ":"), sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def save(self) -> None:
+        """Write the cassette now (blocking)"""
+        self.write(self.snapshot())
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class FoodTransport(ABC):
+    """Fetches the raw search response for a query"""
+
+    kind = "base"
+
+    @abstractmethod
+    async def search(self, query: str, timeout: float):
+        """
+        Run a USDA food search
+
+        Args:
+            query: Food name to search for
+            timeout: Read timeout in seconds
+
+        Returns:
+            httpx.Response (callers use raise_for_status() and json())
+        """
+
+    async def aclose(self) -> None:
+        """Release resources (app shutdown)"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"kind": self.kind}
+
+
+class LiveTransport(FoodTransport):
+    """
+    Calls the USDA API over a pooled AsyncClient (keep-alive connections)
+
+    Each call uses the API key with the most quota left; a 429 is retried with the
+    next best key until every key has been tried. When they all answer 429, the
+    call fails with QuotaExhausted, as when every key is already cooling down.
+    """
+
+    kind = TRANSPORT_LIVE
+
+    def __init__(self, base_url: str, keys: ApiKeyPool, pool_max_connections: int = 20):
+        self.url = _search_url(base_url)
+        self.keys = keys
+        self.pool_max_connections = pool_max_connections
+        self._client = None
+
+    def _get_client(self):
+        """Pooled client, created on first use"""
+        if self._client is None:
+            # Deferred so app startup doesn't pay for httpx until a lookup misses the cache
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(10.0, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.pool_max_connections,
+                    max_keepalive_connections=self.pool_max_connections,
+                ),
+            )
+        return self._client
+
+    async def search(self, query: str, timeout: float):
+        import httpx
+
+        client = self._get_client()
+        for _ in range(len(self.keys)):
+            key = self.keys.acquire()
+            params = {
+                "query": query,
+                "api_key": key.key,
+                "pageSize": SEARCH_PAGE_SIZE,
+                "dataType": SEARCH_DATA_TYPES,
+            }
+            with tracing.span("usda.http", key=key.label) as span:
+                # Lets a traced upstream (or proxy) join this trace
+                traceparent = tracing.current_traceparent()
+                response = await client.get(
+                    self.url,
+                    params=params,
+                    headers={"traceparent": traceparent} if traceparent else None,
+                    timeout=httpx.Timeout(timeout, connect=min(5.0, timeout)),
+                )
+                if span is not None:
+                    span.set("status", response.status_code)
+            self.keys.observe(key, response.status_code, response.headers)
+            if response.status_code != 429:
+                return response
+        raise QuotaExhausted(self.keys.retry_after())
+
+    async def aclose(self) -> None:
+        # The client is bound to the running loop
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class RecordingTransport(FoodTransport):
+    """
+    Passes searches through and records successful responses into a cassette
+
+    Every `save_every` recordings the cassette is saved in a worker thread, one save
+    at a time, so compressing it never blocks the event loop.
+    """
+
+    kind = TRANSPORT_RECORD
+
+    def __init__(self, inner: FoodTransport, cassette: Cassette, save_every: int = 50):
+        self.inner = inner
+        self.cassette = cassette
+        self.save_every = save_every
+        self.recorded = 0
+        self._save_task: Optional[asyncio.Task] = None
+
+    async def search(self, query: str, timeout: float):
+        started = time.perf_counter()
+        response = await self.inner.search(query, timeout)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        # Transient failures (429, 5xx) are not worth replaying
+        if response.is_success:
+            self.cassette.put(query, response.status_code, response.json(), elapsed_ms)
+            self.recorded += 1
+            if self.save_every and self.recorded % self.save_every == 0:
+                # A save still running is not doubled up; later puts stay dirty
+                if self._save_task is None or self._save_task.done():
+                    self._save_task = asyncio.create_task(self._save())
+        return response
+
+    async def _save(self) -> None:
+        try:
+            await asyncio.to_thread(self.cassette.write, self.cassette.snapshot())
+        except OSError as e:
+            self.cassette.dirty = True
+            logger.warning(f"Could not save cassette {self.cassette.path}: {e}")
+
+    async def aclose(self) -> None:
+        if self._save_task is not None:
+            await self._save_task
+        if self.cassette.dirty:
+            await asyncio.to_thread(self.cassette.write, self.cassette.snapshot())
+            logger.info(f"Saved {len(self.cassette)} recorded searches to {self.cassette.path}")
+        await self.inner.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "recorded": self.recorded,
+            "cassette_entries": len(self.cassette),
+        }
+
+
+class ReplayTransport(FoodTransport):
+    """
+    Serves searches from a cassette without touching the network
+
+    Each response is delayed by `latency_ms` (or its recorded latency when None)
+    plus uniform jitter from a seeded generator, so runs are repeatable. Queries not
+    in the cassette get an empty result, like an unknown dish upstream.
+    """
+
+    kind = TRANSPORT_REPLAY
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        latency_ms: Optional[float] = None,
+        jitter_ms: float = 0.0,
+        seed: int = 0,
+        base_url: str = "https://replay.invalid/fdc/v1",
+    ):
+        self.cassette = cassette
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.url = _search_url(base_url)
+        self._random = random.Random(seed)
+        self.hits = 0
+        self.misses = 0
+
+    def _delay(self, entry: Optional[Dict[str, Any]]) -> float:
+        if self.latency_ms is not None:
+            delay_ms = self.latency_ms
+        else:
+            delay_ms = entry["elapsed_ms"] if entry else 0.0
+        if self.jitter_ms:
+            delay_ms += self._random.uniform(0, self.jitter_ms)
+        return delay_ms / 1000
+
+    async def search(self, query: str, timeout: float):
+        import httpx
+
+        entry = self.cassette.get(query)
+        if entry is None:
+            self.misses += 1
+            logger.warning(f"No recorded search for '{query}', replaying an empty result")
+        else:
+            self.hits += 1
+
+        delay = self._delay(entry)
+        request = httpx.Request("GET", self.url, params={"query": query})
+        if delay > timeout:
+            await asyncio.sleep(timeout)
+            raise httpx.ReadTimeout("Replayed response slower than timeout", request=request)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if entry is None:
+            return httpx.Response(200, json={"totalHits": 0, "foods": []}, request=request)
+        return httpx.Response(entry["status"], json=entry["body"], request=request)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "hits": self.hits,
+            "misses": self.misses,
+            "cassette_entries": len(self.cassette),
+        }
+
+
+def create_transport(
+    kind: str,
+    base_url: str,
+    keys: ApiKeyPool,
+    cassette_path: str,
+    pool_max_connections: int = 20,
+    replay_latency_ms: Optional[float] = None,
+    replay_jitter_ms: float = 0.0,
+) -> FoodTransport:
+    """Build the transport named by `kind` (live, record or replay)"""
+    if kind == TRANSPORT_LIVE:
+        return LiveTransport(base_url, keys, pool_max_connections)
+    if kind == TRANSPORT_RECORD:
+        return RecordingTransport(
+            LiveTransport(base_url, keys, pool_max_connections),
+            Cassette.load(cassette_path),
+        )
+    if kind == TRANSPORT_REPLAY:
+        cassette = Cassette.load(cassette_path)
+        if not len(cassette):
+            logger.warning(f"Replay cassette {cassette_path} is missing or empty")
+        return ReplayTransport(cassette, replay_latency_ms, replay_jitter_ms)
+    raise ValueError(f"Unknown USDA transport: {kind!r}")
+
+
+async def record_searches(
+    transport: RecordingTransport, queries: Iterable[str], concurrency: int = 4
+) -> Dict[str, int]:
+    """Search every query once through `transport`, skipping ones already recorded"""
+    semaphore = asyncio.Semaphore(concurrency)
+    report = {"recorded": 0, "skipped": 0, "failed": 0}
+
+    async def record(query: str) -> None:
+        if transport.cassette.get(query) is not None:
+            report["skipped"] += 1
+            return
+        async with semaphore:
+            try:
+                response = await transport.search(query, timeout=10.0)
+                response.raise_for_status()
+                report["recorded"] += 1
+            except Exception as e:
+                report["failed"] += 1
+                logger.warning(f"Recording '{query}' failed: {e}")
+
+    try:
+        await asyncio.gather(*(record(query) for query in dict.fromkeys(queries) if query))
+    finally:
+        await transport.aclose()
+    return report
+
+
+def main() -> None:
+    from src.config.settings import settings
+    from src.services.key_pool import key_pool_from_settings
+
+    parser = argparse.ArgumentParser(description="Record USDA search responses into a cassette")
+    parser.add_argument("dishes_path", help="Text file with one dish name per line")
+    parser.add_argument("--cassette", default=settings.usda_cassette_path)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.dishes_path, encoding="utf-8") as f:
+        queries = [line.strip() for line in f]
+    transport = RecordingTransport(
+        LiveTransport(settings.usda_base_url, key_pool_from_settings()),
+        Cassette.load(args.cassette),
+        save_every=0,
+    )
+    report = asyncio.run(record_searches(transport, queries, args.concurrency))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
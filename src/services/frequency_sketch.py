@@ -0,0 +1,94 @@
+"""
+Approximate query frequency (count-min sketch) for TinyLFU cache admission
+
+Four rows of 16-bit counters, indexed by double hashing of the key; a key's
+frequency is the smallest of its counters, and increments only raise the counters
+holding that minimum (conservative update), which keeps over-counting low. Every
+`sample_size` increments all counters are halved, so popularity decays and dishes
+that were hot last week do not hold their cache slots forever.
+
+The sketch also keeps the top-K keys by estimated frequency, for the popular
+dishes report.
+"""
+
+from array import array
+from typing import Dict, List, Tuple
+
+DEPTH = 4
+MAX_COUNT = 0xFFFF
+
+
+class CountMinSketch:
+    """Compact frequency estimates with periodic aging and a top-K table"""
+
+    def __init__(self, width: int = 16384, sample_size: int = 0, top_k: int = 50):
+        # Power of two, so indexes are a mask instead of a modulo
+        self.width = 1 << max(4, (width - 1).bit_length())
+        self._mask = self.width - 1
+        self._rows = [array("H", bytes(2 * self.width)) for _ in range(DEPTH)]
+        self.sample_size = sample_size or 10 * self.width
+        self.additions = 0
+        self.resets = 0
+        self.top_k = top_k
+        self._top: Dict[str, int] = {}
+        # Lower bound of the smallest count in _top (exact after each replacement)
+        self._top_floor = 0
+
+    def _indexes(self, key: str) -> List[int]:
+        h = hash(key)
+        h1, h2 = h & 0xFFFFFFFF, ((h >> 32) & 0xFFFFFFFF) | 1
+        return [(h1 + i * h2) & self._mask for i in range(DEPTH)]
+
+    def estimate(self, key: str) -> int:
+        """Approximate number of recent increments of `key` (never under-counts)"""
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+
+    def increment(self, key: str) -> int:
+        """Count one occurrence of `key` and return its new estimate"""
+        indexes = self._indexes(key)
+        current = min(row[index] for row, index in zip(self._rows, indexes))
+        if current < MAX_COUNT:
+            for row, index in zip(self._rows, indexes):
+                if row[index] == current:
+                    row[index] = current + 1
+            current += 1
+        self._update_top(key, current)
+
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._age()
+        return current
+
+    def _update_top(self, key: str, count: int) -> None:
+        top = self._top
+        if key in top or len(top) < self.top_k:
+            top[key] = count
+        elif count > self._top_floor:
+            floor_key = min(top, key=top.__getitem__)
+            if count > top[floor_key]:
+                del top[floor_key]
+                top[key] = count
+            self._top_floor = min(top.values())
+
+    def _age(self) -> None:
+        """Halve every counter (and the top-K counts)"""
+        self._rows = [array("H", (count >> 1 for count in row)) for row in self._rows]
+        self.additions //= 2
+        self.resets += 1
+        self._top = {key: count >> 1 for key, count in self._top.items() if count > 1}
+        self._top_floor = min(self._top.values(), default=0)
+
+    def top(self, limit: int = 0) -> List[Tuple[str, int]]:
+        """Most frequent keys with their estimated counts, most frequent first"""
+        ranked = sorted(self._top.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit else ranked
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "width": self.width,
+            "depth": DEPTH,
+            "bytes": sum(row.itemsize * len(row) for row in self._rows),
+            "additions": self.additions,
+            "sample_size": self.sample_size,
+            "resets": self.resets,
+        }
@@ -0,0 +1,217 @@
+"""
+Hedged upstream requests: latency tracking, outbound quota and the hedge itself
+
+If the first attempt has not answered by a percentile of recently observed latency,
+a second identical request is sent and whichever finishes first wins; the other is
+cancelled. Every call's elapsed time is recorded, including calls that fail, time
+out or are cancelled after losing to a hedge (a lower bound of their latency);
+recording only winners would shrink the percentile and hedge ever earlier. Hedges
+are extra upstream calls, so they are only sent while the outbound budget (the
+API key's hourly quota) has tokens to spare and the hedge rate stays under a cap.
+"""
+
+import asyncio
+import threading
+import time
+from array import array
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class LatencyWindow:
+    """Ring buffer of the most recent latencies (seconds)"""
+
+    def __init__(self, size: int = 256):
+        self._samples = array("d", [0.0]) * size
+        self._size = size
+        self._count = 0
+        self._cached: Dict[float, float] = {}
+
+    def __len__(self) -> int:
+        return min(self._count, self._size)
+
+    def record(self, seconds: float) -> None:
+        self._samples[self._count % self._size] = seconds
+        self._count += 1
+        # Percentiles are recomputed at most every 16 samples
+        if self._count % 16 == 0:
+            self._cached.clear()
+
+    def percentile(self, p: float) -> Optional[float]:
+        """p-th percentile (0-100) of the window, None when empty"""
+        n = len(self)
+        if not n:
+            return None
+        value = self._cached.get(p)
+        if value is None:
+            ordered = sorted(self._samples[:n])
+            value = ordered[min(n - 1, int(n * p / 100))]
+            self._cached[p] = value
+        return value
+
+
+class OutboundBudget:
+    """
+    Token bucket for upstream calls (e.g. USDA's 1000 requests/hour per key)
+
+    Every call takes a token when one is available; a call made without a token
+    is counted as over budget. Only optional calls (hedges) are refused.
+    """
+
+    def __init__(self, per_hour: int, reserve: float = 0.1):
+        self.capacity = float(per_hour)
+        self.rate = per_hour / 3600.0
+        # Optional calls may not take the last `reserve` share of the bucket
+        self.reserve = self.capacity * reserve
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.over_budget = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def consume(self) -> None:
+        """Account for a required call"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+            else:
+                self.over_budget += 1
+
+    def try_acquire_optional(self) -> bool:
+        """Take a token for an optional call if the bucket is above its reserve"""
+        with self._lock:
+            self._refill()
+            if self._tokens - 1 >= self.reserve:
+                self._tokens -= 1
+                return True
+            return False
+
+    def sync(self, remaining: int, limit: Optional[int] = None) -> None:
+        """Adopt the upstream's own count (e.g. X-RateLimit-Remaining / -Limit)"""
+        with self._lock:
+            if limit:
+                self.reserve *= limit / self.capacity
+                self.capacity = float(limit)
+                self.rate = limit / 3600.0
+            self._tokens = float(min(remaining, self.capacity))
+            self._updated = time.monotonic()
+
+    @property
+    def remaining(self) -> int:
+        with self._lock:
+            self._refill()
+            return int(self._tokens)
+
+
+class Hedger:
+    """Sends a call, and a hedge for it once the call is slower than usual"""
+
+    def __init__(
+        self,
+        budget: OutboundBudget,
+        enabled: bool = False,
+        percentile: float = 95.0,
+        min_samples: int = 20,
+        max_hedge_ratio: float = 0.1,
+        is_success: Callable[[Any], bool] = lambda result: getattr(result, "status_code", 200) < 500,
+    ):
+        self.budget = budget
+        # Results that may win the race (by default anything but a 5xx response)
+        self.is_success = is_success
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_hedge_ratio = max_hedge_ratio
+        self.latency = LatencyWindow()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedges_skipped = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, None when hedging is off or untrained"""
+        if not self.enabled or len(self.latency) < self.min_samples:
+            return None
+        return self.latency.percentile(self.percentile)
+
+    def _may_hedge(self) -> bool:
+        if self.hedges >= self.max_hedge_ratio * self.requests:
+            return False
+        return self.budget.try_acquire_optional()
+
+    async def _timed(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.perf_counter()
+        try:
+            return await call()
+        finally:
+            # Also on errors and cancellation, so slow calls are not left out
+            self.latency.record(time.perf_counter() - started)
+
+    async def call(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `call`, hedging it with a second identical call when it is slow
+
+        Returns the first successful result (see `is_success`). If the first call to
+        finish fails or returns an unsuccessful result, the other one is still
+        awaited; if both fail, the first unsuccessful result is returned, or else
+        the first error is raised.
+        """
+        self.requests += 1
+        self.budget.consume()
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._timed(call)
+
+        primary = asyncio.create_task(self._timed(call))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            if not self._may_hedge():
+                self.hedges_skipped += 1
+                return await primary
+
+            self.hedges += 1
+            hedge = asyncio.create_task(self._timed(call))
+            pending = {primary, hedge}
+            first_error: Optional[BaseException] = None
+            unsuccessful: Optional[list] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        first_error = first_error or task.exception()
+                    elif self.is_success(task.result()):
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+                    elif unsuccessful is None:
+                        unsuccessful = [task.result()]
+            if unsuccessful is not None:
+                return unsuccessful[0]
+            raise first_error
+        finally:
+            # Also reached when the caller is cancelled (deadline, client disconnect)
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hedge counters, current hedge delay and remaining outbound budget"""
+        delay = self.hedge_delay()
+        return {
+            "enabled": self.enabled,
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedges_skipped": self.hedges_skipped,
+            "hedge_rate": round(self.hedges / self.requests, 4) if self.requests else 0.0,
+            "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None,
+            "latency_samples": len(self.latency),
+            "budget_remaining": self.budget.remaining,
+            "over_budget": self.budget.over_budget,
+        }
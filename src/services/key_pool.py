@@ -0,0 +1,169 @@
+"""
+Pool of USDA API keys with per-key quota scheduling
+
+USDA limits each key to an hourly quota, so cold-lookup throughput scales with the
+number of keys. Every call goes to the key with the most remaining quota; the
+local estimate of each key's quota is replaced by the X-RateLimit-* response
+headers whenever USDA sends them. A key answered with 429 is cooled down (for
+Retry-After, or the configured cooldown) and skipped until it recovers.
+"""
+
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+import logging
+
+from fastapi import HTTPException, status
+
+from src.services.hedging import OutboundBudget
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaExhausted(HTTPException):
+    """Every key is cooling down (503 with Retry-After)"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Food database quota exhausted, retry later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    value = headers.get(name)
+    try:
+        return int(float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+class ApiKey:
+    """One key: its quota estimate, cooldown and usage counters"""
+
+    def __init__(self, key: str, per_hour: int, reserve: float):
+        self.key = key
+        self.budget = OutboundBudget(per_hour, reserve)
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.throttled = 0
+        self.cooldowns = 0
+
+    @property
+    def label(self) -> str:
+        """Masked key for logs and metrics"""
+        return f"...{self.key[-4:]}"
+
+    def cooldown_left(self, now: float) -> float:
+        return max(0.0, self.cooldown_until - now)
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "key": self.label,
+            "remaining": self.budget.remaining,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "cooldowns": self.cooldowns,
+            "cooldown_remaining_s": round(self.cooldown_left(now), 1),
+            "over_budget": self.budget.over_budget,
+        }
+
+
+class ApiKeyPool:
+    """
+    Chooses a key per upstream call by remaining quota
+
+    Also serves as the Hedger's outbound budget: keys are charged per call in
+    acquire(), and the budget view is the total over keys that are not cooling down.
+    """
+
+    def __init__(
+        self,
+        keys: Iterable[str],
+        per_hour: int = 1000,
+        cooldown: float = 60.0,
+        reserve: float = 0.1,
+    ):
+        unique = list(dict.fromkeys(key for key in keys if key))
+        if not unique:
+            raise ValueError("At least one USDA API key is required")
+        self.keys: List[ApiKey] = [ApiKey(key, per_hour, reserve) for key in unique]
+        self.cooldown = cooldown
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _available(self, now: float) -> List[ApiKey]:
+        return [key for key in self.keys if key.cooldown_until <= now]
+
+    def acquire(self) -> ApiKey:
+        """
+        Take the key with the most remaining quota for one call
+
+        Raises:
+            QuotaExhausted: If every key is cooling down
+        """
+        available = self._available(time.monotonic())
+        if not available:
+            raise QuotaExhausted(self.retry_after())
+        key = max(available, key=lambda candidate: candidate.budget.remaining)
+        key.requests += 1
+        key.budget.consume()
+        return key
+
+    def retry_after(self) -> int:
+        """Whole seconds until the first key's cooldown ends (at least 1)"""
+        now = time.monotonic()
+        return max(1, int(min(key.cooldown_left(now) for key in self.keys) + 0.999))
+
+    def observe(self, key: ApiKey, status_code: int, headers: Mapping[str, str]) -> None:
+        """Update a key from the response to a call made with it"""
+        remaining = _header_int(headers, "x-ratelimit-remaining")
+        if remaining is not None:
+            key.budget.sync(remaining, _header_int(headers, "x-ratelimit-limit"))
+
+        if status_code == 429:
+            now = time.monotonic()
+            key.throttled += 1
+            retry_after = _header_int(headers, "retry-after")
+            cooldown = retry_after if retry_after is not None else self.cooldown
+            if key.cooldown_until <= now:
+                key.cooldowns += 1
+                logger.warning(f"USDA key {key.label} throttled, cooling down for {cooldown}s")
+            key.cooldown_until = max(key.cooldown_until, now + cooldown)
+            key.budget.sync(0)
+
+    # Hedger budget interface
+
+    def consume(self) -> None:
+        """A required call is about to be made (charged to its key in acquire())"""
+
+    def try_acquire_optional(self) -> bool:
+        """Whether an optional call (hedge) fits above the keys' reserves"""
+        available = self._available(time.monotonic())
+        headroom = sum(key.budget.remaining - key.budget.reserve for key in available)
+        return headroom >= 1
+
+    @property
+    def remaining(self) -> int:
+        return sum(key.budget.remaining for key in self._available(time.monotonic()))
+
+    @property
+    def over_budget(self) -> int:
+        return sum(key.budget.over_budget for key in self.keys)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [key.stats(now) for key in self.keys]
+
+
+def key_pool_from_settings() -> ApiKeyPool:
+    """Pool of USDA_API_KEY plus the comma-separated USDA_API_KEYS"""
+    from src.config.settings import settings
+
+    extra = [key.strip() for key in settings.usda_api_keys.split(",")]
+    return ApiKeyPool(
+        [settings.usda_api_key, *extra],
+        per_hour=settings.usda_quota_per_hour,
+        cooldown=settings.usda_key_cooldown,
+    )
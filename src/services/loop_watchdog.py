@@ -0,0 +1,168 @@
+"""
+Event-loop lag watchdog
+
+A heartbeat task sleeps for a fixed interval and records how late it wakes up:
+that delay is the scheduling lag every request on the loop is paying. A separate
+thread watches the heartbeat; when the loop has not come back for longer than the
+threshold, it captures the loop thread's stack while the blocking call is still
+on it and logs it together with the route being served (found from the ASGI
+`scope` of the frames on that stack).
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+import logging
+
+from src.services.hedging import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+# Frames under this directory are ours; the innermost one is reported as the culprit
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STACK_LIMIT = 40
+
+
+def _route_from_frame(frame) -> Optional[str]:
+    """'METHOD /path' from the first ASGI HTTP scope found walking outwards"""
+    while frame is not None:
+        scope = frame.f_locals.get("scope")
+        if isinstance(scope, dict) and scope.get("type") == "http":
+            return f"{scope.get('method', '')} {scope.get('path', '')}".strip()
+        frame = frame.f_back
+    return None
+
+
+def _app_location(frame) -> Optional[str]:
+    """'file:line in function' of the innermost frame in project code"""
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(PROJECT_ROOT) and "site-packages" not in filename:
+            relative = os.path.relpath(filename, PROJECT_ROOT)
+            return f"{relative}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+class LoopWatchdog:
+    """Measures event-loop lag and reports what blocked the loop"""
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25, max_reports: int = 10):
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = LatencyWindow()
+        self.max_lag = 0.0
+        self.stalls = 0
+        self.reports: Deque[Dict[str, Any]] = deque(maxlen=max_reports)
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = 0.0
+        self._stall_reported = False
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the heartbeat and the watcher thread (call from the event loop)"""
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self.lag.record(lag)
+            self.max_lag = max(self.max_lag, lag)
+            self._last_beat = now
+            self._stall_reported = False
+
+    def _watch(self) -> None:
+        poll = min(self.interval, self.threshold) / 2
+        while not self._stop.wait(poll):
+            # Lag so far of the heartbeat that is due now
+            stalled = time.monotonic() - self._last_beat - self.interval
+            if stalled > self.threshold and not self._stall_reported:
+                self._stall_reported = True
+                self._report(stalled)
+
+    def _report(self, stalled: float) -> None:
+        """Capture and log the loop thread's stack while it is still blocked"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        self.stalls += 1
+        route = _route_from_frame(frame)
+        location = _app_location(frame)
+        stack = "".join(traceback.format_stack(frame, limit=STACK_LIMIT))
+        self.reports.append({
+            "at": time.time(),
+            "lag_ms": round(stalled * 1000, 1),
+            "route": route,
+            "location": location,
+        })
+        logger.warning(
+            f"Event loop blocked for {stalled * 1000:.0f} ms+ "
+            f"(route: {route or 'none'}, at: {location or 'unknown'})\n{stack}"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Lag percentiles over the recent window, stall count and latest stalls"""
+
+        def ms(seconds: Optional[float]) -> Optional[float]:
+            return round(seconds * 1000, 2) if seconds is not None else None
+
+        return {
+            "enabled": self.running,
+            "lag_p50_ms": ms(self.lag.percentile(50)),
+            "lag_p99_ms": ms(self.lag.percentile(99)),
+            "lag_max_ms": ms(self.max_lag),
+            "threshold_ms": ms(self.threshold),
+            "stalls": self.stalls,
+            "recent_stalls": list(self.reports),
+        }
+
+
+_loop_watchdog: Optional[LoopWatchdog] = None
+
+
+def create_loop_watchdog() -> LoopWatchdog:
+    """Create the process-wide watchdog from settings (app startup)"""
+    from src.config.settings import settings
+
+    global _loop_watchdog
+    _loop_watchdog = LoopWatchdog(
+        interval=settings.loop_watchdog_interval,
+        threshold=settings.loop_watchdog_threshold,
+    )
+    return _loop_watchdog
+
+
+def get_loop_watchdog() -> LoopWatchdog:
+    """Get the process-wide watchdog (not started unless enabled in settings)"""
+    if _loop_watchdog is None:
+        return create_loop_watchdog()
+    return _loop_watchdog
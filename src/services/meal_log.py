@@ -0,0 +1,119 @@
+"""
+Write-behind buffer for meal logs
+
+Logged meals are queued in memory and written in batches: one multi-row INSERT of
+the raw rows plus one multi-row upsert that increments the per-user per-day rollups,
+in a single transaction. Pending rollup deltas, rejected rows and failed flushes are
+handled by WriteBehindBuffer (see src/services/write_behind.py).
+"""
+
+from typing import List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from src.models.meal_log import DailyRollup, MealLog
+from src.services.write_behind import Deltas, WriteBehindBuffer, add_deltas, upsert_increments
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Summed rollup columns, in the order deltas are kept
+ROLLUP_FIELDS = ("calories", "protein", "fat", "carbohydrates", "entries")
+
+
+def _row_delta(row: dict) -> List[float]:
+    return [row.get(field) or 0 for field in ROLLUP_FIELDS[:-1]] + [1]
+
+
+class MealLogBuffer(WriteBehindBuffer[dict]):
+    """In-process queue of meal logs flushed in batches"""
+
+    label = "Meal log"
+
+    def __init__(self, batch_size: int = 500, max_pending: int = 10_000):
+        super().__init__()
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._rows: List[dict] = []
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, row: dict) -> bool:
+        """
+        Queue a meal log row
+
+        Args:
+            row: MealLog column values (user_id, day, calories, ...)
+
+        Returns:
+            True when a full batch is waiting and the caller should flush
+
+        Raises:
+            OverflowError: If max_pending rows are already queued (flushes are failing)
+        """
+        delta = _row_delta(row)
+        with self._lock:
+            if len(self._rows) >= self.max_pending:
+                raise OverflowError("Meal log buffer is full")
+            self._rows.append(row)
+            add_deltas(self._deltas, {(row["user_id"], row["day"]): delta})
+            return len(self._rows) >= self.batch_size
+
+    def _take_items_locked(self) -> List[dict]:
+        rows, self._rows = self._rows, []
+        return rows
+
+    def _requeue_items_locked(self, items: List[dict]) -> None:
+        self._rows[:0] = items
+
+    def _deltas_of(self, items: List[dict]) -> Deltas:
+        deltas: Deltas = {}
+        for row in items:
+            add_deltas(deltas, {(row["user_id"], row["day"]): _row_delta(row)})
+        return deltas
+
+    def _is_empty(self, delta: List[float]) -> bool:
+        # The entry count is exact; float sums may leave residue once it is zero
+        return delta[-1] <= 0
+
+    def _describe(self, item: dict) -> str:
+        return f"meal log row {item}"
+
+    def _execute(self, db: Session, items: List[dict], deltas: Deltas) -> None:
+        """Insert rows and increment their rollups"""
+        # Multi-row INSERT ... VALUES, at most batch_size rows per statement
+        for i in range(0, len(items), self.batch_size):
+            db.execute(insert(MealLog).values(items[i:i + self.batch_size]))
+        upsert_increments(db, DailyRollup, ROLLUP_FIELDS, deltas)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self),
+            "flushed_rows": self.flushed,
+            "failed_flushes": self.failed_flushes,
+            "dropped_rows": self.dropped,
+        }
+
+
+_meal_log_buffer: Optional[MealLogBuffer] = None
+
+
+def create_meal_log_buffer() -> MealLogBuffer:
+    """Create the process-wide meal log buffer from settings (app startup)"""
+    from src.config.settings import settings
+
+    global _meal_log_buffer
+    _meal_log_buffer = MealLogBuffer(
+        batch_size=settings.meal_log_batch_size,
+        max_pending=settings.meal_log_max_pending,
+    )
+    return _meal_log_buffer
+
+
+def get_meal_log_buffer() -> MealLogBuffer:
+    """Get the process-wide meal log buffer"""
+    if _meal_log_buffer is None:
+        return create_meal_log_buffer()
+    return _meal_log_buffer
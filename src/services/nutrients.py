@@ -0,0 +1,83 @@
+"""
+Compact nutrient vectors for cached food records
+
+Every food keeps its nutrients as one float32 array in a fixed column layout
+(NUTRIENT_COLUMNS) instead of a per-food dict, so any subset of nutrients for N
+servings is a single pass over column indices.
+"""
+
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# (name, USDA nutrient ID, unit) - column order of every nutrient vector
+NUTRIENT_COLUMNS: Tuple[Tuple[str, int, str], ...] = (
+    ("calories", 1008, "kcal"),
+    ("protein", 1003, "g"),
+    ("fat", 1004, "g"),
+    ("carbohydrates", 1005, "g"),
+    ("fiber", 1079, "g"),
+    ("sugars", 2000, "g"),
+    ("saturated_fat", 1258, "g"),
+    ("cholesterol", 1253, "mg"),
+    ("sodium", 1093, "mg"),
+)
+
+NUTRIENT_NAMES: Tuple[str, ...] = tuple(name for name, _, _ in NUTRIENT_COLUMNS)
+NUTRIENT_UNITS: Dict[str, str] = {name: unit for name, _, unit in NUTRIENT_COLUMNS}
+_COLUMN_BY_NAME: Dict[str, int] = {name: i for i, name in enumerate(NUTRIENT_NAMES)}
+_COLUMN_BY_ID: Dict[int, int] = {nid: i for i, (_, nid, _) in enumerate(NUTRIENT_COLUMNS)}
+
+MISSING = float("nan")
+
+
+def extract_nutrient_vector(food: dict) -> array:
+    """
+    Build the nutrient vector (per 100g) for a USDA search result
+
+    Single pass over `foodNutrients`; nutrients USDA didn't report stay NaN.
+    """
+    vector = array("f", [MISSING]) * len(NUTRIENT_COLUMNS)
+    for nutrient in food.get("foodNutrients", []):
+        column = _COLUMN_BY_ID.get(nutrient.get("nutrientId"))
+        if column is not None:
+            value = nutrient.get("value")
+            if value is not None:
+                vector[column] = value
+    return vector
+
+
+def nutrient_columns(names: Optional[Iterable[str]] = None) -> List[int]:
+    """Column indices for the requested nutrient names (all when None)"""
+    if names is None:
+        return list(range(len(NUTRIENT_COLUMNS)))
+    return [_COLUMN_BY_NAME[name] for name in names]
+
+
+def scale_nutrients(
+    vector: array, columns: List[int], serving_size_g: float, servings: int
+) -> Tuple[Dict[str, Optional[float]], Dict[str, Optional[float]]]:
+    """
+    Per-serving and total amounts for the selected columns in one pass
+
+    Args:
+        vector: Nutrient vector per 100g
+        columns: Column indices to include
+        serving_size_g: Serving size in grams
+        servings: Number of servings
+
+    Returns:
+        (per_serving, total) dicts keyed by nutrient name; missing nutrients are None
+    """
+    factor = serving_size_g / 100
+    size = len(vector)
+    per_serving, total = {}, {}
+    for column in columns:
+        value = vector[column] if column < size else MISSING
+        name = NUTRIENT_NAMES[column]
+        if value != value:  # NaN: not reported by USDA
+            per_serving[name] = total[name] = None
+        else:
+            amount = value * factor
+            per_serving[name] = round(amount, 2)
+            total[name] = round(amount * servings, 2)
+    return per_serving, total
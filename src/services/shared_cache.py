@@ -0,0 +1,155 @@
+"""
+Memory-mapped food cache shared by all worker processes on a host
+
+Fixed-size open-addressing table in a file (ideally under /dev/shm). Readers are
+lock-free and validate each slot with a per-slot sequence counter (seqlock); writers
+serialize on an flock, which is fine because writes only happen on cache misses.
+flock belongs to the open file, so threads of one process (background publishes)
+also take a thread lock first.
+"""
+
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CALCACHE"
+VERSION = 1
+# magic, version, slot count, slot size
+_HEADER = struct.Struct("<8sIII")
+HEADER_SIZE = 64
+# seq (odd while being written), key hash (0 = empty), stored_at (epoch), payload length
+_SLOT = struct.Struct("<IQdI")
+PROBE_LIMIT = 4
+
+
+def _key_hash(key: str) -> int:
+    """Non-zero 64-bit hash that is stable across processes (unlike hash())"""
+    value = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+    return value or 1
+
+
+class SharedFoodCache:
+    """Cross-process cache of food lookup results keyed by cache key"""
+
+    def __init__(self, path: str, slots: int = 65536, slot_size: int = 512):
+        self.path = path
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                self.slots, self.slot_size = self._init_file(fd, slots, slot_size)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self._map = mmap.mmap(fd, HEADER_SIZE + self.slots * self.slot_size)
+        except Exception:
+            os.close(fd)
+            raise
+        self._fd = fd
+        # flock does not exclude threads sharing self._fd
+        self._write_lock = threading.Lock()
+        self._max_payload = self.slot_size - _SLOT.size
+        logger.info(
+            f"Shared food cache at {path}: {self.slots} slots x {self.slot_size} bytes"
+        )
+
+    @staticmethod
+    def _init_file(fd: int, slots: int, slot_size: int) -> Tuple[int, int]:
+        """Write the header for a new file, or adopt the geometry of an existing one"""
+        header = os.pread(fd, _HEADER.size, 0)
+        if len(header) == _HEADER.size:
+            magic, version, existing_slots, existing_size = _HEADER.unpack(header)
+            if magic == MAGIC and version == VERSION:
+                return existing_slots, existing_size
+
+        os.ftruncate(fd, HEADER_SIZE + slots * slot_size)
+        os.pwrite(fd, _HEADER.pack(MAGIC, VERSION, slots, slot_size), 0)
+        return slots, slot_size
+
+    def _offset(self, index: int) -> int:
+        return HEADER_SIZE + index * self.slot_size
+
+    def _probe(self, key_hash: int):
+        start = key_hash % self.slots
+        for i in range(min(PROBE_LIMIT, self.slots)):
+            yield (start + i) % self.slots
+
+    def get(self, key: str, ttl: float) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Look up a key
+
+        Returns:
+            (data, stored_at) if present and younger than `ttl`, else None
+        """
+        key_hash = _key_hash(key)
+        for index in self._probe(key_hash):
+            offset = self._offset(index)
+            seq, slot_hash, stored_at, length = _SLOT.unpack_from(self._map, offset)
+            if slot_hash == 0:
+                return None
+            if slot_hash != key_hash or seq & 1:
+                continue
+            payload = self._map[offset + _SLOT.size: offset + _SLOT.size + length]
+            # Slot was rewritten while we were reading it: treat as a miss
+            if _SLOT.unpack_from(self._map, offset)[0] != seq:
+                return None
+            if time.time() - stored_at >= ttl:
+                return None
+            try:
+                entry = json.loads(payload)
+            except ValueError:
+                return None
+            if entry.get("k") != key:
+                continue
+            return entry["v"], stored_at
+        return None
+
+    def set(self, key: str, data: Dict[str, Any]) -> bool:
+        """Store a value; returns False if it doesn't fit in a slot"""
+        # default=list serializes array-backed fields such as nutrient vectors
+        payload = json.dumps(
+            {"k": key, "v": data}, separators=(",", ":"), default=list
+        ).encode()
+        if len(payload) > self._max_payload:
+            logger.debug(f"Shared cache payload too large for {key}: {len(payload)} bytes")
+            return False
+
+        key_hash = _key_hash(key)
+        with self._write_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                target, oldest = None, None
+                for index in self._probe(key_hash):
+                    offset = self._offset(index)
+                    _, slot_hash, stored_at, _ = _SLOT.unpack_from(self._map, offset)
+                    if slot_hash in (0, key_hash):
+                        target = index
+                        break
+                    if oldest is None or stored_at < oldest[1]:
+                        oldest = (index, stored_at)
+                if target is None:
+                    target = oldest[0]  # evict the oldest entry in the probe window
+
+                offset = self._offset(target)
+                seq = _SLOT.unpack_from(self._map, offset)[0]
+                writing, done = (seq + 1) & 0xFFFFFFFF, (seq + 2) & 0xFFFFFFFF
+                struct.pack_into("<I", self._map, offset, writing)
+                self._map[offset + _SLOT.size: offset + _SLOT.size + len(payload)] = payload
+                _SLOT.pack_into(self._map, offset, writing, key_hash, time.time(), len(payload))
+                struct.pack_into("<I", self._map, offset, done)
+                return True
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        """Unmap the table and close the file"""
+        self._map.close()
+        os.close(self._fd)
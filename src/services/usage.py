@@ -0,0 +1,114 @@
+"""
+Per-user usage metering with in-memory counters
+
+Every completed dish lookup increments a per-user per-day counter in this worker's
+memory (one dict update, no I/O). A background task adds the counters to the
+usage table every flush interval with a multi-row upsert, so a crash loses at most
+one interval of counts. The number of pending (user, day) counters is bounded:
+while flushes keep failing, lookups of users without a counter yet are not counted
+(and logged) rather than growing memory without limit. Pending counts, rejected
+counters and failed flushes are handled by WriteBehindBuffer (see
+src/services/write_behind.py).
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.models.usage import UsageCounter
+from src.services.write_behind import DeltaKey, Deltas, WriteBehindBuffer, upsert_increments
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Counter columns, in the order counts are kept
+USAGE_FIELDS = ("lookups", "upstream_misses")
+
+UsageItem = Tuple[DeltaKey, List[float]]
+
+
+class UsageMeter(WriteBehindBuffer[UsageItem]):
+    """In-process usage counters, flushed with batched upserts"""
+
+    label = "Usage"
+
+    def __init__(self, max_pending_keys: int = 100_000):
+        super().__init__()
+        self.max_pending_keys = max_pending_keys
+        self.dropped_lookups = 0
+        self._overflow_logged = False
+
+    def record(self, user_id: int, lookups: int = 1, upstream_misses: int = 0) -> None:
+        """Count lookups made by a user today (UTC)"""
+        key = (user_id, datetime.now(timezone.utc).date())
+        with self._lock:
+            counts = self._deltas.get(key)
+            if counts is not None:
+                counts[0] += lookups
+                counts[1] += upstream_misses
+                return
+            if len(self._deltas) < self.max_pending_keys:
+                self._deltas[key] = [lookups, upstream_misses]
+                return
+            self.dropped_lookups += lookups
+            log_overflow = not self._overflow_logged
+            self._overflow_logged = True
+        if log_overflow:
+            logger.error(
+                f"Usage meter holds {self.max_pending_keys} unflushed counters; "
+                "lookups of further users are not counted until a flush succeeds"
+            )
+
+    # The pending counters are the items themselves
+
+    def _take_items_locked(self) -> List[UsageItem]:
+        return [(key, list(counts)) for key, counts in self._deltas.items()]
+
+    def _requeue_items_locked(self, items: List[UsageItem]) -> None:
+        pass
+
+    def _deltas_of(self, items: List[UsageItem]) -> Deltas:
+        return {key: list(counts) for key, counts in items}
+
+    def _describe(self, item: UsageItem) -> str:
+        (user_id, day), counts = item
+        return f"usage of user {user_id} on {day} {counts}"
+
+    def _execute(self, db: Session, items: List[UsageItem], deltas: Deltas) -> None:
+        upsert_increments(db, UsageCounter, USAGE_FIELDS, deltas)
+
+    def flush(self, db: Session, blocking: bool = False) -> int:
+        written = super().flush(db, blocking)
+        if written:
+            self._overflow_logged = False
+        return written
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_keys": len(self),
+            "max_pending_keys": self.max_pending_keys,
+            "flushed_keys": self.flushed,
+            "failed_flushes": self.failed_flushes,
+            "dropped_keys": self.dropped,
+            "dropped_lookups": self.dropped_lookups,
+        }
+
+
+_usage_meter: Optional[UsageMeter] = None
+
+
+def create_usage_meter() -> UsageMeter:
+    """Create the process-wide usage meter from settings (app startup)"""
+    from src.config.settings import settings
+
+    global _usage_meter
+    _usage_meter = UsageMeter(max_pending_keys=settings.usage_max_pending_keys)
+    return _usage_meter
+
+
+def get_usage_meter() -> UsageMeter:
+    """Get the process-wide usage meter"""
+    if _usage_meter is None:
+        return create_usage_meter()
+    return _usage_meter
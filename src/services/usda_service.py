@@ -3,10 +3,25 @@ USDA FoodData Central API service for calorie lookup
 """
 
 import asyncio
-import httpx
+import sys
 import time
-from typing import Optional, Dict, Any
+import tracemalloc
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Iterable, List, Set, Tuple, Union
 from fastapi import HTTPException
+from src.services.background import PRIORITY_LOW, get_background_runner
+from src.services.food_index import FoodSuggestionIndex
+from src.services.frequency_sketch import CountMinSketch
+from src.services.food_transport import FoodTransport, create_transport
+from src.services.hedging import Hedger
+from src.services.key_pool import ApiKeyPool, key_pool_from_settings
+from src.utils import deadline, tracing
+from src.utils.deadline import DeadlineExceeded
+from src.services.food_record import (
+    INDEX_OVERHEAD_BYTES,
+    FoodRecord,
+    measure_record_bytes,
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,12 +33,68 @@ class USDAService:
     def __init__(self):
         from src.config.settings import settings
 
-        self.api_key = settings.usda_api_key
-        self.base_url = "https://api.nal.usda.gov/fdc/v1"
+        self.base_url = settings.usda_base_url.rstrip("/")
         
-        # Simple in-memory cache with TTL
-        self._cache = {}
+        # In-memory LRU cache with TTL, bounded by accounted bytes
+        self._cache: "OrderedDict[str, FoodRecord]" = OrderedDict()
         self._cache_ttl = settings.cache_ttl  # seconds
+        self._cache_max_bytes = settings.cache_max_bytes  # 0 = unbounded
+        self._cache_bytes = 0
+        # TinyLFU admission: when full, a new entry only displaces the LRU entry if
+        # its query has been asked for more often recently
+        self.frequency = CountMinSketch(
+            settings.cache_sketch_width, top_k=settings.popular_dishes_top_k
+        )
+        self._admission = settings.cache_admission_enabled
+        self.admission_rejected = 0
+        # Entries older than this share of the TTL are refreshed in the background
+        self._refresh_ahead = settings.cache_refresh_ahead  # 0 = disabled
+        self._refreshing: Set[str] = set()
+
+        # Debug mode measures entry sizes with tracemalloc instead of estimating them
+        self._memory_debug = settings.cache_memory_debug
+        self._measured_sizes: Dict[str, int] = {}
+        if self._memory_debug and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        # API keys, each with its own hourly quota; also the hedger's outbound budget
+        self.key_pool: ApiKeyPool = key_pool_from_settings()
+
+        # Where searches go: the live API, live + recording, or a recorded cassette
+        self.transport: FoodTransport = create_transport(
+            settings.usda_transport,
+            base_url=self.base_url,
+            keys=self.key_pool,
+            cassette_path=settings.usda_cassette_path,
+            pool_max_connections=settings.usda_pool_max_connections,
+            replay_latency_ms=settings.usda_replay_latency_ms,
+            replay_jitter_ms=settings.usda_replay_jitter_ms,
+        )
+        self.cancelled_lookups = 0
+        self.hedger = Hedger(
+            self.key_pool,
+            enabled=settings.usda_hedge_enabled,
+            percentile=settings.usda_hedge_percentile,
+            min_samples=settings.usda_hedge_min_samples,
+            max_hedge_ratio=settings.usda_hedge_max_ratio,
+        )
+
+        # Autocomplete index of names this service has resolved
+        self.suggestions = FoodSuggestionIndex(settings.suggest_max_entries)
+
+        # Optional host-wide cache shared with the other worker processes
+        self._shared_cache = None
+        if settings.shared_cache_path:
+            from src.services.shared_cache import SharedFoodCache
+
+            try:
+                self._shared_cache = SharedFoodCache(
+                    settings.shared_cache_path,
+                    slots=settings.shared_cache_slots,
+                    slot_size=settings.shared_cache_slot_size,
+                )
+            except OSError as e:
+                logger.warning(f"Shared food cache unavailable, using local cache only: {e}")
 
     def _get_cache_key(self, query: str) -> str:
         """Generate cache key for query"""
@@ -32,28 +103,205 @@ class USDAService:
     def _is_cache_valid(self, timestamp: float) -> bool:
         """Check if cache entry is still valid"""
         return time.time() - timestamp < self._cache_ttl
+
+    def _entry_bytes(self, cache_key: str, record: FoodRecord) -> int:
+        """Accounted size of one cache entry (record + key + index slot)"""
+        measured = self._measured_sizes.get(cache_key)
+        record_bytes = measured if measured is not None else record.estimated_size()
+        return record_bytes + sys.getsizeof(cache_key) + INDEX_OVERHEAD_BYTES
+
+    def _remove_entry(self, cache_key: str) -> None:
+        record = self._cache.pop(cache_key)
+        self._cache_bytes -= self._entry_bytes(cache_key, record)
+        self._measured_sizes.pop(cache_key, None)
+
+    def _admit(self, cache_key: str, entry_bytes: int) -> bool:
+        """
+        Make room for a new entry, or refuse it (TinyLFU)
+
+        Each least recently used entry that has to go is compared with the
+        candidate; the candidate is refused unless it is the more frequent query.
+        Nothing is evicted until the candidate has beaten all of them.
+        """
+        needed = self._cache_bytes + entry_bytes - self._cache_max_bytes
+        candidate = self.frequency.estimate(cache_key)
+        victims = []
+        for victim, record in self._cache.items():
+            if needed <= 0:
+                break
+            if candidate <= self.frequency.estimate(victim):
+                self.admission_rejected += 1
+                return False
+            victims.append(victim)
+            needed -= self._entry_bytes(victim, record)
+        for victim in victims:
+            self._remove_entry(victim)
+        return True
+
+    def _store_entry(self, cache_key: str, record: FoodRecord) -> bool:
+        """
+        Insert a record and evict least recently used entries over the byte limit
+
+        Returns:
+            False if admission refused a new entry (the cache is left unchanged)
+        """
+        replacing = cache_key in self._cache
+        if replacing:
+            self._remove_entry(cache_key)
+        if self._memory_debug:
+            self._measured_sizes[cache_key] = measure_record_bytes(record)
+        if not replacing and self._admission and self._cache_max_bytes:
+            if not self._admit(cache_key, self._entry_bytes(cache_key, record)):
+                self._measured_sizes.pop(cache_key, None)
+                return False
+        self._cache[cache_key] = record
+        self._cache_bytes += self._entry_bytes(cache_key, record)
+
+        while (
+            self._cache_max_bytes
+            and self._cache_bytes > self._cache_max_bytes
+            and len(self._cache) > 1
+        ):
+            self._remove_entry(next(iter(self._cache)))
+        return True
     
-    def _get_from_cache(self, query: str) -> Optional[Dict[str, Any]]:
+    def _get_from_cache(self, query: str) -> Optional[FoodRecord]:
         """Get cached result if valid"""
         cache_key = self._get_cache_key(query)
-        if cache_key in self._cache:
-            data, timestamp = self._cache[cache_key]
-            if self._is_cache_valid(timestamp):
+        record = self._cache.get(cache_key)
+        if record is not None:
+            if self._is_cache_valid(record.stored_at):
+                self._cache.move_to_end(cache_key)
+                self.suggestions.touch(query)
                 logger.info(f"Cache hit for query: {query}")
-                return data
+                if (
+                    self._refresh_ahead
+                    and time.time() - record.stored_at > self._cache_ttl * self._refresh_ahead
+                ):
+                    self._schedule_refresh(query)
+                return record
             else:
                 # Remove expired cache entry
-                del self._cache[cache_key]
+                self._remove_entry(cache_key)
                 logger.info(f"Cache expired for query: {query}")
+
+        if self._shared_cache is not None:
+            shared = self._shared_cache.get(cache_key, self._cache_ttl)
+            if shared is not None:
+                # Keep the original timestamp so the entry expires everywhere at once
+                record = FoodRecord.from_dict(shared[0], stored_at=shared[1])
+                self._store_entry(cache_key, record)
+                self._learn_names(query, record)
+                logger.info(f"Shared cache hit for query: {query}")
+                return record
         return None
     
-    def _set_cache(self, query: str, data: Dict[str, Any]) -> None:
+    def _set_cache(self, query: str, data: Union[FoodRecord, Dict[str, Any]]) -> None:
         """Cache the result"""
         cache_key = self._get_cache_key(query)
-        self._cache[cache_key] = (data, time.time())
-        logger.info(f"Cached result for query: {query}")
+        record = data if isinstance(data, FoodRecord) else FoodRecord.from_dict(data)
+        record.stored_at = time.time()
+        admitted = self._store_entry(cache_key, record)
+        self._learn_names(query, record)
+        if self._shared_cache is not None:
+            # Serializing and writing the mmap slot (under a file lock) is off the
+            # request path when the background runner is up
+            runner = get_background_runner()
+            if runner.running:
+                runner.submit(
+                    self._shared_cache.set, cache_key, record.to_dict(),
+                    priority=PRIORITY_LOW, name="shared-cache-publish",
+                )
+            else:
+                self._shared_cache.set(cache_key, record.to_dict())
+        if admitted:
+            logger.info(f"Cached result for query: {query}")
+        else:
+            logger.info(f"Not caching result for infrequent query: {query}")
+
+    def _schedule_refresh(self, query: str) -> bool:
+        """Re-fetch a query in the background unless a refresh is already queued"""
+        cache_key = self._get_cache_key(query)
+        if cache_key in self._refreshing:
+            return False
+        if get_background_runner().submit(
+            self._refresh, query, priority=PRIORITY_LOW, name="cache-refresh",
+            # Displaced or abandoned before running: allow a later refresh
+            on_discard=lambda: self._refreshing.discard(cache_key),
+        ):
+            self._refreshing.add(cache_key)
+            return True
+        return False
+
+    async def _refresh(self, query: str) -> None:
+        """Background job: fetch a query from USDA and replace its cache entry"""
+        try:
+            await self._fetch_and_cache(query)
+        except HTTPException as e:
+            logger.warning(f"Background refresh of '{query}' failed: {e.detail}")
+        finally:
+            self._refreshing.discard(self._get_cache_key(query))
 
-    async def search_food(self, query: str) -> Optional[Dict[str, Any]]:
+    def schedule_warmup(self, queries: Iterable[str]) -> int:
+        """
+        Queue background lookups for dishes not cached yet (app startup)
+
+        Returns:
+            Number of lookups queued
+        """
+        return sum(
+            1 for query in queries
+            if query and self._get_from_cache(query) is None and self._schedule_refresh(query)
+        )
+
+    def _learn_names(self, query: str, record: FoodRecord) -> None:
+        """Make the query and the resolved description available to autocomplete"""
+        self.suggestions.learn(query, record.data_type)
+        self.suggestions.learn(record.description, record.data_type)
+
+    def peek_cache(self, query: str) -> Optional[FoodRecord]:
+        """
+        Return the cached result for a query without calling USDA
+
+        This is where user lookups are counted for cache admission and the popular
+        dishes report (background refreshes and warm-up are not counted).
+        """
+        with tracing.span("usda.cache_lookup") as span:
+            self.frequency.increment(self._get_cache_key(query))
+            record = self._get_from_cache(query)
+            if span is not None:
+                span.set("hit", record is not None)
+            return record
+
+    def popular_dishes(self, limit: int = 0) -> List[Tuple[str, int]]:
+        """Most looked-up queries with their estimated recent lookup counts"""
+        prefix = len(self._get_cache_key(""))
+        return [(key[prefix:], count) for key, count in self.frequency.top(limit)]
+
+    def cache_memory_stats(self) -> Dict[str, Any]:
+        """
+        Memory accounting for the local cache
+
+        Returns:
+            Entry count, total and per-entry bytes, the configured byte limit,
+            whether sizes are estimated or measured with tracemalloc, and
+            admission counters
+        """
+        entries = len(self._cache)
+        return {
+            "entries": entries,
+            "total_bytes": self._cache_bytes,
+            "bytes_per_entry": round(self._cache_bytes / entries, 1) if entries else 0,
+            "max_bytes": self._cache_max_bytes,
+            "mode": "tracemalloc" if self._memory_debug else "estimate",
+            "admission": {
+                "enabled": self._admission,
+                "rejected": self.admission_rejected,
+                "sketch": self.frequency.stats(),
+            },
+        }
+
+    async def search_food(self, query: str) -> Optional[FoodRecord]:
         """
         Search for food items and return the best match with calorie data
         Uses caching to improve performance and reduce API calls.
@@ -62,38 +310,60 @@ class USDAService:
             query: Food name to search for
 
         Returns:
-            Dictionary with food data including calories, or None if not found
+            FoodRecord with calories and nutrients, or None if not found
         """
-        # Check cache first
-        cached_result = self._get_from_cache(query)
-        if cached_result:
-            return cached_result
-            
+        with tracing.span("usda.search_food") as search_span:
+            if search_span is not None and search_span.trace.record_queries:
+                search_span.set("query", query)
+            # Check cache first
+            with tracing.span("usda.cache_lookup") as span:
+                cached_result = self._get_from_cache(query)
+                if span is not None:
+                    span.set("hit", cached_result is not None)
+            if cached_result:
+                return cached_result
+
+            return await self._fetch_and_cache(query)
+
+    async def aclose(self) -> None:
+        """Close the transport (app shutdown; saves a recording cassette)"""
+        await self.transport.aclose()
+
+    async def _fetch_and_cache(self, query: str) -> Optional[FoodRecord]:
+        """Query USDA (bypassing the cache) and cache the best match"""
+        import httpx
+
         try:
-            timeout = httpx.Timeout(10.0, connect=5.0)
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                url = f"{self.base_url}/foods/search"
-                params = {
-                    "query": query,
-                    "api_key": self.api_key,
-                    "pageSize": 3,
-                    "dataType": ["Foundation", "SR Legacy", "Branded"],
-                }
-
-                logger.info(f"Searching USDA API for: {query}")
-
-                # Simple retry logic
-                for attempt in range(2):
-                    try:
-                        response = await client.get(url, params=params)
+            logger.info(f"Searching USDA API for: {query}")
+
+            # Simple retry logic, within the request deadline (if any)
+            for attempt in range(2):
+                try:
+                    read_timeout = deadline.bounded(10.0)
+                    with tracing.span("usda.attempt", attempt=attempt + 1) as span:
+                        # Hedged with a second request when slower than usual
+                        response = await asyncio.wait_for(
+                            self.hedger.call(
+                                lambda: self.transport.search(query, timeout=read_timeout)
+                            ),
+                            timeout=deadline.remaining(),
+                        )
+                        if span is not None:
+                            span.set("status", response.status_code)
                         response.raise_for_status()
-                        break
-                    except (httpx.TimeoutException, httpx.ConnectError) as e:
-                        if attempt == 1:  # Last attempt
-                            raise
-                        logger.warning(f"USDA API attempt {attempt + 1} failed: {e}")
-                        await asyncio.sleep(0.5)
-
+                    break
+                except asyncio.TimeoutError:
+                    raise DeadlineExceeded()
+                except (httpx.TimeoutException, httpx.ConnectError) as e:
+                    if attempt == 1:  # Last attempt
+                        raise
+                    left = deadline.remaining()
+                    if left is not None and left <= 0.5:
+                        raise DeadlineExceeded()
+                    logger.warning(f"USDA API attempt {attempt + 1} failed: {e}")
+                    await asyncio.sleep(0.5)
+
+            with tracing.span("usda.parse"):
                 data = response.json()
 
                 # Check if we have results
@@ -115,20 +385,19 @@ class USDAService:
                     logger.warning(f"No calorie data found for: {query}")
                     return None
 
-                # Only extract the essential fields we need
-                result = {
-                    "description": best_food.get("description", query),
-                    "calories_per_100g": calorie_info,
-                    "serving_size": best_food.get("servingSize", 100),
-                    "serving_unit": best_food.get("servingSizeUnit", "g"),
-                    "data_type": best_food.get("dataType"),
-                    "source": "USDA FoodData Central",
-                }
-                
-                # Cache the successful result
-                self._set_cache(query, result)
-                return result
+                # Only keep the essential fields, in compact form
+                result = FoodRecord.from_usda(best_food, calorie_info, query)
+
+            # Cache the successful result
+            self._set_cache(query, result)
+            return result
 
+        except asyncio.CancelledError:
+            # Request cancelled (client disconnected or deadline passed)
+            self.cancelled_lookups += 1
+            raise
+        except HTTPException:
+            raise
         except httpx.HTTPStatusError as e:
             logger.error(f"USDA API HTTP error: {e.response.status_code}")
             raise HTTPException(
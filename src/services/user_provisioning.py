@@ -0,0 +1,169 @@
+"""
+Bulk user provisioning from CSV
+
+Streams rows from a CSV file (columns: first_name, last_name, email, password),
+hashes passwords on a process pool (bcrypt is CPU-bound, so threads would serialize
+on the GIL) and inserts each batch with one multi-row INSERT ... ON CONFLICT (email)
+DO NOTHING. Existing emails are skipped, so a partially imported file can be re-run.
+
+Usage:
+    python -m src.services.user_provisioning partner_users.csv --batch-size 1000 --workers 8
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from src.models.user import User
+from src.schemas.auth import UserCreate
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def read_users_csv(handle: TextIO, report: Dict[str, int]) -> Iterator[UserCreate]:
+    """
+    Yield validated users from a CSV stream, counting and logging invalid rows
+
+    Args:
+        handle: Open text file with a header row
+        report: Counters to update ("read", "invalid")
+    """
+    for line_number, row in enumerate(csv.DictReader(handle), start=2):
+        report["read"] += 1
+        try:
+            yield UserCreate(**{key: (value or "").strip() for key, value in row.items() if key})
+        except ValidationError as e:
+            report["invalid"] += 1
+            logger.warning(f"Skipping invalid row {line_number}: {e.errors()[0]['msg']}")
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """Hash one batch of passwords (runs in a pool worker process)"""
+    from src.utils.auth import get_password_hash
+
+    return [get_password_hash(password) for password in passwords]
+
+
+def insert_users(db: Session, users: List[UserCreate], password_hashes: List[str]) -> int:
+    """
+    Insert a batch in one statement, skipping emails that already exist
+
+    Returns:
+        Number of users actually inserted
+    """
+    from src.database.connection import dialect_insert
+
+    stmt = (
+        dialect_insert(db, User)
+        .values([
+            {
+                "first_name": user.first_name,
+                "last_name": user.last_name,
+                "email": user.email,
+                "password_hash": password_hash,
+            }
+            for user, password_hash in zip(users, password_hashes)
+        ])
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User.id)
+    )
+    try:
+        inserted = len(db.execute(stmt).all())
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return inserted
+
+
+def _batches(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def provision_users(
+    users: Iterable[UserCreate],
+    session_factory: Callable[[], Session],
+    executor: Executor,
+    batch_size: int = 1000,
+    max_in_flight: int = 4,
+    report: Optional[Dict[str, int]] = None,
+) -> Dict[str, int]:
+    """
+    Hash and insert users batch by batch
+
+    Up to `max_in_flight` batches are hashing at once while completed batches are
+    inserted in order, so memory stays bounded by batch_size * max_in_flight rows
+    however large the input is.
+
+    Returns:
+        Counters: read, invalid, inserted, existing
+    """
+    report = report if report is not None else {"read": 0, "invalid": 0}
+    report.setdefault("inserted", 0)
+    report.setdefault("existing", 0)
+
+    pending: deque = deque()
+    db = session_factory()
+    try:
+        def insert_oldest():
+            batch, future = pending.popleft()
+            inserted = insert_users(db, batch, future.result())
+            report["inserted"] += inserted
+            report["existing"] += len(batch) - inserted
+            logger.info(f"Provisioned {report['inserted']} users ({report['existing']} already existed)")
+
+        for batch in _batches(users, batch_size):
+            pending.append(
+                (batch, executor.submit(hash_passwords, [user.password for user in batch]))
+            )
+            if len(pending) >= max_in_flight:
+                insert_oldest()
+        while pending:
+            insert_oldest()
+    finally:
+        db.close()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Provision users from a CSV file")
+    parser.add_argument("csv_path", help="CSV with first_name,last_name,email,password columns")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    from src.database.connection import SessionLocal, init_db
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    report = {"read": 0, "invalid": 0}
+    with open(args.csv_path, newline="", encoding="utf-8") as handle, ProcessPoolExecutor(
+        max_workers=args.workers
+    ) as executor:
+        provision_users(
+            read_users_csv(handle, report),
+            SessionLocal,
+            executor,
+            batch_size=args.batch_size,
+            max_in_flight=args.workers * 2,
+            report=report,
+        )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
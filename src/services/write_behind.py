@@ -0,0 +1,247 @@
+"""
+Write-behind buffering of per-user per-day totals
+
+MealLogBuffer and UsageMeter keep what request handlers record in memory and write
+it in batches from a worker thread. This base holds the shared part: the deltas per
+(user, day) that are not in the database yet, one flush at a time, and the flush
+loop. Until a batch is committed its deltas are still visible through
+`read_with_pending`, so reads see their own writes and never count a batch twice.
+
+A batch the database rejects (IntegrityError, DataError) is split in halves until
+the offending items are isolated; those are dropped and counted, so one bad item
+cannot block the queue. Other failures (database down) put the unwritten items
+back for the next flush. Subclasses define what an item is and how a batch is
+written.
+"""
+
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Callable, Dict, Generic, List, Sequence, Tuple, TypeVar
+
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from src.database.connection import dialect_insert
+import logging
+
+logger = logging.getLogger(__name__)
+
+DeltaKey = Tuple[int, date]
+Deltas = Dict[DeltaKey, List[float]]
+
+Item = TypeVar("Item")
+T = TypeVar("T")
+
+
+def add_deltas(target: Deltas, source: Deltas) -> None:
+    for key, delta in source.items():
+        current = target.get(key)
+        if current is None:
+            target[key] = list(delta)
+        else:
+            for i, value in enumerate(delta):
+                current[i] += value
+
+
+def upsert_increments(db: Session, model, fields: Sequence[str], deltas: Deltas) -> None:
+    """Increment (or create) the (user_id, day) rows of `model` with one statement"""
+    stmt = dialect_insert(db, model).values([
+        {"user_id": user_id, "day": day, **dict(zip(fields, delta))}
+        for (user_id, day), delta in deltas.items()
+    ])
+    table = model.__table__
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.day],
+        set_={field: table.c[field] + stmt.excluded[field] for field in fields},
+    )
+    db.execute(stmt)
+
+
+class WriteBehindBuffer(ABC, Generic[Item]):
+    """Pending per-(user, day) deltas and the batched flush that writes them"""
+
+    # Name in log messages
+    label = "Write-behind"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Only one flush writes at a time; others return immediately unless blocking
+        self._flush_lock = threading.Lock()
+        # Held from each commit until its deltas leave _in_flight (see read_with_pending)
+        self._commit_lock = threading.Lock()
+        # Incremented with every commit
+        self._generation = 0
+        # Deltas of queued items, and of the batch being written (both still pending)
+        self._deltas: Deltas = {}
+        self._in_flight: Deltas = {}
+        self.flushed = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._deltas)
+
+    # Payload-specific parts
+
+    @abstractmethod
+    def _take_items_locked(self) -> List[Item]:
+        """Remove and return the queued items (called under _lock)"""
+
+    @abstractmethod
+    def _requeue_items_locked(self, items: List[Item]) -> None:
+        """Put unwritten items back in front of the queue (called under _lock)"""
+
+    @abstractmethod
+    def _deltas_of(self, items: List[Item]) -> Deltas:
+        """Deltas the items add to the database"""
+
+    @abstractmethod
+    def _execute(self, db: Session, items: List[Item], deltas: Deltas) -> None:
+        """Run the statements writing a batch (the base class commits)"""
+
+    @abstractmethod
+    def _describe(self, item: Item) -> str:
+        """Item for the log when it is dropped"""
+
+    def _is_empty(self, delta: List[float]) -> bool:
+        return all(value <= 0 for value in delta)
+
+    def _subtract_locked(self, target: Deltas, source: Deltas) -> None:
+        for key, delta in source.items():
+            current = target.get(key)
+            if current is None:
+                continue
+            for i, value in enumerate(delta):
+                current[i] -= value
+            if self._is_empty(current):
+                del target[key]
+
+    # Reads
+
+    def pending(self, user_id: int, start: date, end: date) -> Dict[date, List[float]]:
+        """Not-yet-committed deltas for a user, keyed by day"""
+        with self._lock:
+            return self._pending_locked(user_id, start, end)
+
+    def _pending_locked(self, user_id: int, start: date, end: date) -> Dict[date, List[float]]:
+        result: Dict[date, List[float]] = {}
+        for deltas in (self._in_flight, self._deltas):
+            add_deltas(result, {
+                day: delta
+                for (uid, day), delta in deltas.items()
+                if uid == user_id and start <= day <= end
+            })
+        return result
+
+    def read_with_pending(
+        self, read: Callable[[], T], user_id: int, start: date, end: date
+    ) -> Tuple[T, Dict[date, List[float]]]:
+        """
+        Run a database read together with the deltas it does not include
+
+        The read is repeated if a flush committed in the meantime, so a batch is
+        never counted both in the database and as pending (nor in neither).
+        """
+        while True:
+            with self._lock:
+                generation = self._generation
+                pending = self._pending_locked(user_id, start, end)
+            result = read()
+            with self._commit_lock:
+                if self._generation == generation:
+                    return result, pending
+
+    # Flushes
+
+    def flush(self, db: Session, blocking: bool = False) -> int:
+        """
+        Write the queued items, in one transaction when possible
+
+        Blocking; call from a worker thread. Items the database rejects are dropped
+        (see module docstring); on any other failure the unwritten items are put
+        back and the error is logged.
+
+        Args:
+            db: Session to write with
+            blocking: Wait for a running flush instead of returning (shutdown)
+
+        Returns:
+            Number of items written (0 if empty or another flush is running)
+        """
+        if not self._flush_lock.acquire(blocking=blocking):
+            return 0
+        try:
+            with self._lock:
+                items = self._take_items_locked()
+                self._in_flight, self._deltas = self._deltas, {}
+            if not items:
+                return 0
+
+            written = 0
+            chunks = [items]
+            while chunks:
+                chunk = chunks.pop()
+                try:
+                    self._write(db, chunk)
+                    written += len(chunk)
+                except (IntegrityError, DataError) as e:
+                    db.rollback()
+                    if len(chunk) > 1:
+                        middle = len(chunk) // 2
+                        chunks += [chunk[middle:], chunk[:middle]]
+                        continue
+                    self.dropped += 1
+                    logger.error(f"Dropping {self._describe(chunk[0])} rejected by the database ({e.orig})")
+                    with self._commit_lock, self._lock:
+                        self._subtract_locked(self._in_flight, self._deltas_of(chunk))
+                        self._generation += 1
+                except Exception as e:
+                    db.rollback()
+                    self.failed_flushes += 1
+                    unwritten = chunk + [item for rest in reversed(chunks) for item in rest]
+                    logger.error(f"{self.label} flush of {len(unwritten)} items failed: {e}")
+                    with self._lock:
+                        self._requeue_items_locked(unwritten)
+                        add_deltas(self._deltas, self._deltas_of(unwritten))
+                        self._in_flight = {}
+                    break
+
+            self.flushed += written
+            if written:
+                logger.debug(f"{self.label} flushed {written} items")
+            return written
+        finally:
+            self._flush_lock.release()
+
+    def _write(self, db: Session, items: List[Item]) -> None:
+        """Write one batch and commit it"""
+        deltas = self._deltas_of(items)
+        self._execute(db, items, deltas)
+        with self._commit_lock:
+            db.commit()
+            with self._lock:
+                self._subtract_locked(self._in_flight, deltas)
+                self._generation += 1
+
+    async def run_periodic_flush(self, session_factory: Callable[[], Session], interval: float):
+        """Flush every `interval` seconds until cancelled; errors are logged, not fatal"""
+        while True:
+            await asyncio.sleep(interval)
+            if not len(self):
+                continue
+            try:
+                await asyncio.to_thread(self.flush_with_session, session_factory)
+            except Exception as e:
+                # e.g. the session factory or close() failing; retry next interval
+                self.failed_flushes += 1
+                logger.error(f"{self.label} periodic flush failed: {e}")
+
+    def flush_with_session(self, session_factory: Callable[[], Session], blocking: bool = False) -> int:
+        """Flush using a fresh session (background flushes, shutdown)"""
+        db = session_factory()
+        try:
+            return self.flush(db, blocking)
+        finally:
+            db.close()
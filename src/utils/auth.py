@@ -3,26 +3,30 @@ Authentication utilities for JWT tokens and password hashing
 """
 
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional, Dict, Any
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache()
+def get_pwd_context():
+    """Password hashing context (passlib is imported on first use)"""
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def create_access_token(
@@ -38,6 +42,7 @@ def create_access_token(
     Returns:
         Encoded JWT token string
     """
+    from jose import jwt
     from src.config.settings import settings
 
     to_encode = data.copy()
@@ -58,6 +63,13 @@ def create_access_token(
     return encoded_jwt
 
 
+def refresh_token_lifetime() -> timedelta:
+    """How long a refresh token stays valid after it is issued"""
+    from src.config.settings import settings
+
+    return timedelta(days=settings.jwt_refresh_token_expire_days)
+
+
 def verify_token(token: str) -> Dict[str, Any]:
     """
     Verify and decode a JWT token
@@ -71,6 +83,7 @@ def verify_token(token: str) -> Dict[str, Any]:
     Raises:
         HTTPException: If token is invalid or expired
     """
+    from jose import JWTError, jwt
     from src.config.settings import settings
 
     try:
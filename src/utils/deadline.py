@@ -0,0 +1,59 @@
+"""
+Per-request deadlines carried in a context variable
+
+DeadlineMiddleware sets the deadline for each request; the USDA client and the
+database layer read it to bound their own timeouts. anyio copies the context into
+threadpool workers, so sync dependencies see the same deadline.
+"""
+
+import contextvars
+import time
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+# Absolute time.monotonic() deadline of the current request (None = no deadline)
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+
+class DeadlineExceeded(HTTPException):
+    """The request ran out of time (504)"""
+
+    def __init__(self, detail: str = "Request deadline exceeded"):
+        super().__init__(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=detail)
+
+
+def set_deadline(timeout: Optional[float]) -> contextvars.Token:
+    """Start a deadline `timeout` seconds from now (None clears it)"""
+    return _deadline.set(time.monotonic() + timeout if timeout is not None else None)
+
+
+def reset_deadline(token: contextvars.Token) -> None:
+    _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the deadline (may be negative), None without a deadline"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def bounded(timeout: float) -> float:
+    """`timeout` capped at the time left (raises if nothing is left)"""
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded()
+    return min(timeout, left)
+
+
+def check_deadline() -> None:
+    """Raise DeadlineExceeded if the current deadline has passed"""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded()
@@ -5,8 +5,9 @@ FastAPI dependencies for authentication and authorization
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from src.database.connection import get_db
+from src.database.connection import get_read_db, read_with_primary_fallback
 from src.models.user import User
+from src.utils import tracing
 from src.utils.auth import verify_token
 from typing import Optional
 import logging
@@ -19,14 +20,14 @@ security = HTTPBearer()
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> User:
     """
     Dependency to get current authenticated user from JWT token
 
     Args:
         credentials: Bearer token from Authorization header
-        db: Database session
+        db: Read-only database session (a replica when configured)
 
     Returns:
         User: Current authenticated user
@@ -34,45 +35,81 @@ def get_current_user(
     Raises:
         HTTPException: If token is invalid or user not found
     """
-    try:
-        # Verify and decode token
-        token_data = verify_token(credentials.credentials)
-        user_id = int(token_data.get("sub"))
-
-        # Get user from database
-        user = User.get_by_id(db, user_id)
-        if not user:
-            logger.warning(f"User not found for token: {user_id}")
+    with tracing.span("auth.get_current_user"):
+        try:
+            # Verify and decode token
+            with tracing.span("auth.verify_token"):
+                token_data = verify_token(credentials.credentials)
+            user_id = int(token_data.get("sub"))
+
+            # Get user from a replica; just-registered users may only be on the primary
+            user = read_with_primary_fallback(db, lambda session: User.get_by_id(session, user_id))
+            if not user:
+                logger.warning(f"User not found for token: {user_id}")
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="User not found",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+
+            logger.debug(f"Authenticated user: {user.email}")
+            tracing.set_user(user.id)
+            return user
+
+        except HTTPException:
+            raise
+        except ValueError:
+            logger.warning("Invalid user ID in token")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid token format",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        except Exception as e:
+            logger.error(f"Authentication error: {e}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found",
+                detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        logger.debug(f"Authenticated user: {user.email}")
-        return user
 
-    except ValueError:
+async def get_current_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> int:
+    """
+    Dependency authenticating by the JWT alone, without loading the user
+
+    For hot read-only routes (autocomplete) where a database round trip per
+    request would cost far more than the work itself. A user deleted after the
+    token was issued is still accepted until the token expires.
+
+    Returns:
+        int: User ID from the token
+
+    Raises:
+        HTTPException: If the token is invalid or expired
+    """
+    with tracing.span("auth.verify_token"):
+        token_data = verify_token(credentials.credentials)
+    try:
+        user_id = int(token_data.get("sub"))
+    except (TypeError, ValueError):
         logger.warning("Invalid user ID in token")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token format",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    except Exception as e:
-        logger.error(f"Authentication error: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    tracing.set_user(user_id)
+    return user_id
 
 
 def get_current_user_optional(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(
         HTTPBearer(auto_error=False)
     ),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> Optional[User]:
     """
     Optional authentication dependency - returns None if no token provided
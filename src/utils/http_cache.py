@@ -0,0 +1,60 @@
+"""
+HTTP caching helpers: ETags and Cache-Control for calorie responses
+"""
+
+import hashlib
+from typing import Optional
+
+
+def food_record_digest(record) -> str:
+    """
+    Content digest of a resolved food record
+
+    Computed once when the record is cached, so per-request ETags only hash a few
+    short strings.
+    """
+    identity = "|".join(
+        str(getattr(record, field))
+        for field in ("fdc_id", "description", "calories_per_100g", "serving_size", "data_type")
+    )
+    return hashlib.blake2b(identity.encode(), digest_size=12).hexdigest()
+
+
+def calorie_etag(record, dish_name: str, servings: int) -> str:
+    """
+    Strong ETag for a calorie response
+
+    Covers the resolved food record, the servings and the dish name as echoed in
+    the body, so equal ETags always mean byte-identical responses.
+    """
+    tag = hashlib.blake2b(
+        f"{record.digest}|{servings}|{dish_name}".encode(), digest_size=12
+    ).hexdigest()
+    return f'"{tag}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match evaluation (weak comparison, as RFC 9110 specifies for it)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def calorie_cache_control(max_age: int, shared: bool) -> str:
+    """
+    Cache-Control for calorie responses
+
+    Results are the same for every user, but the endpoint is authenticated, so shared
+    caches may only store them when the policy explicitly allows it (public/s-maxage).
+    """
+    if shared:
+        return f"public, max-age={max_age}, s-maxage={max_age}"
+    return f"private, max-age={max_age}"
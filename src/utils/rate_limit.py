@@ -0,0 +1,78 @@
+"""
+Rate limiting keyed by authenticated user or client IP, backed by a shared store
+"""
+
+from typing import Optional
+from fastapi import HTTPException, Request
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+from src.utils.auth import verify_token
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Two fixed-window counters per key weighted into a sliding window: constant memory
+# per client, and the Redis backend does the check-and-increment in one Lua call.
+RATE_LIMIT_STRATEGY = "sliding-window-counter"
+
+
+def get_client_ip(request: Request, trusted_proxy_hops: int = 0) -> str:
+    """
+    Resolve the client IP, honouring X-Forwarded-For only behind trusted proxies
+
+    Args:
+        request: Incoming request
+        trusted_proxy_hops: Number of reverse proxies in front of the app. The client
+            address is taken that many entries from the right of X-Forwarded-For, so
+            values a client prepends itself are ignored.
+
+    Returns:
+        Client IP address
+    """
+    if trusted_proxy_hops > 0:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+            if hops:
+                return hops[max(0, len(hops) - trusted_proxy_hops)]
+    return get_remote_address(request)
+
+
+def _user_id_from_request(request: Request) -> Optional[str]:
+    """Return the user ID from a valid bearer token, if any"""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return str(verify_token(token)["sub"])
+    except HTTPException:
+        return None
+
+
+def rate_limit_key(request: Request) -> str:
+    """Rate limit key: authenticated user ID when present, client IP otherwise"""
+    from src.config.settings import settings
+
+    user_id = _user_id_from_request(request)
+    if user_id is not None:
+        return f"user:{user_id}"
+    return f"ip:{get_client_ip(request, settings.rate_limit_trusted_proxy_hops)}"
+
+
+def create_limiter() -> Limiter:
+    """Build the application limiter from settings"""
+    from src.config.settings import settings
+
+    limiter = Limiter(
+        key_func=rate_limit_key,
+        default_limits=[f"{settings.api_rate_limit}/minute"],
+        storage_uri=settings.rate_limit_storage_uri,
+        strategy=RATE_LIMIT_STRATEGY,
+        key_prefix="calory",
+    )
+    logger.info(
+        f"Rate limit storage: {settings.rate_limit_storage_uri.split('://')[0]}, "
+        f"strategy: {RATE_LIMIT_STRATEGY}"
+    )
+    return limiter
@@ -0,0 +1,307 @@
+"""
+Request tracing with spans carried in a context variable
+
+TracingMiddleware starts a trace for each sampled request, continuing the caller's
+W3C `traceparent` when one is sent, and code below it opens child spans with
+`with tracing.span("name"):`. Outside a sampled request a span costs one context
+variable lookup. Tasks and anyio threadpool workers copy the context, so spans
+opened in hedged calls and sync dependencies land in the same trace.
+
+Finished traces go to an exporter: an in-process collector of recent traces
+(served to their own user by GET /traces) or a JSON-lines file; no external service
+is needed. Dish queries are only recorded when `record_queries` is enabled.
+"""
+
+import contextvars
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+EXPORTER_MEMORY = "memory"
+EXPORTER_FILE = "file"
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# Innermost open span of the current request (None = not traced)
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "trace_span", default=None
+)
+
+
+class Trace:
+    """Spans of one request, shared by every span in it"""
+
+    __slots__ = ("trace_id", "spans", "dropped", "max_spans", "record_queries", "user_id")
+
+    def __init__(self, trace_id: str, max_spans: int, record_queries: bool = False):
+        self.trace_id = trace_id
+        self.spans: List["Span"] = []
+        self.dropped = 0
+        self.max_spans = max_spans
+        self.record_queries = record_queries
+        # Authenticated user of the request, set by get_current_user
+        self.user_id: Optional[int] = None
+
+    def add(self, span: "Span") -> None:
+        if len(self.spans) < self.max_spans:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        spans = sorted(self.spans, key=lambda span: span.start_ns)
+        return {
+            "trace_id": self.trace_id,
+            "user_id": self.user_id,
+            "duration_ms": spans[0].duration_ms if spans else 0.0,
+            "spans": [span.to_dict() for span in spans],
+            "dropped_spans": self.dropped,
+        }
+
+
+class Span:
+    """One timed operation; recorded in its trace when it ends"""
+
+    __slots__ = (
+        "trace", "name", "span_id", "parent_id", "start_ns", "_start",
+        "duration_ms", "attributes", "error",
+    )
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], **attributes: Any):
+        self.trace = trace
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def child(self, name: str, **attributes: Any) -> "Span":
+        return Span(self.trace, name, self.span_id, **attributes)
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.duration_ms is not None:
+            return
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 3)
+        if error is not None:
+            self.error = type(error).__name__
+        self.trace.add(self)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def current_traceparent() -> Optional[str]:
+    """Header value propagating the current span to an outgoing call"""
+    span = _current.get()
+    return span.traceparent if span is not None else None
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Child of the current span for the duration of the block (None if not traced)"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.child(name, **attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.end(e)
+        raise
+    finally:
+        _current.reset(token)
+        child.end()
+
+
+def set_user(user_id: int) -> None:
+    """Record the authenticated user on the current trace, if any"""
+    span = _current.get()
+    if span is not None:
+        span.trace.user_id = user_id
+
+
+def activate(span: Optional[Span]) -> contextvars.Token:
+    return _current.set(span)
+
+
+def deactivate(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+def parse_traceparent(value: str) -> Optional[Tuple[str, str, bool]]:
+    """(trace id, parent span id, sampled) from a W3C traceparent, None if invalid"""
+    match = _TRACEPARENT.match(value.strip().lower())
+    if match is None or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+class MemoryExporter:
+    """In-process collector keeping the most recent traces"""
+
+    kind = EXPORTER_MEMORY
+
+    def __init__(self, max_traces: int = 200):
+        self._traces: Deque[Dict[str, Any]] = deque(maxlen=max_traces)
+
+    def export(self, trace: Trace) -> None:
+        self._traces.append(trace.to_dict())
+
+    def traces(self, limit: int = 0, user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Most recent traces first, only those of `user_id` when given"""
+        recent = [
+            trace for trace in reversed(self._traces)
+            if user_id is None or trace["user_id"] == user_id
+        ]
+        return recent[:limit] if limit else recent
+
+    def close(self) -> None:
+        pass
+
+
+class FileExporter:
+    """Appends one JSON line per trace, buffered to keep file writes off most requests"""
+
+    kind = EXPORTER_FILE
+
+    def __init__(self, path: str, flush_every: int = 20):
+        self.path = path
+        self.flush_every = flush_every
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace) -> None:
+        with self._lock:
+            self._buffer.append(json.dumps(trace.to_dict(), default=str))
+            if len(self._buffer) < self.flush_every:
+                return
+            lines, self._buffer = self._buffer, []
+        self._write(lines)
+
+    def _write(self, lines: List[str]) -> None:
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            logger.warning(f"Could not write {len(lines)} traces to {self.path}: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        if lines:
+            self._write(lines)
+
+
+class Tracer:
+    """Sampling decisions and the exporter for finished traces"""
+
+    def __init__(
+        self, exporter, sample_rate: float = 1.0, max_spans: int = 256, record_queries: bool = False
+    ):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.max_spans = max_spans
+        # Dish queries are user data; spans only carry them when enabled
+        self.record_queries = record_queries
+        self.sampled = 0
+        self.unsampled = 0
+        self.dropped_spans = 0
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None, **attributes: Any) -> Optional[Span]:
+        """
+        Root span for a request, or None when it is not sampled
+
+        A valid incoming traceparent is continued, and its sampled flag decides;
+        otherwise the request is sampled with probability `sample_rate`.
+        """
+        parent = parse_traceparent(traceparent) if traceparent else None
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = os.urandom(16).hex(), None
+            sampled = random.random() < self.sample_rate
+        if not sampled:
+            self.unsampled += 1
+            return None
+        self.sampled += 1
+        return Span(Trace(trace_id, self.max_spans, self.record_queries), name, parent_id, **attributes)
+
+    def finish(self, root: Span, error: Optional[BaseException] = None) -> None:
+        """End the root span and export its trace"""
+        root.end(error)
+        self.dropped_spans += root.trace.dropped
+        try:
+            self.exporter.export(root.trace)
+        except Exception as e:
+            logger.warning(f"Trace export failed: {e}")
+
+    def close(self) -> None:
+        self.exporter.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "exporter": self.exporter.kind,
+            "sample_rate": self.sample_rate,
+            "sampled": self.sampled,
+            "unsampled": self.unsampled,
+            "dropped_spans": self.dropped_spans,
+        }
+
+
+_tracer: Optional[Tracer] = None
+
+
+def create_tracer() -> Tracer:
+    """Build the process-wide tracer from settings"""
+    global _tracer
+    from src.config.settings import settings
+
+    if settings.tracing_exporter == EXPORTER_FILE:
+        exporter = FileExporter(settings.tracing_file)
+    else:
+        exporter = MemoryExporter(settings.tracing_max_traces)
+    _tracer = Tracer(
+        exporter,
+        sample_rate=settings.tracing_sample_rate,
+        max_spans=settings.tracing_max_spans,
+        record_queries=settings.tracing_record_queries,
+    )
+    return _tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    """The tracer, or None when tracing is disabled"""
+    return _tracer
@@ -0,0 +1,150 @@
+"""
+Admission control tests
+"""
+import asyncio
+
+import pytest
+
+from src.services.admission import (
+    CLASS_CACHE,
+    CLASS_UPSTREAM,
+    AdmissionController,
+    AdmissionGate,
+    Overloaded,
+)
+from src.utils import deadline
+from src.utils.deadline import DeadlineExceeded
+
+
+class TestAdmissionGate:
+    """Test slot limits, the wait queue and shedding of AdmissionGate"""
+
+    @pytest.mark.asyncio
+    async def test_rejects_with_retry_after_when_queue_full(self):
+        """A request that cannot even queue is shed at once with Retry-After"""
+        # Arrange
+        gate = AdmissionGate("test", max_in_flight=1, max_queue=0, max_wait=1.0)
+        await gate.acquire()
+
+        # Act
+        with pytest.raises(Overloaded) as exc_info:
+            await gate.acquire()
+
+        # Assert
+        assert exc_info.value.status_code == 503
+        assert int(exc_info.value.headers["Retry-After"]) >= 1
+        assert gate.stats()["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_rejects_after_max_wait(self):
+        """A queued request is shed once it has waited max_wait"""
+        # Arrange
+        gate = AdmissionGate("test", max_in_flight=1, max_queue=4, max_wait=0.05)
+        await gate.acquire()
+
+        # Act / Assert
+        with pytest.raises(Overloaded):
+            await gate.acquire()
+        assert gate.waiting == 0
+        assert gate.in_flight == 1
+
+    @pytest.mark.asyncio
+    async def test_deadline_ending_the_wait_is_a_timeout(self):
+        """A deadline that passes (or has passed) before max_wait gives 504, not a shed"""
+        # Arrange
+        gate = AdmissionGate("test", max_in_flight=1, max_queue=4, max_wait=1.0)
+        await gate.acquire()
+        outcomes = []
+
+        # Act
+        for timeout in (0.05, 0.0):
+            token = deadline.set_deadline(timeout)
+            try:
+                with pytest.raises(DeadlineExceeded) as exc_info:
+                    await gate.acquire()
+                outcomes.append(exc_info.value.status_code)
+            finally:
+                deadline.reset_deadline(token)
+
+        # Assert
+        assert outcomes == [504, 504]
+        assert gate.stats()["rejected"] == 0
+        assert gate.waiting == 0
+
+    @pytest.mark.asyncio
+    async def test_release_hands_slot_to_oldest_waiter(self):
+        """Released slots go to queued requests in arrival order"""
+        # Arrange
+        gate = AdmissionGate("test", max_in_flight=1, max_queue=4, max_wait=1.0)
+        await gate.acquire()
+        order = []
+
+        async def waiter(label):
+            await gate.acquire()
+            order.append(label)
+
+        tasks = [asyncio.create_task(waiter(label)) for label in ("first", "second")]
+        await asyncio.sleep(0)
+
+        # Act
+        gate.release(0.01)
+        await asyncio.sleep(0)
+        gate.release(0.01)
+        await asyncio.gather(*tasks)
+
+        # Assert
+        assert order == ["first", "second"]
+        assert gate.in_flight == 1
+
+
+class TestAdmissionController:
+    """Test class priority of AdmissionController"""
+
+    @pytest.mark.asyncio
+    async def test_cache_hits_bypass_saturated_gates(self):
+        """Cache-resolvable requests are admitted while upstream ones are shed"""
+        # Arrange
+        controller = AdmissionController(upstream_concurrency=1, upstream_queue=0)
+        held = controller.admit("/get-calories", CLASS_UPSTREAM)
+        await held.__aenter__()
+
+        # Act / Assert
+        with pytest.raises(Overloaded):
+            async with controller.admit("/get-calories", CLASS_UPSTREAM):
+                pass
+        async with controller.admit("/get-calories", CLASS_CACHE):
+            pass
+
+        await held.__aexit__(None, None, None)
+        stats = controller.stats()
+        assert stats["cache_admitted"] == 1
+        assert stats["classes"][CLASS_UPSTREAM]["rejected"] == 1
+        assert stats["classes"][CLASS_UPSTREAM]["in_flight"] == 0
+        assert stats["routes"]["/get-calories"]["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_releases_route_slot(self):
+        """A request cancelled while queued on the class gate gives back its route slot"""
+        # Arrange
+        controller = AdmissionController(upstream_concurrency=1, upstream_queue=4, max_wait=5.0)
+        held = controller.admit("/get-calories", CLASS_UPSTREAM)
+        await held.__aenter__()
+
+        async def queued():
+            async with controller.admit("/get-calories", CLASS_UPSTREAM):
+                pass
+
+        waiter = asyncio.create_task(queued())
+        await asyncio.sleep(0.01)
+
+        # Act
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        await held.__aexit__(None, None, None)
+
+        # Assert
+        stats = controller.stats()
+        assert waiter.cancelled()
+        assert stats["classes"][CLASS_UPSTREAM]["in_flight"] == 0
+        assert stats["classes"][CLASS_UPSTREAM]["waiting"] == 0
+        assert stats["routes"]["/get-calories"]["in_flight"] == 0
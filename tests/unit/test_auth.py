@@ -80,3 +80,51 @@ class TestUserLogin:
         
         # Assert
         assert response.status_code == 401
+
+
+class TestTokenRefresh:
+    """Test rotating refresh tokens"""
+
+    def test_refresh_rotates_token(self, client, test_user_data):
+        """A refresh token buys a working access token and a new refresh token, once"""
+        # Arrange
+        first = client.post("/auth/register", json=test_user_data).json()["refresh_token"]
+
+        # Act
+        response = client.post("/auth/refresh", json={"refresh_token": first})
+
+        # Assert
+        assert response.status_code == 200
+        data = response.json()
+        assert data["refresh_token"] not in (None, first)
+        headers = {"Authorization": f"Bearer {data['access_token']}"}
+        assert client.get("/foods/suggest?prefix=a", headers=headers).status_code == 200
+
+    def test_reuse_revokes_token_family(self, client, test_user_data):
+        """Replaying a rotated token fails and invalidates its successor too"""
+        # Arrange
+        first = client.post("/auth/register", json=test_user_data).json()["refresh_token"]
+        second = client.post("/auth/refresh", json={"refresh_token": first}).json()["refresh_token"]
+
+        # Act
+        replay = client.post("/auth/refresh", json={"refresh_token": first})
+        successor = client.post("/auth/refresh", json={"refresh_token": second})
+
+        # Assert
+        assert replay.status_code == 401
+        assert successor.status_code == 401
+
+    def test_logout_revokes_refresh_token(self, client, test_user_data):
+        """A logged-out refresh token can no longer be used"""
+        # Arrange
+        login_data = {"email": test_user_data["email"], "password": test_user_data["password"]}
+        client.post("/auth/register", json=test_user_data)
+        token = client.post("/auth/login", json=login_data).json()["refresh_token"]
+
+        # Act
+        logout = client.post("/auth/logout", json={"refresh_token": token})
+        response = client.post("/auth/refresh", json={"refresh_token": token})
+
+        # Assert
+        assert logout.status_code == 204
+        assert response.status_code == 401
@@ -0,0 +1,148 @@
+"""
+Background job runner tests
+"""
+import asyncio
+import threading
+
+import pytest
+
+from src.services.background import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    PRIORITY_NORMAL,
+    BackgroundRunner,
+)
+
+
+class TestBackgroundRunner:
+    """Test priorities, shedding, draining and metrics of BackgroundRunner"""
+
+    @pytest.mark.asyncio
+    async def test_runs_higher_priority_first(self):
+        """Queued jobs run by priority, FIFO within a priority"""
+        # Arrange - queue everything before the single worker gets to run
+        runner = BackgroundRunner(concurrency=1)
+        order = []
+
+        async def record(label):
+            order.append(label)
+
+        runner.start()
+        runner.submit(record, "low", priority=PRIORITY_LOW)
+        runner.submit(record, "normal-1", priority=PRIORITY_NORMAL)
+        runner.submit(record, "high", priority=PRIORITY_HIGH)
+        runner.submit(record, "normal-2", priority=PRIORITY_NORMAL)
+
+        # Act
+        await runner.drain(timeout=1)
+
+        # Assert
+        assert order == ["high", "normal-1", "normal-2", "low"]
+
+    @pytest.mark.asyncio
+    async def test_full_queue_sheds_lower_priority_work(self):
+        """A full queue drops new low-priority jobs and displaces them for high ones"""
+        # Arrange
+        runner = BackgroundRunner(concurrency=1, max_queue=2)
+        ran = []
+
+        async def record(label):
+            ran.append(label)
+
+        runner.start()
+        runner.submit(record, "low-1", priority=PRIORITY_LOW)
+        runner.submit(record, "low-2", priority=PRIORITY_LOW)
+
+        # Act
+        rejected = runner.submit(record, "low-3", priority=PRIORITY_LOW)
+        accepted = runner.submit(record, "high", priority=PRIORITY_HIGH)
+        await runner.drain(timeout=1)
+
+        # Assert
+        assert (rejected, accepted) == (False, True)
+        assert ran == ["high", "low-1"]
+        assert runner.metrics()["dropped"] == 2
+
+    @pytest.mark.asyncio
+    async def test_drain_waits_for_sync_jobs_and_counts_failures(self):
+        """Sync jobs run in threads; drain waits for them; failures are counted"""
+        # Arrange
+        runner = BackgroundRunner(concurrency=2)
+        threads = []
+
+        def blocking():
+            threads.append(threading.current_thread())
+
+        def broken():
+            raise RuntimeError("boom")
+
+        runner.start()
+        runner.submit(blocking)
+        runner.submit(broken)
+
+        # Act
+        abandoned = await runner.drain(timeout=1)
+
+        # Assert
+        assert abandoned == 0
+        assert threads and threads[0] is not threading.main_thread()
+        metrics = runner.metrics()
+        assert (metrics["completed"], metrics["failed"]) == (1, 1)
+        assert runner.submit(blocking) is False
+
+    @pytest.mark.asyncio
+    async def test_drain_timeout_abandons_queued_jobs(self):
+        """Jobs still queued when the drain timeout expires are abandoned"""
+        runner = BackgroundRunner(concurrency=1)
+        runner.start()
+        runner.submit(asyncio.sleep, 5)
+        runner.submit(asyncio.sleep, 0)
+
+        assert await runner.drain(timeout=0.05) == 1
+
+    @pytest.mark.asyncio
+    async def test_refresh_key_released_when_job_never_runs(self, monkeypatch):
+        """A displaced or abandoned cache refresh can be scheduled again"""
+        # Arrange - single-worker runners whose worker is busy
+        from src.services import usda_service
+
+        service = usda_service.USDAService()
+
+        async def busy_runner(max_queue):
+            runner = BackgroundRunner(concurrency=1, max_queue=max_queue)
+            monkeypatch.setattr(usda_service, "get_background_runner", lambda: runner)
+            runner.start()
+            runner.submit(asyncio.sleep, 5)
+            await asyncio.sleep(0)
+            return runner
+
+        # Act - displaced by higher-priority work
+        runner = await busy_runner(max_queue=1)
+        displaced = service._schedule_refresh("banana")
+        runner.submit(asyncio.sleep, 0, priority=PRIORITY_HIGH)
+        after_displacement = set(service._refreshing)
+        await runner.drain(timeout=0.05)
+
+        # Act - abandoned by drain
+        runner = await busy_runner(max_queue=10)
+        abandoned = service._schedule_refresh("banana")
+        await runner.drain(timeout=0.05)
+
+        # Assert
+        assert (displaced, abandoned) == (True, True)
+        assert after_displacement == set()
+        assert service._refreshing == set()
+        assert runner.metrics()["completed"] == 0
+
+
+class TestMetricsEndpoint:
+    """Test GET /metrics"""
+
+    def test_reports_background_and_cache_metrics(self, client):
+        """The runner is started by the app lifespan and reported with cache stats"""
+        body = client.get("/metrics").json()
+
+        assert body["background"]["concurrency"] >= 1
+        assert "queued" in body["background"]
+        assert "total_bytes" in body["food_cache"]
+        assert body["meal_log"]["pending"] == 0
@@ -0,0 +1,106 @@
+"""
+Streaming multi-dish calorie lookup tests
+
+Cache misses are served offline by a replay transport over the benchmark payloads.
+"""
+import asyncio
+import json
+
+import pytest
+
+from benchmarks.fake_usda import load_payloads
+from src.routers import calories
+from src.schemas.calories import CalorieRequest
+from src.services.food_transport import Cassette, ReplayTransport
+from src.services.usda_service import USDAService
+
+
+@pytest.fixture
+def replay_service(monkeypatch, tmp_path):
+    """Fresh USDA service resolving misses from recorded payloads"""
+    cassette = Cassette(str(tmp_path / "cassette.json"))
+    for query, body in load_payloads().items():
+        cassette.put(query, 200, body, elapsed_ms=0)
+    service = USDAService()
+    service.transport = ReplayTransport(cassette, latency_ms=20)
+    monkeypatch.setattr(calories, "get_usda_service", lambda: service)
+    return service
+
+
+class TestCalorieStream:
+    """Test POST /get-calories/stream"""
+
+    def test_streams_cache_hits_first_and_every_dish_once(
+        self, authenticated_client, replay_service
+    ):
+        """Cached dishes lead; repeated misses share one lookup; unknown dishes get 404 lines"""
+        # Arrange
+        replay_service._set_cache("stream banana", {
+            "fdc_id": 1, "description": "Bananas, raw", "calories_per_100g": 89,
+            "serving_size": 100, "serving_unit": "g", "source": "USDA FoodData Central",
+        })
+        items = [
+            {"dish_name": "apple", "servings": 1},
+            {"dish_name": "Apple", "servings": 2},
+            {"dish_name": "unrecorded dish", "servings": 1},
+            {"dish_name": "stream banana", "servings": 2},
+        ]
+
+        # Act
+        response = authenticated_client.post("/get-calories/stream", json={"items": items})
+        lines = [json.loads(line) for line in response.text.splitlines()]
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert lines[0]["index"] == 3
+        assert lines[0]["result"]["total_calories"] == 178
+        by_index = {line["index"]: line for line in lines}
+        assert sorted(by_index) == [0, 1, 2, 3]
+        assert by_index[0]["status"] == by_index[1]["status"] == 200
+        assert by_index[1]["result"]["total_calories"] == 2 * by_index[0]["result"]["total_calories"]
+        assert by_index[2]["status"] == 404
+        assert replay_service.transport.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_reader_pauses_lookups(self, replay_service):
+        """With the buffer full, no further lookups start until lines are read"""
+        # Arrange
+        replay_service.transport.latency_ms = 0
+        items = [CalorieRequest(dish_name=name, servings=1) for name in list(load_payloads())[:6]]
+        stream = calories._stream_calories(items, concurrency=1, buffer=1)
+
+        # Act
+        first = await stream.__anext__()
+        await asyncio.sleep(0.1)
+        started_while_stalled = replay_service.transport.stats()["hits"]
+        rest = [line async for line in stream]
+
+        # Assert
+        assert json.loads(first)["status"] == 200
+        assert started_while_stalled <= 3
+        assert len(rest) == 5
+
+    def test_deadline_yields_504_lines_instead_of_truncating(
+        self, authenticated_client, replay_service
+    ):
+        """Past the request deadline every unresolved dish still gets a (504) line"""
+        # Arrange
+        replay_service.transport.latency_ms = 200
+        names = list(load_payloads())[:6]
+        items = [{"dish_name": name, "servings": 1} for name in names]
+
+        # Act
+        response = authenticated_client.post(
+            "/get-calories/stream",
+            json={"items": items},
+            headers={"X-Request-Timeout": "0.3"},
+        )
+        lines = [json.loads(line) for line in response.text.splitlines()]
+
+        # Assert
+        assert response.status_code == 200
+        assert sorted(line["index"] for line in lines) == list(range(6))
+        statuses = [line["status"] for line in lines]
+        assert 504 in statuses
+        assert set(statuses) <= {200, 504}
@@ -0,0 +1,114 @@
+"""
+Request deadline and disconnect cancellation tests
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from src.middleware.deadline import DeadlineMiddleware, deadline_metrics
+from src.utils import deadline
+from src.utils.deadline import DeadlineExceeded
+
+
+def make_app(events):
+    app = FastAPI()
+
+    @app.get("/remaining")
+    async def remaining():
+        return {"remaining": deadline.remaining()}
+
+    @app.get("/slow")
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            events.append("cancelled")
+            raise
+        return {"status": "done"}
+
+    app.add_middleware(DeadlineMiddleware, default_timeout=10.0, max_timeout=20.0)
+    return app
+
+
+class TestDeadlineMiddleware:
+    """Test per-request deadlines and cancellation"""
+
+    def test_header_sets_deadline_capped_at_max(self):
+        """The header overrides the default, up to max_timeout"""
+        client = TestClient(make_app([]))
+
+        default = client.get("/remaining").json()["remaining"]
+        short = client.get("/remaining", headers={"X-Request-Timeout": "2"}).json()["remaining"]
+        capped = client.get("/remaining", headers={"X-Request-Timeout": "600"}).json()["remaining"]
+
+        assert 9 < default <= 10
+        assert 1 < short <= 2
+        assert 19 < capped <= 20
+
+    def test_expired_deadline_returns_504_and_cancels(self):
+        """Work still running at the deadline is cancelled and answered with 504"""
+        # Arrange
+        events = []
+        client = TestClient(make_app(events))
+        before = deadline_metrics["deadline_exceeded"]
+
+        # Act
+        started = time.perf_counter()
+        response = client.get("/slow", headers={"X-Request-Timeout": "0.1"})
+
+        # Assert
+        assert response.status_code == 504
+        assert time.perf_counter() - started < 2
+        assert events == ["cancelled"]
+        assert deadline_metrics["deadline_exceeded"] == before + 1
+
+    @pytest.mark.asyncio
+    async def test_client_disconnect_cancels_request(self):
+        """http.disconnect before the response cancels the app"""
+        # Arrange
+        events, sent = [], []
+        app = make_app(events)
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await asyncio.sleep(0.05)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": "/slow", "raw_path": b"/slow",
+            "query_string": b"", "root_path": "", "headers": [],
+            "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+        }
+        before = deadline_metrics["client_disconnects"]
+
+        # Act
+        await asyncio.wait_for(app(scope, receive, send), timeout=2)
+
+        # Assert
+        assert events == ["cancelled"]
+        assert sent == []
+        assert deadline_metrics["client_disconnects"] == before + 1
+
+    def test_database_statements_check_deadline(self):
+        """Statements are refused once the request deadline has passed"""
+        # Arrange - constructing the middleware installs the engine listeners
+        make_app([])
+        engine = create_engine("sqlite://")
+        token = deadline.set_deadline(-1)
+
+        # Act / Assert
+        try:
+            with engine.connect() as conn, pytest.raises(DeadlineExceeded):
+                conn.execute(text("SELECT 1"))
+        finally:
+            deadline.reset_deadline(token)
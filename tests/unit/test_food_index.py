@@ -0,0 +1,107 @@
+"""
+Dish-name autocomplete tests
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.services.food_index import FoodSuggestionIndex
+from src.services.usda_service import get_usda_service
+
+
+class TestFoodSuggestionIndex:
+    """Test prefix ranking and eviction in FoodSuggestionIndex"""
+
+    def test_ranks_by_popularity_then_data_type(self):
+        """More popular names come first; ties prefer Foundation over Branded"""
+        # Arrange
+        index = FoodSuggestionIndex()
+        index.learn("Banana bread", "Branded")
+        index.learn("Banana, raw", "Foundation")
+        index.learn("Banana split", "Branded")
+        index.touch("banana split")
+
+        # Act
+        names = [s["name"] for s in index.suggest("ban")]
+
+        # Assert
+        assert names == ["Banana split", "Banana, raw", "Banana bread"]
+
+    def test_prefix_is_case_and_whitespace_insensitive(self):
+        """Prefixes are normalized like the stored names"""
+        index = FoodSuggestionIndex()
+        index.learn("Chicken  Salad")
+        index.learn("Chickpeas")
+
+        assert [s["name"] for s in index.suggest("  CHICKEN s")] == ["Chicken  Salad"]
+        assert len(index.suggest("chick")) == 2
+        assert index.suggest("pizza") == []
+
+    def test_evicts_least_popular_when_full(self):
+        """A full index drops its least popular names to make room"""
+        # Arrange
+        index = FoodSuggestionIndex(max_entries=3)
+        for name in ("apple", "apricot", "avocado"):
+            index.learn(name)
+        index.touch("apple")
+        index.touch("avocado")
+
+        # Act
+        index.learn("artichoke")
+
+        # Assert
+        names = {s["name"] for s in index.suggest("a")}
+        assert names == {"apple", "avocado", "artichoke"}
+        assert len(index) == 3
+
+
+class TestSuggestEndpoint:
+    """Test GET /foods/suggest"""
+
+    def test_suggests_cached_dishes(self, authenticated_client):
+        """Foods resolved by the service are suggested by query and description"""
+        # Arrange
+        get_usda_service()._set_cache("zucchini", {
+            "fdc_id": 169291,
+            "description": "Squash, summer, zucchini, raw",
+            "calories_per_100g": 17,
+            "data_type": "SR Legacy",
+        })
+
+        # Act
+        by_query = authenticated_client.get("/foods/suggest", params={"prefix": "zucc"})
+        by_description = authenticated_client.get("/foods/suggest", params={"prefix": "squash, s"})
+
+        # Assert
+        assert by_query.status_code == 200
+        assert by_query.json()["suggestions"][0]["name"] == "zucchini"
+        assert by_description.json()["suggestions"][0]["data_type"] == "SR Legacy"
+
+    def test_requires_authentication(self, client):
+        """Unauthenticated requests are rejected"""
+        response = client.get("/foods/suggest", params={"prefix": "a"})
+
+        assert response.status_code == 403
+
+    def test_token_is_checked_without_a_database_query(self, authenticated_client):
+        """Suggestions authenticate from the JWT alone; a bad token is still refused"""
+        # Arrange
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(Engine, "before_cursor_execute", count)
+
+        # Act
+        try:
+            response = authenticated_client.get("/foods/suggest", params={"prefix": "a"})
+        finally:
+            event.remove(Engine, "before_cursor_execute", count)
+        forged = authenticated_client.get(
+            "/foods/suggest", params={"prefix": "a"}, headers={"Authorization": "Bearer not-a-jwt"}
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert statements == []
+        assert forged.status_code == 401
@@ -0,0 +1,91 @@
+"""
+Compact food record and cache memory accounting tests
+"""
+import tracemalloc
+
+from src.services.food_record import FoodRecord, measure_record_bytes
+from src.services.usda_service import USDAService
+
+USDA_FOOD = {
+    "fdcId": 2031435,
+    "description": "BANANA CHIPS",
+    "dataType": "Branded",
+    "servingSize": 30,
+    "servingSizeUnit": "g",
+    "foodNutrients": [{"nutrientId": 1008, "value": 519}],
+}
+
+
+def make_record(description: str = "BANANA CHIPS") -> FoodRecord:
+    return FoodRecord.from_usda(dict(USDA_FOOD, description=description), 519, "banana chips")
+
+
+class TestFoodRecord:
+    """Test the slotted record representation"""
+
+    def test_enumerated_fields_are_shared(self):
+        """data_type/source/unit strings are one object across records"""
+        a, b = make_record("A"), make_record("B")
+        assert a.data_type is b.data_type
+        assert a.source is b.source
+        assert a.serving_unit is b.serving_unit
+        assert not hasattr(a, "__dict__")
+
+    def test_dict_round_trip(self):
+        """to_dict/from_dict preserve content and digest"""
+        record = make_record()
+        clone = FoodRecord.from_dict(record.to_dict(), stored_at=record.stored_at)
+
+        original, copied = record.to_dict(), clone.to_dict()
+        # NaN marks unreported nutrients and never compares equal; compare raw bytes
+        assert clone.nutrients.tobytes() == record.nutrients.tobytes()
+        original.pop("nutrients"), copied.pop("nutrients")
+        assert copied == original
+
+    def test_estimate_close_to_tracemalloc(self):
+        """The cheap estimate tracks the measured allocation size"""
+        record = make_record()
+        tracemalloc.start()
+        try:
+            measured = measure_record_bytes(record)
+        finally:
+            tracemalloc.stop()
+
+        assert 0.5 * measured <= record.estimated_size() <= 1.5 * measured
+
+
+class TestCacheMemoryAccounting:
+    """Test byte-bounded caching in USDAService"""
+
+    def test_stats_track_entries_and_bytes(self):
+        """Total bytes grow with entries and shrink on replacement"""
+        service = USDAService()
+        service._set_cache("chips", make_record())
+        one = service.cache_memory_stats()
+
+        service._set_cache("chips", make_record())
+        assert service.cache_memory_stats()["total_bytes"] == one["total_bytes"]
+
+        service._set_cache("more chips", make_record())
+        two = service.cache_memory_stats()
+        assert two["entries"] == 2
+        assert two["total_bytes"] > one["total_bytes"]
+        assert two["bytes_per_entry"] > 0
+
+    def test_byte_limit_evicts_least_recently_used(self):
+        """Going over the byte limit drops the LRU entry"""
+        service = USDAService()
+        service._set_cache("first", make_record())
+        entry_bytes = service.cache_memory_stats()["total_bytes"]
+        service._cache_max_bytes = int(entry_bytes * 2.5)
+        service._set_cache("second", make_record())
+        service._get_from_cache("first")  # first is now most recently used
+        service.peek_cache("third")  # a lookup that missed, so admission lets it in
+
+        # Act
+        service._set_cache("third", make_record())
+
+        # Assert
+        assert service.peek_cache("first") is not None
+        assert service.peek_cache("second") is None
+        assert service.cache_memory_stats()["total_bytes"] <= service._cache_max_bytes
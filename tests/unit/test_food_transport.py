@@ -0,0 +1,101 @@
+"""
+USDA transport record/replay tests
+"""
+import gzip
+import json
+import threading
+import time
+
+import httpx
+import pytest
+
+from benchmarks.fake_usda import load_payloads
+from src.services.food_transport import Cassette, RecordingTransport, ReplayTransport
+from src.services.usda_service import USDAService
+
+
+@pytest.fixture
+def source_cassette(tmp_path):
+    """Cassette holding the recorded benchmark payloads"""
+    cassette = Cassette(str(tmp_path / "source.json"))
+    for query, body in load_payloads().items():
+        cassette.put(query, 200, body, elapsed_ms=5.0)
+    return cassette
+
+
+class TestRecordReplay:
+    """Test capturing responses and serving them offline"""
+
+    @pytest.mark.asyncio
+    async def test_recording_saves_compact_cassette(self, tmp_path, source_cassette):
+        """Successful responses are saved gzip-compressed, keyed by normalized query"""
+        # Arrange
+        path = str(tmp_path / "recorded.json.gz")
+        transport = RecordingTransport(
+            ReplayTransport(source_cassette, latency_ms=0), Cassette.load(path)
+        )
+
+        # Act
+        await transport.search("  Banana ", timeout=1.0)
+        await transport.aclose()
+
+        # Assert
+        with gzip.open(path, "rt") as f:
+            document = json.load(f)
+        assert list(document["entries"]) == ["banana"]
+        assert document["entries"]["banana"]["status"] == 200
+        assert Cassette.load(path).get("BANANA")["body"] == source_cassette.get("banana")["body"]
+
+    @pytest.mark.asyncio
+    async def test_service_resolves_from_replay_with_injected_latency(self, source_cassette):
+        """search_food runs offline against the cassette, delayed by latency_ms"""
+        # Arrange
+        service = USDAService()
+        service.transport = ReplayTransport(source_cassette, latency_ms=50)
+
+        # Act
+        started = time.perf_counter()
+        record = await service.search_food("grilled salmon")
+        elapsed = time.perf_counter() - started
+        missing = await service.search_food("dish that was never recorded")
+
+        # Assert
+        assert record is not None and record.calories_per_100g > 0
+        assert elapsed >= 0.05
+        assert missing is None
+        assert service.transport.stats()["hits"] == 1
+        assert service.transport.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_replay_slower_than_timeout_times_out(self, source_cassette):
+        """Injected latency beyond the read timeout raises like a live timeout"""
+        # Arrange
+        transport = ReplayTransport(source_cassette, latency_ms=200)
+
+        # Act / Assert
+        with pytest.raises(httpx.ReadTimeout):
+            await transport.search("banana", timeout=0.01)
+
+    @pytest.mark.asyncio
+    async def test_periodic_save_runs_off_the_event_loop(self, tmp_path, source_cassette, monkeypatch):
+        """Saves every save_every recordings happen in a worker thread"""
+        # Arrange
+        path = str(tmp_path / "recorded.json")
+        cassette = Cassette.load(path)
+        transport = RecordingTransport(
+            ReplayTransport(source_cassette, latency_ms=0), cassette, save_every=1
+        )
+        writer_threads = []
+        write = cassette.write
+        monkeypatch.setattr(
+            cassette, "write",
+            lambda document: (writer_threads.append(threading.current_thread()), write(document)),
+        )
+
+        # Act
+        await transport.search("banana", timeout=1.0)
+        await transport.aclose()
+
+        # Assert
+        assert writer_threads and threading.main_thread() not in writer_threads
+        assert list(Cassette.load(path).entries) == ["banana"]
@@ -0,0 +1,110 @@
+"""
+Count-min sketch and TinyLFU cache admission tests
+"""
+from src.services.food_record import FoodRecord
+from src.services.frequency_sketch import CountMinSketch
+from src.services.usda_service import USDAService
+
+
+def make_record() -> FoodRecord:
+    return FoodRecord.from_dict({
+        "fdc_id": 1, "description": "Bananas, raw", "calories_per_100g": 89,
+        "serving_size": 100, "serving_unit": "g", "source": "USDA FoodData Central",
+    })
+
+
+class TestCountMinSketch:
+    """Test estimates, aging and the top-K table"""
+
+    def test_estimates_frequency_and_tracks_top_keys(self):
+        """Counts are never under-estimated and the most frequent keys are reported"""
+        # Arrange
+        sketch = CountMinSketch(width=1024, top_k=3)
+
+        # Act
+        for count, key in enumerate(["apple", "banana", "rice", "dal", "kiwi"], start=1):
+            for _ in range(count * 10):
+                sketch.increment(key)
+
+        # Assert
+        assert sketch.estimate("kiwi") >= 50
+        assert sketch.estimate("never seen") <= 1
+        assert [key for key, _ in sketch.top()] == ["kiwi", "dal", "rice"]
+
+    def test_aging_halves_counts(self):
+        """After sample_size increments every count is halved"""
+        # Arrange
+        sketch = CountMinSketch(width=64, sample_size=100, top_k=5)
+
+        # Act
+        for _ in range(99):
+            sketch.increment("hot")
+        before = sketch.estimate("hot")
+        sketch.increment("other")
+
+        # Assert
+        assert before == 99
+        assert sketch.resets == 1
+        assert sketch.estimate("hot") == 49
+        assert sketch.top(1) == [("hot", 49)]
+
+
+class TestCacheAdmission:
+    """Test TinyLFU admission in front of the LRU cache"""
+
+    def test_one_off_query_does_not_evict_popular_entry(self):
+        """A full cache keeps the popular entry when a rarer query arrives"""
+        # Arrange
+        service = USDAService()
+        for _ in range(5):
+            service.peek_cache("banana")
+        service._set_cache("banana", make_record())
+        service._cache_max_bytes = service.cache_memory_stats()["total_bytes"]
+        service.peek_cache("bananna")  # typo, looked up once
+
+        # Act
+        service._set_cache("bananna", make_record())
+
+        # Assert
+        assert service._get_from_cache("banana") is not None
+        assert service._get_from_cache("bananna") is None
+        assert service.cache_memory_stats()["admission"]["rejected"] == 1
+
+    def test_refused_candidate_evicts_nothing(self):
+        """Beating the first victim but not a later one leaves the cache unchanged"""
+        # Arrange - room for two entries; the candidate needs both slots
+        service = USDAService()
+        service._set_cache("rare dish", make_record())
+        for _ in range(5):
+            service.peek_cache("popular dish")
+        service._set_cache("popular dish", make_record())
+        service._cache_max_bytes = service.cache_memory_stats()["total_bytes"]
+        for _ in range(3):
+            service.peek_cache("big dish")
+        big = make_record()
+        big.description = "x" * service._cache_max_bytes
+
+        # Act
+        admitted = service._store_entry(service._get_cache_key("big dish"), big)
+
+        # Assert
+        assert admitted is False
+        assert service._get_from_cache("rare dish") is not None
+        assert service._get_from_cache("popular dish") is not None
+
+    def test_more_popular_query_displaces_victim(self):
+        """A query asked for more often than the LRU entry takes its place"""
+        # Arrange
+        service = USDAService()
+        service._set_cache("rare dish", make_record())
+        service._cache_max_bytes = service.cache_memory_stats()["total_bytes"]
+        for _ in range(3):
+            service.peek_cache("Popular Dish")
+
+        # Act
+        service._set_cache("popular dish", make_record())
+
+        # Assert
+        assert service._get_from_cache("popular dish") is not None
+        assert service._get_from_cache("rare dish") is None
+        assert service.popular_dishes(1) == [("popular dish", 3)]
@@ -0,0 +1,136 @@
+"""
+Hedged request tests
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from src.services.hedging import Hedger, LatencyWindow, OutboundBudget
+
+
+def make_hedger(per_hour=1000, max_hedge_ratio=1.0):
+    hedger = Hedger(
+        OutboundBudget(per_hour), enabled=True, percentile=95,
+        min_samples=20, max_hedge_ratio=max_hedge_ratio,
+    )
+    for _ in range(20):
+        hedger.latency.record(0.01)
+    return hedger
+
+
+def upstream(*delays):
+    """Fake upstream call whose n-th invocation takes delays[n] seconds"""
+    calls = []
+
+    async def call():
+        n = len(calls)
+        calls.append(n)
+        await asyncio.sleep(delays[n])
+        return f"response-{n}"
+
+    return call, calls
+
+
+class TestHedger:
+    """Test when Hedger sends a hedge and which response it returns"""
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged_and_hedge_wins(self):
+        """A call slower than the latency percentile gets a hedge that can win"""
+        # Arrange
+        hedger = make_hedger()
+        call, calls = upstream(1.0, 0.01)
+
+        # Act
+        result = await asyncio.wait_for(hedger.call(call), timeout=0.5)
+
+        # Assert
+        assert result == "response-1"
+        assert len(calls) == 2
+        stats = hedger.stats()
+        assert (stats["hedges"], stats["hedge_wins"]) == (1, 1)
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_is_not_hedged(self):
+        """Calls answering within the hedge delay are sent once"""
+        hedger = make_hedger()
+        call, calls = upstream(0.0)
+
+        assert await hedger.call(call) == "response-0"
+        assert len(calls) == 1
+        assert hedger.stats()["hedges"] == 0
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_without_spare_quota(self):
+        """Hedges are skipped when the outbound budget is down to its reserve"""
+        # Arrange - 10/hour with a 10% reserve: the primary takes the only spare tokens
+        hedger = make_hedger(per_hour=10)
+        hedger.budget._tokens = 1.5
+        call, calls = upstream(0.05, 0.0)
+
+        # Act
+        result = await hedger.call(call)
+
+        # Assert
+        assert result == "response-0"
+        assert len(calls) == 1
+        assert hedger.stats()["hedges_skipped"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_primary_latency_is_recorded(self):
+        """The slow primary cancelled after losing still adds its elapsed time"""
+        # Arrange
+        hedger = make_hedger()
+        call, calls = upstream(1.0, 0.05)
+
+        # Act
+        await hedger.call(call)
+        await asyncio.sleep(0)  # let the cancelled primary unwind
+
+        # Assert - the primary ran at least as long as the hedge delay plus the hedge
+        assert len(hedger.latency) == 22
+        assert max(hedger.latency._samples[20:22]) >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_server_error_does_not_win(self):
+        """A hedge answering 5xx first does not beat a successful primary"""
+        # Arrange
+        hedger = make_hedger()
+        statuses = iter([200, 503])
+        delays = iter([0.1, 0.0])
+
+        async def call():
+            status, delay = next(statuses), next(delays)
+            await asyncio.sleep(delay)
+            return httpx.Response(status)
+
+        # Act
+        response = await hedger.call(call)
+
+        # Assert
+        assert response.status_code == 200
+        assert hedger.stats()["hedge_wins"] == 0
+
+    @pytest.mark.asyncio
+    async def test_untrained_window_disables_hedging(self):
+        """No hedging until min_samples latencies have been observed"""
+        hedger = Hedger(OutboundBudget(1000), enabled=True, min_samples=20)
+
+        assert hedger.hedge_delay() is None
+
+
+class TestLatencyWindow:
+    """Test the latency ring buffer"""
+
+    def test_percentile_over_last_samples(self):
+        """Only the most recent `size` samples count"""
+        window = LatencyWindow(size=100)
+        for _ in range(100):
+            window.record(5.0)
+        for i in range(100):
+            window.record(i / 100)
+
+        assert len(window) == 100
+        assert window.percentile(50) == pytest.approx(0.5)
+        assert window.percentile(95) == pytest.approx(0.95)
@@ -0,0 +1,106 @@
+"""
+ETag / conditional request tests for calorie lookups
+
+The dish is seeded into the service cache so no USDA call is made.
+"""
+import pytest
+
+from src.services.usda_service import get_usda_service
+from src.utils.http_cache import etag_matches
+
+CACHED_FOOD = {
+    "fdc_id": 173944,
+    "description": "Bananas, raw",
+    "calories_per_100g": 89,
+    "serving_size": 100,
+    "serving_unit": "g",
+    "data_type": "SR Legacy",
+    "source": "USDA FoodData Central",
+}
+
+
+@pytest.fixture
+def cached_dish():
+    """Seed the USDA service cache with a known dish"""
+    get_usda_service()._set_cache("etag banana", CACHED_FOOD)
+    return "etag banana"
+
+
+class TestCalorieETags:
+    """Test HTTP caching headers on /get-calories"""
+
+    def test_response_has_etag_and_cache_control(self, authenticated_client, cached_dish):
+        """Successful lookups carry a strong ETag and Cache-Control"""
+        response = authenticated_client.post(
+            "/get-calories", json={"dish_name": cached_dish, "servings": 2}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["total_calories"] == 178
+        assert response.headers["etag"].startswith('"')
+        assert "max-age=" in response.headers["cache-control"]
+
+    def test_matching_if_none_match_returns_304(self, authenticated_client, cached_dish):
+        """A matching If-None-Match on GET gets an empty 304"""
+        params = {"dish_name": cached_dish, "servings": 2}
+        etag = authenticated_client.get("/get-calories", params=params).headers["etag"]
+
+        # Act
+        response = authenticated_client.get(
+            "/get-calories", params=params, headers={"If-None-Match": etag}
+        )
+
+        # Assert
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_matching_if_none_match_on_post_is_412(self, authenticated_client, cached_dish):
+        """POST is not a safe method: a matching If-None-Match is a failed precondition"""
+        payload = {"dish_name": cached_dish, "servings": 2}
+        etag = authenticated_client.post("/get-calories", json=payload).headers["etag"]
+
+        # Act
+        response = authenticated_client.post(
+            "/get-calories", json=payload, headers={"If-None-Match": etag}
+        )
+
+        # Assert
+        assert response.status_code == 412
+        assert response.headers["etag"] == etag
+
+    def test_etag_changes_with_servings(self, authenticated_client, cached_dish):
+        """A different servings count is a different representation"""
+        etag = authenticated_client.post(
+            "/get-calories", json={"dish_name": cached_dish, "servings": 1}
+        ).headers["etag"]
+
+        response = authenticated_client.post(
+            "/get-calories",
+            json={"dish_name": cached_dish, "servings": 3},
+            headers={"If-None-Match": etag},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    def test_get_form_matches_post(self, authenticated_client, cached_dish):
+        """GET /get-calories returns the same body and ETag as POST"""
+        post = authenticated_client.post(
+            "/get-calories", json={"dish_name": cached_dish, "servings": 2}
+        )
+        get = authenticated_client.get(
+            "/get-calories", params={"dish_name": cached_dish, "servings": 2}
+        )
+
+        assert get.status_code == 200
+        assert get.json() == post.json()
+        assert get.headers["etag"] == post.headers["etag"]
+
+    def test_etag_matching_rules(self):
+        """Weak prefixes, lists and * are honoured"""
+        assert etag_matches('W/"abc"', '"abc"')
+        assert etag_matches('"x", "abc"', '"abc"')
+        assert etag_matches("*", '"abc"')
+        assert not etag_matches('"abd"', '"abc"')
+        assert not etag_matches(None, '"abc"')
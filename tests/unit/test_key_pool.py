@@ -0,0 +1,80 @@
+"""
+USDA API key pool tests
+"""
+import httpx
+import pytest
+
+from benchmarks.fake_usda import create_fake_usda_app
+from src.services.food_transport import LiveTransport
+from src.services.key_pool import ApiKeyPool, QuotaExhausted
+
+
+class TestApiKeyPool:
+    """Test key selection, header sync and cooldowns"""
+
+    def test_picks_key_with_most_remaining_quota(self):
+        """Header-reported quota decides which key is used next"""
+        # Arrange
+        pool = ApiKeyPool(["key-aaaa", "key-bbbb"], per_hour=1000)
+        first = pool.acquire()
+        pool.observe(first, 200, {"x-ratelimit-limit": "1000", "x-ratelimit-remaining": "12"})
+
+        # Act
+        chosen = [pool.acquire().key for _ in range(3)]
+
+        # Assert
+        assert first.key not in chosen
+        assert pool.stats()[0]["remaining"] <= 12
+
+    def test_throttled_key_cools_down(self):
+        """A 429 takes the key out of rotation until Retry-After has passed"""
+        # Arrange
+        pool = ApiKeyPool(["key-aaaa", "key-bbbb"], per_hour=1000, cooldown=60)
+        throttled = pool.acquire()
+
+        # Act
+        pool.observe(throttled, 429, {"retry-after": "30"})
+        other = pool.acquire()
+        pool.observe(other, 429, {})
+
+        # Assert
+        assert other is not throttled
+        with pytest.raises(QuotaExhausted) as exc_info:
+            pool.acquire()
+        assert exc_info.value.status_code == 503
+        assert 29 <= int(exc_info.value.headers["Retry-After"]) <= 30
+        assert [key["cooldowns"] for key in pool.stats()] == [1, 1]
+        assert pool.remaining == 0
+
+
+class TestLiveTransportKeyPool:
+    """Test the live transport spreading searches over keys"""
+
+    @pytest.mark.asyncio
+    async def test_spreads_searches_and_fails_over_on_429(self):
+        """Searches use both keys' quotas; 429s fail over, then the pool reports exhaustion"""
+        # Arrange
+        pool = ApiKeyPool(["key-aaaa", "key-bbbb"], per_hour=1000)
+        transport = LiveTransport("http://fake/fdc/v1", pool)
+        transport._client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=create_fake_usda_app(quota_per_key=2))
+        )
+
+        # Act
+        try:
+            statuses = [(await transport.search("banana", timeout=1.0)).status_code for _ in range(4)]
+            # Both keys answer 429 within this call
+            with pytest.raises(QuotaExhausted) as throttled:
+                await transport.search("banana", timeout=1.0)
+            # Both keys are now cooling down
+            with pytest.raises(QuotaExhausted) as cooling:
+                await transport.search("banana", timeout=1.0)
+        finally:
+            await transport.aclose()
+
+        # Assert
+        assert statuses == [200, 200, 200, 200]
+        assert throttled.value.headers == cooling.value.headers
+        stats = pool.stats()
+        assert [key["requests"] for key in stats] == [3, 3]
+        assert [key["throttled"] for key in stats] == [1, 1]
@@ -0,0 +1,202 @@
+"""
+Meal logging and summary tests
+
+Dishes are seeded into the USDA service cache so no USDA call is made.
+"""
+import asyncio
+from datetime import date, datetime, timezone
+
+import pytest
+
+from src.models.meal_log import DailyRollup, MealLog
+from src.services.meal_log import MealLogBuffer, get_meal_log_buffer
+from src.services.usda_service import get_usda_service
+
+CACHED_FOOD = {
+    "fdc_id": 173944,
+    "description": "Bananas, raw",
+    "calories_per_100g": 89,
+    "serving_size": 100,
+    "data_type": "SR Legacy",
+    # calories, protein, fat, carbohydrates, ...
+    "nutrients": [89.0, 1.1, 0.3, 22.8],
+}
+
+
+@pytest.fixture
+def logged_dish():
+    """Seed the USDA service cache with a known dish"""
+    get_usda_service()._set_cache("meal banana", CACHED_FOOD)
+    return "meal banana"
+
+
+def log(client, dish, servings, consumed_at):
+    return client.post(
+        "/meals",
+        json={"dish_name": dish, "servings": servings, "consumed_at": consumed_at},
+    )
+
+
+class TestMealLogging:
+    """Test POST /meals and GET /meals/summary"""
+
+    def test_log_is_queued_and_visible_in_summary(self, authenticated_client, logged_dish, db_session):
+        """Queued entries count in summaries before they are flushed"""
+        # Act
+        response = log(authenticated_client, logged_dish, 2, "2024-03-04T12:30:00Z")
+        summary = authenticated_client.get(
+            "/meals/summary", params={"start": "2024-03-04", "end": "2024-03-04"}
+        )
+
+        # Assert
+        assert response.status_code == 202
+        assert response.json()["calories"] == 178
+        assert response.json()["protein"] == pytest.approx(2.2)
+        assert db_session.query(MealLog).count() == 0
+        assert summary.json()["total"]["calories"] == 178
+        assert summary.json()["total"]["entries"] == 1
+
+    def test_flush_writes_rows_and_increments_rollups(self, authenticated_client, logged_dish, db_session):
+        """Each flush inserts raw rows and adds to the existing daily rollup"""
+        # Arrange
+        buffer = get_meal_log_buffer()
+        log(authenticated_client, logged_dish, 1, "2024-03-04T08:00:00Z")
+        log(authenticated_client, logged_dish, 1, "2024-03-04T13:00:00Z")
+        assert buffer.flush(db_session) == 2
+
+        # Act
+        log(authenticated_client, logged_dish, 3, "2024-03-04T19:00:00Z")
+        buffer.flush(db_session)
+        summary = authenticated_client.get(
+            "/meals/summary", params={"start": "2024-03-04", "end": "2024-03-04"}
+        )
+
+        # Assert
+        assert db_session.query(MealLog).count() == 3
+        rollup = db_session.query(DailyRollup).one()
+        assert (rollup.calories, rollup.entries) == (445, 3)
+        assert summary.json()["total"]["calories"] == 445
+        assert summary.json()["periods"][0]["entries"] == 3
+
+    def test_weekly_summary_groups_by_iso_week(self, authenticated_client, logged_dish, db_session):
+        """group_by=week sums days into weeks starting on Monday"""
+        # Arrange - Sunday 3rd, then Monday 4th and Wednesday 6th
+        for day in ("2024-03-03", "2024-03-04", "2024-03-06"):
+            log(authenticated_client, logged_dish, 1, f"{day}T12:00:00Z")
+        get_meal_log_buffer().flush(db_session)
+
+        # Act
+        summary = authenticated_client.get(
+            "/meals/summary",
+            params={"start": "2024-03-01", "end": "2024-03-10", "group_by": "week"},
+        ).json()
+
+        # Assert
+        assert [p["start"] for p in summary["periods"]] == ["2024-02-26", "2024-03-04"]
+        assert [p["calories"] for p in summary["periods"]] == [89, 178]
+        assert summary["total"]["entries"] == 3
+
+    def test_summary_rejects_inverted_range(self, authenticated_client):
+        """start after end is a validation error"""
+        response = authenticated_client.get(
+            "/meals/summary", params={"start": "2024-03-05", "end": "2024-03-04"}
+        )
+
+        assert response.status_code == 422
+
+
+def meal_row(user_id=1, dish_name="meal banana", calories=89):
+    return {
+        "user_id": user_id, "dish_name": dish_name, "servings": 1, "calories": calories,
+        "protein": 1.1, "fat": 0.3, "carbohydrates": 22.8,
+        "consumed_at": datetime(2024, 3, 4, 12, tzinfo=timezone.utc), "day": date(2024, 3, 4),
+    }
+
+
+class TestMealLogFlush:
+    """Test failure handling and read consistency of MealLogBuffer flushes"""
+
+    @pytest.mark.asyncio
+    async def test_periodic_flush_survives_session_errors(self, db_session):
+        """A failing session factory is logged; the loop keeps flushing afterwards"""
+        # Arrange
+        buffer = MealLogBuffer(batch_size=10)
+        buffer.add(meal_row(1, calories=100))
+        attempts = []
+
+        def session_factory():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("connection pool exhausted")
+            return db_session
+
+        # Act
+        task = asyncio.create_task(buffer.run_periodic_flush(session_factory, interval=0.01))
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if buffer.flushed:
+                break
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # Assert
+        assert buffer.failed_flushes == 1
+        assert buffer.flushed == 1
+
+    def test_rejected_row_is_dropped_and_the_rest_written(self, db_session):
+        """A row the database refuses is isolated; the batch around it is still written"""
+        # Arrange
+        buffer = MealLogBuffer(batch_size=10)
+        for calories in (100, 200, 300):
+            buffer.add(meal_row(calories=calories))
+        buffer.add(meal_row(dish_name=None, calories=5000))  # NOT NULL violation
+        buffer.add(meal_row(calories=400))
+
+        # Act
+        written = buffer.flush(db_session)
+
+        # Assert
+        assert written == 4
+        assert buffer.dropped == 1
+        assert len(buffer) == 0
+        rollup = db_session.query(DailyRollup).one()
+        assert (rollup.calories, rollup.entries) == (1000, 4)
+        assert buffer.pending(1, date(2024, 3, 4), date(2024, 3, 4)) == {}
+
+    def test_unavailable_database_keeps_rows_queued(self, db_session):
+        """Failures other than rejected rows put the whole batch back"""
+        # Arrange
+        buffer = MealLogBuffer()
+        buffer.add(meal_row())
+        MealLog.__table__.drop(bind=db_session.get_bind())
+
+        # Act
+        written = buffer.flush(db_session)
+
+        # Assert
+        assert written == 0
+        assert buffer.failed_flushes == 1
+        assert buffer.dropped == 0
+        assert len(buffer) == 1
+
+    def test_summary_read_racing_a_flush_counts_the_batch_once(self, db_session):
+        """A flush committing during the rollup read makes the read retry"""
+        # Arrange
+        buffer = MealLogBuffer()
+        buffer.add(meal_row())
+        attempts = []
+
+        def read_rollups():
+            if not attempts:
+                buffer.flush(db_session)  # commits while the summary is reading
+            attempts.append(1)
+            return [row.calories for row in db_session.query(DailyRollup).populate_existing()]
+
+        # Act
+        rows, pending = buffer.read_with_pending(read_rollups, 1, date(2024, 3, 4), date(2024, 3, 4))
+
+        # Assert
+        assert len(attempts) == 2
+        assert rows == [89]
+        assert pending == {}
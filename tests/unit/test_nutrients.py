@@ -0,0 +1,95 @@
+"""
+Nutrient vector and /get-macros tests
+"""
+import math
+
+import pytest
+
+from src.services.nutrients import (
+    NUTRIENT_NAMES,
+    extract_nutrient_vector,
+    nutrient_columns,
+    scale_nutrients,
+)
+from src.services.usda_service import get_usda_service
+
+USDA_FOOD = {
+    "fdcId": 173944,
+    "description": "Bananas, raw",
+    "dataType": "SR Legacy",
+    "foodNutrients": [
+        {"nutrientId": 1003, "value": 1.09},
+        {"nutrientId": 1008, "value": 89},
+        {"nutrientId": 1005, "value": 22.8},
+        {"nutrientId": 9999, "value": 1.0},
+    ],
+}
+
+
+@pytest.fixture
+def cached_macros_dish():
+    """Seed the USDA service cache with a dish carrying a nutrient vector"""
+    get_usda_service()._set_cache(
+        "macros banana",
+        {
+            "fdc_id": 173944,
+            "description": "Bananas, raw",
+            "calories_per_100g": 89,
+            "serving_size": 120,
+            "serving_unit": "g",
+            "data_type": "SR Legacy",
+            "source": "USDA FoodData Central",
+            "nutrients": extract_nutrient_vector(USDA_FOOD),
+        },
+    )
+    return "macros banana"
+
+
+class TestNutrientVector:
+    """Test the fixed-layout nutrient vector"""
+
+    def test_extract_fills_known_columns(self):
+        """Known nutrient IDs land in their columns, others stay NaN"""
+        vector = extract_nutrient_vector(USDA_FOOD)
+
+        assert len(vector) == len(NUTRIENT_NAMES)
+        assert vector[NUTRIENT_NAMES.index("calories")] == 89
+        assert math.isclose(vector[NUTRIENT_NAMES.index("protein")], 1.09, rel_tol=1e-6)
+        assert math.isnan(vector[NUTRIENT_NAMES.index("fat")])
+
+    def test_scale_subset(self):
+        """Per-serving and totals are scaled by serving size and count"""
+        vector = extract_nutrient_vector(USDA_FOOD)
+
+        per_serving, total = scale_nutrients(
+            vector, nutrient_columns(["calories", "fat"]), 200, 3
+        )
+
+        assert per_serving == {"calories": 178.0, "fat": None}
+        assert total == {"calories": 534.0, "fat": None}
+
+
+class TestMacrosEndpoint:
+    """Test POST /get-macros"""
+
+    def test_macros_subset(self, authenticated_client, cached_macros_dish):
+        """Requested nutrients only, from the cached record"""
+        response = authenticated_client.post(
+            "/get-macros",
+            json={"dish_name": cached_macros_dish, "servings": 2, "nutrients": ["protein", "carbohydrates"]},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert list(data["per_serving"]) == ["protein", "carbohydrates"]
+        assert data["total"]["carbohydrates"] == pytest.approx(54.72, abs=0.01)
+        assert data["units"] == {"protein": "g", "carbohydrates": "g"}
+
+    def test_unknown_nutrient_rejected(self, authenticated_client, cached_macros_dish):
+        """Unknown nutrient names are a validation error"""
+        response = authenticated_client.post(
+            "/get-macros",
+            json={"dish_name": cached_macros_dish, "servings": 1, "nutrients": ["vitamin_q"]},
+        )
+
+        assert response.status_code == 422
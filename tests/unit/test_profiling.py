@@ -0,0 +1,127 @@
+"""
+Per-request profiling middleware tests
+"""
+import asyncio
+import os
+import pstats
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.middleware.profiling import ProfilingMiddleware
+
+
+@pytest.fixture
+def profiled_client(tmp_path):
+    """Minimal app wrapped in the profiling middleware"""
+    app = FastAPI()
+
+    @app.get("/work")
+    async def work():
+        return {"total": sum(range(1000))}
+
+    app.add_middleware(ProfilingMiddleware, output_dir=str(tmp_path), header="X-Profile")
+    return TestClient(app), tmp_path
+
+
+class TestProfilingMiddleware:
+    """Test opt-in request profiling"""
+
+    def test_header_triggers_profile(self, profiled_client):
+        """Profile file is written and named in the response header"""
+        client, profile_dir = profiled_client
+
+        # Act
+        response = client.get("/work", headers={"X-Profile": "1"})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {"total": 499500}
+        filename = response.headers["x-profile-file"]
+        assert filename.endswith(".prof")
+        assert "total;dur=" in response.headers["server-timing"]
+        stats = pstats.Stats(os.path.join(profile_dir, filename))
+        assert stats.total_calls > 0
+
+    def test_no_profile_without_trigger(self, profiled_client):
+        """Requests without the header (and zero sample rate) are untouched"""
+        client, profile_dir = profiled_client
+
+        # Act
+        response = client.get("/work")
+
+        # Assert
+        assert response.status_code == 200
+        assert "x-profile-file" not in response.headers
+        assert os.listdir(profile_dir) == []
+
+    @pytest.mark.asyncio
+    async def test_streaming_response_is_passed_through(self, tmp_path):
+        """Chunks of a profiled streaming response reach the client as they are sent"""
+        # Arrange
+        first_chunk_sent = asyncio.Event()
+
+        async def streaming_app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"1\n", "more_body": True})
+            await first_chunk_sent.wait()
+            await send({"type": "http.response.body", "body": b"2\n"})
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+            if message.get("more_body"):
+                first_chunk_sent.set()
+
+        middleware = ProfilingMiddleware(streaming_app, output_dir=str(tmp_path), header="X-Profile")
+        scope = {"type": "http", "method": "POST", "path": "/stream", "headers": [(b"x-profile", b"1")]}
+
+        # Act
+        await asyncio.wait_for(middleware(scope, None, send), timeout=2.0)
+
+        # Assert
+        assert [message.get("body") for message in sent] == [None, b"1\n", b"2\n"]
+        headers = dict(sent[0]["headers"])
+        assert headers[b"x-profile-file"].decode() in os.listdir(tmp_path)
+        assert b"server-timing" not in headers
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_are_not_profiled_but_counted(self, tmp_path):
+        """A request arriving mid-profile is not profiled itself and is reported as an overlap"""
+        # Arrange
+        release = asyncio.Event()
+
+        async def app(scope, receive, send):
+            if scope["path"] == "/slow":
+                await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        def request(path):
+            sent = []
+
+            async def send(message):
+                sent.append(message)
+
+            scope = {"type": "http", "method": "GET", "path": path, "headers": [(b"x-profile", b"1")]}
+            return middleware(scope, None, send), sent
+
+        middleware = ProfilingMiddleware(app, output_dir=str(tmp_path), header="X-Profile")
+        slow_call, slow_sent = request("/slow")
+        fast_call, fast_sent = request("/fast")
+
+        # Act
+        slow = asyncio.create_task(slow_call)
+        await asyncio.sleep(0)
+        await fast_call
+        release.set()
+        await asyncio.wait_for(slow, timeout=2.0)
+
+        # Assert
+        slow_headers = dict(slow_sent[0]["headers"])
+        assert slow_headers[b"x-profile-overlaps"] == b"1"
+        assert b"event loop thread" in slow_headers[b"server-timing"]
+        assert b"x-profile-file" not in dict(fast_sent[0]["headers"])
+        assert os.listdir(tmp_path) == [slow_headers[b"x-profile-file"].decode()]
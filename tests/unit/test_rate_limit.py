@@ -0,0 +1,89 @@
+"""
+Rate limiter keying and sliding-window tests
+"""
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from slowapi import Limiter, _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+from slowapi.middleware import SlowAPIMiddleware
+from starlette.requests import Request as StarletteRequest
+
+from src.utils.auth import create_access_token
+from src.utils.rate_limit import RATE_LIMIT_STRATEGY, get_client_ip, rate_limit_key
+
+
+def make_request(headers=None, client=("10.0.0.1", 1234)):
+    """Build a bare Starlette request with the given headers"""
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": client,
+    }
+    return StarletteRequest(scope)
+
+
+@pytest.fixture
+def limited_client():
+    """Tiny app limited to 3 requests/minute with the application key function"""
+    limiter = Limiter(
+        key_func=rate_limit_key,
+        default_limits=["3/minute"],
+        storage_uri="memory://",
+        strategy=RATE_LIMIT_STRATEGY,
+    )
+    app = FastAPI()
+    app.state.limiter = limiter
+    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+    app.add_middleware(SlowAPIMiddleware)
+
+    @app.get("/ping")
+    async def ping(request: Request):
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+class TestRateLimitKey:
+    """Test rate limit key selection"""
+
+    def test_authenticated_requests_keyed_by_user(self):
+        """A valid bearer token keys the limit on the user ID"""
+        token = create_access_token(data={"sub": "7"})
+        request = make_request({"Authorization": f"Bearer {token}"})
+        assert rate_limit_key(request) == "user:7"
+
+    def test_invalid_token_falls_back_to_ip(self):
+        """An invalid token is treated as anonymous"""
+        request = make_request({"Authorization": "Bearer not-a-jwt"})
+        assert rate_limit_key(request) == "ip:10.0.0.1"
+
+    def test_forwarded_for_ignored_without_trusted_proxies(self):
+        """X-Forwarded-For is spoofable unless a proxy is trusted"""
+        request = make_request({"X-Forwarded-For": "1.2.3.4"})
+        assert get_client_ip(request, trusted_proxy_hops=0) == "10.0.0.1"
+
+    def test_forwarded_for_uses_trusted_hop(self):
+        """Client IP is read from the right, skipping client-supplied entries"""
+        request = make_request({"X-Forwarded-For": "6.6.6.6, 1.2.3.4"})
+        assert get_client_ip(request, trusted_proxy_hops=1) == "1.2.3.4"
+        assert get_client_ip(request, trusted_proxy_hops=2) == "6.6.6.6"
+
+
+class TestSlidingWindowLimiter:
+    """Test limits are enforced per key"""
+
+    def test_limit_enforced_per_user(self, limited_client):
+        """Each user gets their own budget"""
+        alice = {"Authorization": f"Bearer {create_access_token(data={'sub': '1'})}"}
+        bob = {"Authorization": f"Bearer {create_access_token(data={'sub': '2'})}"}
+
+        # Act
+        alice_statuses = [limited_client.get("/ping", headers=alice).status_code for _ in range(4)]
+        bob_status = limited_client.get("/ping", headers=bob).status_code
+
+        # Assert
+        assert alice_statuses == [200, 200, 200, 429]
+        assert bob_status == 200
@@ -0,0 +1,133 @@
+"""
+Read replica routing tests
+
+Replicas are SQLite files; the primary is the test client's in-memory database.
+"""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from src.database import connection
+from src.database.connection import ReplicaSet, _create_engine
+from src.models.user import Base
+from src.utils.auth import create_access_token
+
+
+def make_replica(path) -> Engine:
+    engine = _create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def replica(monkeypatch, tmp_path):
+    """One SQLite replica (with the schema but no rows) routed to by get_read_db"""
+    engine = make_replica(tmp_path / "replica.db")
+    replicas = ReplicaSet([engine], retry_interval=60)
+    monkeypatch.setattr(connection, "_replica_set", replicas)
+    yield engine
+    replicas.dispose()
+
+
+class TestReplicaSet:
+    """Test round-robin selection and failover"""
+
+    def test_round_robin_skips_unreachable_replica(self, tmp_path):
+        """Reads alternate over healthy replicas; a broken one is taken out of rotation"""
+        # Arrange
+        replicas = ReplicaSet([
+            make_replica(tmp_path / "a.db"),
+            _create_engine(f"sqlite:///{tmp_path / 'missing' / 'b.db'}"),
+            make_replica(tmp_path / "c.db"),
+        ], retry_interval=60)
+
+        # Act
+        for _ in range(6):
+            replicas.connect().close()
+        stats = replicas.stats()
+
+        # Assert
+        assert [replica["reads"] for replica in stats] == [3, 0, 3]
+        assert [replica["healthy"] for replica in stats] == [True, False, True]
+        assert stats[1]["failures"] == 1
+
+    def test_no_healthy_replica_returns_none(self, tmp_path):
+        """With every replica down the caller falls back to the primary"""
+        # Arrange
+        replicas = ReplicaSet(
+            [_create_engine(f"sqlite:///{tmp_path / 'missing' / 'a.db'}")], retry_interval=60
+        )
+
+        # Act
+        first, second = replicas.connect(), replicas.connect()
+
+        # Assert
+        assert first is None and second is None
+        assert replicas.stats()[0]["failures"] == 1
+
+
+class TestReplicaRouting:
+    """Test which database user lookups and writes hit"""
+
+    def test_user_lookup_reads_replica(self, client, replica):
+        """An authenticated request resolves the user from the replica"""
+        # Arrange
+        with replica.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO users (id, first_name, last_name, email, password_hash) "
+                "VALUES (999, 'Replica', 'Only', 'replica@example.com', 'x')"
+            ))
+        token = create_access_token(data={"sub": "999"})
+
+        # Act
+        response = client.get("/foods/popular", headers={"Authorization": f"Bearer {token}"})
+
+        # Assert
+        assert response.status_code == 200
+        assert connection._replica_set.stats()[0]["reads"] == 1
+
+    def test_lagging_replica_falls_back_to_primary(self, client, test_user_data, replica):
+        """A user not yet replicated can log in and authenticate; writes stay on the primary"""
+        # Arrange
+        client.post("/auth/register", json=test_user_data)
+
+        # Act
+        login = client.post("/auth/login", json={
+            "email": test_user_data["email"], "password": test_user_data["password"],
+        })
+        response = client.get(
+            "/foods/popular", headers={"Authorization": f"Bearer {login.json()['access_token']}"}
+        )
+
+        # Assert
+        assert login.status_code == 200
+        assert response.status_code == 200
+        assert connection._replica_set.stats()[0]["reads"] == 2
+        with replica.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM users")).scalar() == 0
+            assert conn.execute(text("SELECT COUNT(*) FROM refresh_tokens")).scalar() == 0
+
+    def test_failing_replica_query_falls_back_and_marks_replica_down(
+        self, client, test_user_data, monkeypatch, tmp_path
+    ):
+        """A replica that connects but cannot answer is skipped; the primary serves the read"""
+        # Arrange - reachable replica without the schema
+        replicas = ReplicaSet([_create_engine(f"sqlite:///{tmp_path / 'empty.db'}")], retry_interval=60)
+        monkeypatch.setattr(connection, "_replica_set", replicas)
+        register = client.post("/auth/register", json=test_user_data)
+        headers = {"Authorization": f"Bearer {register.json()['access_token']}"}
+
+        # Act
+        response = client.get("/foods/popular", headers=headers)
+        login = client.post("/auth/login", json={
+            "email": test_user_data["email"], "password": test_user_data["password"],
+        })
+
+        # Assert
+        assert response.status_code == 200
+        assert login.status_code == 200
+        stats = replicas.stats()[0]
+        assert stats["healthy"] is False
+        assert stats["failures"] == 1
+        assert stats["reads"] == 1
+        replicas.dispose()
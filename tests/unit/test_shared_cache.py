@@ -0,0 +1,106 @@
+"""
+Memory-mapped shared food cache tests
+"""
+import fcntl
+import threading
+import time
+
+import pytest
+
+from src.services import shared_cache
+from src.services.shared_cache import SharedFoodCache
+
+FOOD = {
+    "description": "Bananas, raw",
+    "calories_per_100g": 89,
+    "serving_size": 100,
+    "serving_unit": "g",
+    "data_type": "SR Legacy",
+    "source": "USDA FoodData Central",
+}
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "food-cache")
+
+
+class TestSharedFoodCache:
+    """Test the cross-process food cache"""
+
+    def test_value_visible_to_other_mapping(self, cache_path):
+        """A second mapping of the same file (another worker) sees the write"""
+        writer = SharedFoodCache(cache_path, slots=64, slot_size=512)
+        reader = SharedFoodCache(cache_path, slots=64, slot_size=512)
+
+        # Act
+        assert writer.set("food_search:banana", FOOD)
+        result = reader.get("food_search:banana", ttl=60)
+
+        # Assert
+        assert result is not None
+        data, stored_at = result
+        assert data == FOOD
+        assert stored_at > 0
+        assert reader.get("food_search:apple", ttl=60) is None
+
+    def test_expired_entries_are_misses(self, cache_path):
+        """Entries older than the TTL are not returned"""
+        cache = SharedFoodCache(cache_path, slots=64, slot_size=512)
+        cache.set("food_search:banana", FOOD)
+
+        assert cache.get("food_search:banana", ttl=0) is None
+
+    def test_existing_file_geometry_is_adopted(self, cache_path):
+        """Later openers reuse the geometry the file was created with"""
+        SharedFoodCache(cache_path, slots=64, slot_size=512)
+        reopened = SharedFoodCache(cache_path, slots=1024, slot_size=256)
+
+        assert (reopened.slots, reopened.slot_size) == (64, 512)
+
+    def test_oversized_payload_rejected(self, cache_path):
+        """Values that don't fit in a slot are skipped, not truncated"""
+        cache = SharedFoodCache(cache_path, slots=8, slot_size=64)
+
+        assert cache.set("food_search:banana", FOOD) is False
+        assert cache.get("food_search:banana", ttl=60) is None
+
+    def test_full_table_evicts_oldest(self, cache_path):
+        """With every slot taken, new keys still get stored"""
+        cache = SharedFoodCache(cache_path, slots=2, slot_size=512)
+        for i in range(5):
+            assert cache.set(f"food_search:dish {i}", FOOD)
+
+        assert cache.get("food_search:dish 4", ttl=60)[0] == FOOD
+
+    def test_threads_sharing_one_instance_take_turns(self, cache_path, monkeypatch):
+        """flock does not exclude threads sharing the fd, so writers also need a thread lock"""
+        # Arrange - widen the critical section and track how many writers are inside it
+        cache = SharedFoodCache(cache_path, slots=16, slot_size=512)
+        inside = {"now": 0, "max": 0}
+        real_flock = shared_cache.fcntl.flock
+
+        def tracking_flock(fd, operation):
+            real_flock(fd, operation)
+            if operation == fcntl.LOCK_EX:
+                inside["now"] += 1
+                inside["max"] = max(inside["max"], inside["now"])
+                time.sleep(0.001)
+            elif operation == fcntl.LOCK_UN:
+                inside["now"] -= 1
+
+        monkeypatch.setattr(shared_cache.fcntl, "flock", tracking_flock)
+        threads = [
+            threading.Thread(target=lambda n=n: [cache.set(f"food_search:dish {n}", FOOD) for _ in range(20)])
+            for n in range(4)
+        ]
+
+        # Act
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Assert
+        assert inside["max"] == 1
+        assert all(cache.get(f"food_search:dish {n}", ttl=60)[0] == FOOD for n in range(4))
@@ -0,0 +1,24 @@
+"""
+Import/startup budget tests
+"""
+from benchmarks.startup import (
+    IMPORT_BUDGET_MS,
+    LIFESPAN_BUDGET_MS,
+    measure_startup,
+)
+
+
+class TestStartupBudget:
+    """Importing main must stay cheap; heavy work happens in the lifespan"""
+
+    def test_import_is_lazy_and_within_budget(self):
+        """No settings, engine or deferred modules at import, timings within budget"""
+        # Act
+        report = measure_startup()
+
+        # Assert
+        assert report["settings_loaded_at_import"] is False
+        assert report["engine_created_at_import"] is False
+        assert report["deferred_modules_loaded_at_import"] == []
+        assert report["import_main_ms"] < IMPORT_BUDGET_MS, report
+        assert report["lifespan_ms"] < LIFESPAN_BUDGET_MS, report
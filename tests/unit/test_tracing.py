@@ -0,0 +1,157 @@
+"""
+Request tracing tests
+"""
+import json
+
+from fastapi.testclient import TestClient
+
+from benchmarks.fake_usda import load_payloads
+from main import app
+from src.middleware.tracing import TracingMiddleware
+from src.routers import calories
+from src.services.food_transport import Cassette, ReplayTransport
+from src.services.usda_service import USDAService
+from src.utils import tracing
+from src.utils.tracing import FileExporter, MemoryExporter, Tracer
+
+INCOMING_TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+INCOMING_PARENT_ID = "00f067aa0ba902b7"
+
+
+class TestTracer:
+    """Test sampling, propagation and export"""
+
+    def test_incoming_traceparent_decides_sampling(self):
+        """A caller's sampled flag overrides the local rate; its trace id is kept"""
+        # Arrange
+        tracer = Tracer(MemoryExporter(), sample_rate=0.0)
+
+        # Act
+        local = tracer.start_trace("GET /")
+        continued = tracer.start_trace("GET /", f"00-{INCOMING_TRACE_ID}-{INCOMING_PARENT_ID}-01")
+        declined = tracer.start_trace("GET /", f"00-{INCOMING_TRACE_ID}-{INCOMING_PARENT_ID}-00")
+        malformed = tracer.start_trace("GET /", "00-xyz-01")
+
+        # Assert
+        assert local is None and declined is None and malformed is None
+        assert continued.trace.trace_id == INCOMING_TRACE_ID
+        assert continued.parent_id == INCOMING_PARENT_ID
+        assert continued.traceparent.startswith(f"00-{INCOMING_TRACE_ID}-")
+        assert tracer.stats()["sampled"] == 1
+        assert tracer.stats()["unsampled"] == 3
+
+    def test_spans_nest_and_file_exporter_writes_on_close(self, tmp_path):
+        """Child spans link to their parent; errors are recorded; buffered traces reach the file"""
+        # Arrange
+        path = tmp_path / "traces.jsonl"
+        tracer = Tracer(FileExporter(str(path), flush_every=10), sample_rate=1.0)
+        root = tracer.start_trace("GET /")
+
+        # Act
+        token = tracing.activate(root)
+        try:
+            with tracing.span("outer"):
+                try:
+                    with tracing.span("inner", n=1):
+                        raise ValueError("boom")
+                except ValueError:
+                    pass
+        finally:
+            tracing.deactivate(token)
+        tracer.finish(root)
+        written_before_close = path.exists()
+        tracer.close()
+        with tracing.span("untraced") as untraced:
+            pass
+
+        # Assert
+        assert written_before_close is False
+        trace = json.loads(path.read_text().splitlines()[0])
+        spans = {span["name"]: span for span in trace["spans"]}
+        assert spans["outer"]["parent_id"] == spans["GET /"]["span_id"]
+        assert spans["inner"]["parent_id"] == spans["outer"]["span_id"]
+        assert spans["inner"]["error"] == "ValueError"
+        assert spans["inner"]["attributes"] == {"n": 1}
+        assert untraced is None
+
+
+class TestTracingMiddleware:
+    """Test spans recorded across a traced request"""
+
+    def test_calorie_lookup_trace_covers_auth_db_and_upstream(
+        self, authenticated_client, monkeypatch, tmp_path
+    ):
+        """One trace holds the route, auth, SQL, cache, upstream attempt and parsing spans"""
+        # Arrange
+        cassette = Cassette(str(tmp_path / "cassette.json"))
+        for query, body in load_payloads().items():
+            cassette.put(query, 200, body, elapsed_ms=0)
+        service = USDAService()
+        service.transport = ReplayTransport(cassette, latency_ms=0)
+        monkeypatch.setattr(calories, "get_usda_service", lambda: service)
+        exporter = MemoryExporter()
+        traced = TestClient(TracingMiddleware(app, Tracer(exporter, sample_rate=0.0)))
+        headers = {
+            **authenticated_client.headers,
+            "traceparent": f"00-{INCOMING_TRACE_ID}-{INCOMING_PARENT_ID}-01",
+        }
+
+        # Act
+        response = traced.post(
+            "/get-calories", json={"dish_name": "apple", "servings": 1}, headers=headers
+        )
+        untraced = traced.get("/health")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["traceparent"].startswith(f"00-{INCOMING_TRACE_ID}-")
+        assert "traceparent" not in untraced.headers
+        [trace] = exporter.traces()
+        assert trace["trace_id"] == INCOMING_TRACE_ID
+        spans = trace["spans"]
+        names = {span["name"] for span in spans}
+        assert {
+            "POST /get-calories", "auth.get_current_user", "auth.verify_token", "db.query",
+            "usda.cache_lookup", "usda.search_food", "usda.attempt", "usda.parse",
+        } <= names
+        root = spans[0]
+        assert root["parent_id"] == INCOMING_PARENT_ID
+        assert root["attributes"]["http.status_code"] == 200
+        assert root["attributes"]["handler"] == "get_calories"
+        span_ids = {span["span_id"] for span in spans}
+        assert all(span["parent_id"] in span_ids for span in spans[1:])
+
+    def test_traces_endpoint_serves_only_the_callers_traces(
+        self, authenticated_client, monkeypatch, tmp_path
+    ):
+        """GET /traces needs a user, hides other users' traces and omits dish queries"""
+        # Arrange
+        cassette = Cassette(str(tmp_path / "cassette.json"))
+        for query, body in load_payloads().items():
+            cassette.put(query, 200, body, elapsed_ms=0)
+        service = USDAService()
+        service.transport = ReplayTransport(cassette, latency_ms=0)
+        monkeypatch.setattr(calories, "get_usda_service", lambda: service)
+        tracer = Tracer(MemoryExporter(), sample_rate=1.0)
+        monkeypatch.setattr(tracing, "_tracer", tracer)
+        traced = TestClient(TracingMiddleware(app, tracer))
+        other = tracer.start_trace("POST /get-calories")
+        other.trace.user_id = -1
+        tracer.finish(other)
+
+        # Act
+        traced.post(
+            "/get-calories", json={"dish_name": "apple", "servings": 1},
+            headers=authenticated_client.headers,
+        )
+        anonymous = traced.get("/traces")
+        own = traced.get("/traces", headers=authenticated_client.headers)
+
+        # Assert
+        assert anonymous.status_code in (401, 403)
+        assert own.status_code == 200
+        user_ids = {trace["user_id"] for trace in own.json()["traces"]}
+        assert len(user_ids) == 1 and -1 not in user_ids and None not in user_ids
+        spans = [span for trace in own.json()["traces"] for span in trace["spans"]]
+        [search] = [span for span in spans if span["name"] == "usda.search_food"]
+        assert "query" not in search["attributes"]
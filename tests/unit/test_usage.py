@@ -0,0 +1,180 @@
+"""
+Usage metering tests
+
+Cache hits come from seeded entries; misses are answered offline by an empty replay
+transport (dish not found).
+"""
+import threading
+
+import pytest
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+
+from src.models.usage import UsageCounter
+from src.services.food_transport import Cassette, ReplayTransport
+from src.services.usage import UsageMeter, get_usage_meter
+from src.services.usda_service import get_usda_service
+
+
+@pytest.fixture
+def metered_dishes(monkeypatch, tmp_path):
+    """One cached dish; every other dish is a miss that USDA does not know"""
+    service = get_usda_service()
+    service._set_cache("usage banana", {
+        "fdc_id": 1, "description": "Bananas, raw", "calories_per_100g": 89,
+        "serving_size": 100, "serving_unit": "g", "source": "USDA FoodData Central",
+    })
+    monkeypatch.setattr(service, "transport", ReplayTransport(Cassette(str(tmp_path / "empty.json"))))
+    return "usage banana", "usage unknown dish"
+
+
+class TestUsageMetering:
+    """Test lookup counting, GET /usage and batched flushes"""
+
+    def test_lookups_are_counted_before_and_after_flush(
+        self, authenticated_client, metered_dishes, db_session
+    ):
+        """Unflushed counts are reported; a flush moves them to the table without double counting"""
+        # Arrange
+        hit, miss = metered_dishes
+        meter = get_usage_meter()
+        authenticated_client.post("/get-calories", json={"dish_name": hit, "servings": 1})
+        authenticated_client.post("/get-calories", json={"dish_name": miss, "servings": 1})
+
+        # Act
+        before = authenticated_client.get("/usage").json()
+        flushed = meter.flush(db_session)
+        authenticated_client.post("/get-macros", json={"dish_name": hit, "servings": 1})
+        meter.flush(db_session)
+        after = authenticated_client.get("/usage").json()
+
+        # Assert
+        assert (before["lookups"], before["upstream_misses"]) == (2, 1)
+        assert flushed == 1
+        row = db_session.query(UsageCounter).one()
+        assert (row.lookups, row.upstream_misses) == (3, 1)
+        assert row.day == datetime.now(timezone.utc).date()
+        assert (after["lookups"], after["upstream_misses"]) == (3, 1)
+        assert len(meter) == 0
+
+    def test_stream_counts_each_item_and_shared_misses_once(
+        self, authenticated_client, metered_dishes
+    ):
+        """A streamed batch counts every item; repeated misses are one upstream lookup"""
+        # Arrange
+        hit, miss = metered_dishes
+        items = [{"dish_name": name, "servings": 1} for name in (hit, miss, miss.upper())]
+
+        # Act
+        authenticated_client.post("/get-calories/stream", json={"items": items})
+        usage = authenticated_client.get("/usage").json()
+
+        # Assert
+        assert (usage["lookups"], usage["upstream_misses"]) == (3, 1)
+        assert usage["days"][0]["lookups"] == 3
+
+    def test_failed_flush_keeps_counts(self, db_session):
+        """Counts survive a failed flush and are written by the next one"""
+        # Arrange
+        meter = UsageMeter()
+        meter.record(42, upstream_misses=1)
+        UsageCounter.__table__.drop(bind=db_session.get_bind())
+
+        # Act
+        failed = meter.flush(db_session)
+        UsageCounter.__table__.create(bind=db_session.get_bind())
+        retried = meter.flush(db_session)
+
+        # Assert
+        assert failed == 0
+        assert meter.failed_flushes == 1
+        assert retried == 1
+        assert db_session.query(UsageCounter).one().lookups == 1
+
+    def test_rejected_counter_is_dropped_and_the_rest_written(self, db_session):
+        """A counter the database refuses is isolated instead of failing every flush"""
+        # Arrange
+        meter = UsageMeter()
+        for user_id in (1, 2, 3):
+            meter.record(user_id)
+        meter._deltas[(4, None)] = [1, 0]  # NOT NULL primary key column
+
+        # Act
+        written = meter.flush(db_session)
+
+        # Assert
+        assert written == 3
+        assert meter.dropped == 1
+        assert len(meter) == 0
+        assert db_session.query(UsageCounter).count() == 3
+
+    def test_pending_counters_are_bounded(self):
+        """Beyond max_pending_keys new users are not counted; existing counters still grow"""
+        # Arrange
+        meter = UsageMeter(max_pending_keys=2)
+        today = datetime.now(timezone.utc).date()
+
+        # Act
+        for user_id in (1, 2, 3, 1):
+            meter.record(user_id)
+
+        # Assert
+        assert len(meter) == 2
+        assert meter.dropped_lookups == 1
+        assert meter.pending(1, today, today) == {today: [2, 0]}
+
+    def test_read_racing_a_flush_counts_once(self, db_session):
+        """A flush committing during the usage read makes the read retry"""
+        # Arrange
+        meter = UsageMeter()
+        meter.record(1, upstream_misses=1)
+        today = datetime.now(timezone.utc).date()
+        attempts = []
+
+        def read_usage():
+            if not attempts:
+                meter.flush(db_session)
+            attempts.append(1)
+            return [row.lookups for row in db_session.query(UsageCounter).populate_existing()]
+
+        # Act
+        rows, pending = meter.read_with_pending(read_usage, 1, today, today)
+
+        # Assert
+        assert len(attempts) == 2
+        assert rows == [1]
+        assert pending == {}
+
+    def test_failed_lookup_is_not_metered(self, authenticated_client, metered_dishes, monkeypatch):
+        """Lookups that end in 503 (shed or upstream failure) are not billed"""
+        # Arrange
+        _, miss = metered_dishes
+
+        async def unavailable(query):
+            raise HTTPException(status_code=503, detail="Unable to connect to food database")
+
+        monkeypatch.setattr(get_usda_service(), "search_food", unavailable)
+
+        # Act
+        response = authenticated_client.post("/get-calories", json={"dish_name": miss, "servings": 1})
+        usage = authenticated_client.get("/usage").json()
+
+        # Assert
+        assert response.status_code == 503
+        assert usage["lookups"] == 0
+
+    def test_blocking_flush_waits_for_a_running_flush(self, db_session):
+        """The shutdown flush writes counts instead of returning while another flush runs"""
+        # Arrange
+        meter = UsageMeter()
+        meter.record(1)
+        meter._flush_lock.acquire()
+        threading.Timer(0.1, meter._flush_lock.release).start()
+
+        # Act
+        written = meter.flush(db_session, blocking=True)
+
+        # Assert
+        assert written == 1
+        assert db_session.query(UsageCounter).one().lookups == 1
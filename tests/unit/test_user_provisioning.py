@@ -0,0 +1,46 @@
+"""
+Bulk user provisioning tests
+"""
+import io
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy.orm import sessionmaker
+
+from src.models.user import User
+from src.services.user_provisioning import provision_users, read_users_csv
+from src.utils.auth import verify_password
+
+CSV = """first_name,last_name,email,password
+Ada,Lovelace,ada@example.com,analytical1
+Alan,Turing,alan@example.com,enigma123
+Bad,Row,not-an-email,whatever1
+Grace,Hopper,test@example.com,cobol1959
+Edsger,Dijkstra,edsger@example.com,shortest1
+"""
+
+
+class TestProvisionUsers:
+    """Test CSV provisioning with a process pool"""
+
+    def test_inserts_valid_new_users_and_skips_the_rest(self, client, test_user_data, db_session):
+        """Invalid rows and existing emails are counted, everything else is inserted"""
+        # Arrange - test@example.com already exists
+        client.post("/auth/register", json=test_user_data)
+        report = {"read": 0, "invalid": 0}
+        session_factory = sessionmaker(bind=db_session.get_bind())
+
+        # Act
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            provision_users(
+                read_users_csv(io.StringIO(CSV), report),
+                session_factory,
+                executor,
+                batch_size=2,
+                report=report,
+            )
+
+        # Assert
+        assert report == {"read": 5, "invalid": 1, "inserted": 3, "existing": 1}
+        assert db_session.query(User).count() == 4
+        ada = User.get_by_email(db_session, "ada@example.com")
+        assert verify_password("analytical1", ada.password_hash)